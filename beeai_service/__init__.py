@@ -3,5 +3,9 @@
 BeeAI Predictive Maintenance Service
 A production-ready BeeAI agent service for WXO with IBM watsonx.ai support
 """
+import time
+
+# Reference point for the startup-time report
+STARTED_AT = time.monotonic()
 
 __description__ = "BeeAI Predictive Maintenance Service for WXO with watsonx.ai using IBM Granite LLM"
\ No newline at end of file
@@ -3,39 +3,40 @@ BeeAI Service - Main Entry Point
 Single unified service for WXO integration with IBM watsonx.ai
 """
 import sys
-import traceback
 from beeai_framework.errors import FrameworkError
-from beeai_service.config.settings import app_settings, watsonx_settings
-from beeai_service.core.agent import create_maintenance_agent
-from beeai_service.servers.wxo_server import WXOServer
+from beeai_service.config.settings import app_settings
+from beeai_service.core.log import get_logger, setup_logging
+from beeai_service.servers.wxo_server import WXOServer, serve_workers, worker_count
+
+
+logger = get_logger("beeai_service")
 
 
 def main():
     """Main entry point"""
+    setup_logging()
+    
     try:
-        print("=" * 60)
-        print("🚀 BeeAI Predictive Maintenance Service")
-        print("=" * 60)
-        print(f"🤖 Model: {app_settings.llm_model}")
-        print(f"🔌 Server: {app_settings.wxo_host}:{app_settings.wxo_port}")
-        print("=" * 60)
+        logger.info(
+            "BeeAI Predictive Maintenance Service starting",
+            extra={"model": app_settings.llm_model, "server": f"{app_settings.wxo_host}:{app_settings.wxo_port}"}
+        )
         
-        # Create agent
-        print("\n🤖 Creating BeeAI Maintenance Agent...")
-        agent = create_maintenance_agent()
+        # Each worker process builds its own agent factory at startup
+        if worker_count() > 1:
+            serve_workers()
+            return
         
-        # Create and start WXO server
-        print("🚀 Starting WXO HTTP Server...\n")
-        server = WXOServer(agent)
+        # Start the WXO server; the agent is built and warmed up once the port is bound
+        logger.info("Starting WXO HTTP Server")
+        server = WXOServer()
         server.serve()
         
-    except FrameworkError as e:
-        print(f"❌ Framework Error: {e}")
-        traceback.print_exc()
+    except FrameworkError:
+        logger.exception("Framework error")
         sys.exit(1)
-    except Exception as e:
-        print(f"❌ Unexpected Error: {e}")
-        traceback.print_exc()
+    except Exception:
+        logger.exception("Unexpected error")
         sys.exit(1)
 
 
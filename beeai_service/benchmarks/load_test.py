@@ -0,0 +1,235 @@
+"""
+Load test for the WXO server against the mock ChatModel
+
+Starts WXOServer in-process with MockChatModel, drives /chat/completions at
+a fixed concurrency and reports throughput, latency and TTFB percentiles and
+RSS over time. Results can be saved as a baseline and later runs compared
+against it. The tool result cache follows BEEAI_TOOL_CACHE_ENABLED, as in
+production.
+
+Usage:
+    python -m beeai_service.benchmarks.load_test --requests 200 --concurrency 16
+    python -m beeai_service.benchmarks.load_test --save-baseline
+    python -m beeai_service.benchmarks.load_test --compare
+"""
+import argparse
+import asyncio
+import json
+import resource
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import httpx
+import uvicorn
+
+from beeai_service.benchmarks.mock_llm import MockChatModel
+from beeai_service.config.settings import app_settings
+from beeai_service.core.agent import MaintenanceAgentFactory
+from beeai_service.servers.wxo_server import ERROR_PREFIX, WXOServer
+
+
+BASELINE_PATH = Path(__file__).with_name("baseline.json")
+
+# Metrics where a higher value is a regression; throughput is checked separately
+LOWER_IS_BETTER = ("latency_p50_ms", "latency_p95_ms", "latency_p99_ms", "ttfb_p50_ms", "ttfb_p95_ms", "rss_peak_mb")
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def rss_mb() -> float:
+    """Current resident set size of this process in MB"""
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # Not Linux: fall back to the peak RSS (KB on Linux, bytes on macOS)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def chunk_error(line: str) -> Optional[str]:
+    """Error carried by an SSE chunk: a run failure sent as content, or a finish_reason other than stop"""
+    if not line.startswith("data: {"):
+        return None
+    choice = json.loads(line[len("data: "):])["choices"][0]
+    content = choice.get("delta", {}).get("content") or ""
+    if content.startswith(ERROR_PREFIX):
+        return content[len(ERROR_PREFIX):].strip().splitlines()[0]
+    if choice.get("finish_reason") not in (None, "stop"):
+        return f"finish_reason {choice['finish_reason']}"
+    return None
+
+
+async def one_request(client: httpx.AsyncClient, prompt: str, stream: bool) -> Dict[str, Any]:
+    """Send one chat request; a 200 whose stream carries an error chunk counts as failed"""
+    started = time.perf_counter()
+    ttfb = None
+    status = 0
+    error = None
+    async with client.stream(
+        "POST",
+        "/chat/completions",
+        json={"messages": [{"role": "user", "content": prompt}], "stream": stream},
+        headers={"x-api-key": app_settings.api_key}
+    ) as response:
+        status = response.status_code
+        async for line in response.aiter_lines():
+            error = error or chunk_error(line)
+            if ttfb is None and line.startswith("data: {") and '"content": "' in line and '"content": ""' not in line:
+                ttfb = time.perf_counter() - started
+    latency = time.perf_counter() - started
+    result = {"status": status, "latency": latency, "ttfb": ttfb if ttfb is not None else latency}
+    if error:
+        result["error"] = error
+    return result
+
+
+async def run_load(
+    base_url: str,
+    requests: int,
+    concurrency: int,
+    prompt: str,
+    stream: bool,
+    rss_interval: float
+) -> Dict[str, Any]:
+    results: List[Dict[str, Any]] = []
+    rss_samples: List[Dict[str, float]] = []
+    semaphore = asyncio.Semaphore(concurrency)
+    started = time.perf_counter()
+    
+    async def sample_rss():
+        while True:
+            rss_samples.append({"t": round(time.perf_counter() - started, 2), "rss_mb": round(rss_mb(), 1)})
+            await asyncio.sleep(rss_interval)
+    
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=300, limits=limits) as client:
+        async def worker(index: int):
+            async with semaphore:
+                try:
+                    results.append(await one_request(client, prompt.format(index=index), stream))
+                except httpx.HTTPError as e:
+                    results.append({"status": 0, "error": str(e)})
+        
+        sampler = asyncio.create_task(sample_rss())
+        await asyncio.gather(*(worker(i) for i in range(requests)))
+        sampler.cancel()
+    
+    elapsed = time.perf_counter() - started
+    rss_samples.append({"t": round(elapsed, 2), "rss_mb": round(rss_mb(), 1)})
+    ok = [r for r in results if r["status"] == 200 and "error" not in r]
+    errors = sorted({r["error"] for r in results if "error" in r})
+    latencies = [r["latency"] * 1000 for r in ok]
+    ttfbs = [r["ttfb"] * 1000 for r in ok]
+    
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "stream": stream,
+        "succeeded": len(ok),
+        "failed": len(results) - len(ok),
+        "errors": errors[:5],
+        "elapsed_s": round(elapsed, 2),
+        "throughput_rps": round(len(ok) / elapsed, 2) if elapsed else 0.0,
+        "latency_p50_ms": round(percentile(latencies, 50), 1),
+        "latency_p95_ms": round(percentile(latencies, 95), 1),
+        "latency_p99_ms": round(percentile(latencies, 99), 1),
+        "ttfb_p50_ms": round(percentile(ttfbs, 50), 1),
+        "ttfb_p95_ms": round(percentile(ttfbs, 95), 1),
+        "ttfb_p99_ms": round(percentile(ttfbs, 99), 1),
+        "rss_start_mb": rss_samples[0]["rss_mb"],
+        "rss_peak_mb": max(sample["rss_mb"] for sample in rss_samples),
+        "rss_end_mb": rss_samples[-1]["rss_mb"],
+        "rss_samples": rss_samples
+    }
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Return a description of every metric that regressed beyond the tolerance"""
+    regressions = []
+    for key in LOWER_IS_BETTER:
+        if baseline.get(key) and results[key] > baseline[key] * (1 + tolerance):
+            regressions.append(f"{key}: {results[key]} vs baseline {baseline[key]}")
+    if baseline.get("throughput_rps") and results["throughput_rps"] < baseline["throughput_rps"] * (1 - tolerance):
+        regressions.append(f"throughput_rps: {results['throughput_rps']} vs baseline {baseline['throughput_rps']}")
+    return regressions
+
+
+async def main_async(args: argparse.Namespace) -> Dict[str, Any]:
+    # Benchmark traffic comes from one key, so the per-key rate limit would cap it
+    app_settings.rate_limit_per_second = 0
+    app_settings.admission_max_in_flight = max(app_settings.admission_max_in_flight, args.concurrency)
+    app_settings.planned_execution = args.planned
+    
+    llm = MockChatModel(token_latency=args.token_latency, call_latency=args.call_latency)
+    server = WXOServer(MaintenanceAgentFactory(llm=llm, max_concurrency=args.concurrency))
+    config = uvicorn.Config(server.app, host="127.0.0.1", port=args.port, log_level="warning", log_config=None)
+    uvicorn_server = uvicorn.Server(config)
+    serve_task = asyncio.create_task(uvicorn_server.serve())
+    while not uvicorn_server.started:
+        await asyncio.sleep(0.05)
+    
+    try:
+        return await run_load(
+            f"http://127.0.0.1:{args.port}",
+            args.requests,
+            args.concurrency,
+            args.prompt,
+            not args.no_stream,
+            args.rss_interval
+        )
+    finally:
+        uvicorn_server.should_exit = True
+        await serve_task
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the BeeAI WXO server with a mock watsonx model")
+    parser.add_argument("--requests", type=int, default=200, help="Total requests to send")
+    parser.add_argument("--concurrency", type=int, default=16, help="Requests in flight at once")
+    parser.add_argument("--token-latency", type=float, default=0.01, help="Mock seconds per generated token")
+    parser.add_argument("--call-latency", type=float, default=0.2, help="Mock seconds before each LLM call responds")
+    parser.add_argument("--prompt", default="Check maintenance status for vehicle TRUCK-{index}", help="Prompt template ({index} is replaced)")
+    parser.add_argument("--no-stream", action="store_true", help="Send stream=false requests")
+    parser.add_argument("--planned", action="store_true", help="Enable the planned execution fast path")
+    parser.add_argument("--rss-interval", type=float, default=0.5, help="Seconds between RSS samples")
+    parser.add_argument("--port", type=int, default=18080, help="Local port for the server under test")
+    parser.add_argument("--output", type=Path, help="Write the results JSON to this file")
+    parser.add_argument("--save-baseline", action="store_true", help=f"Store the results as {BASELINE_PATH.name}")
+    parser.add_argument("--compare", action="store_true", help="Compare against the stored baseline; exit 1 on regression")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Allowed relative regression when comparing")
+    args = parser.parse_args()
+    
+    results = asyncio.run(main_async(args))
+    summary = {key: value for key, value in results.items() if key != "rss_samples"}
+    print(json.dumps(summary, indent=2))
+    
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
+    if args.save_baseline:
+        BASELINE_PATH.write_text(json.dumps(results, indent=2))
+        print(f"Baseline saved to {BASELINE_PATH}")
+    if args.compare:
+        if not BASELINE_PATH.exists():
+            print(f"No baseline at {BASELINE_PATH}; run with --save-baseline first")
+            sys.exit(1)
+        regressions = compare(results, json.loads(BASELINE_PATH.read_text()), args.tolerance)
+        if regressions:
+            print("Regressions:\n  " + "\n  ".join(regressions))
+            sys.exit(1)
+        print("No regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
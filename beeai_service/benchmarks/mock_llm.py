@@ -0,0 +1,122 @@
+"""
+Deterministic stand-in for the watsonx ChatModel
+Replays a scripted sequence of tool calls, then streams a canned answer
+with a fixed per-token latency, so benchmarks run offline and repeatably
+"""
+import asyncio
+import json
+import uuid
+from typing import Any, AsyncGenerator, Dict, List, Optional, Tuple
+
+from beeai_framework.backend import AssistantMessage, ChatModel, MessageToolCallContent, ToolMessage, UserMessage
+from beeai_framework.backend.types import ChatModelInput, ChatModelOutput, ChatModelUsage
+from beeai_framework.context import RunContext
+
+
+# Mirrors the workflow the maintenance agent is instructed to follow
+DEFAULT_SCRIPT: List[Tuple[str, Dict[str, Any]]] = [
+    ("get_vehicle_location", {"vehicle_id": "TRUCK-22"}),
+    ("get_driver_schedule", {"driver_id": "driver-1"}),
+    ("get_dealership_slots", {"city": "San Francisco"}),
+    ("get_parts_inventory", {"component": "Brake Pads"}),
+    ("find_earliest_appointment", {"vehicle_id": "TRUCK-22", "driver_id": "driver-1", "component": "Brake Pads"}),
+]
+
+DEFAULT_ANSWER = (
+    "Vehicle TRUCK-22 is currently located in San Francisco. The driver, driver-1, "
+    "is available on 2025-11-22 from 14:00. The earliest available dealership slot "
+    "is on 2025-11-22 at 15:00. Brake Pads are in stock (5 units). Recommended action "
+    "plan: book the 15:00 slot and reserve one set of brake pads."
+)
+
+
+class MockChatModel(ChatModel):
+    """ChatModel that answers from a script instead of calling watsonx
+    
+    Each call counts the tool results since the latest user message to find
+    its step: while the script has steps left it returns the next tool call,
+    afterwards it answers (through the final_answer tool when the agent
+    offers one). Every generated token costs `token_latency` seconds and each
+    call starts after `call_latency` seconds.
+    """
+    
+    def __init__(
+        self,
+        token_latency: float = 0.01,
+        call_latency: float = 0.2,
+        script: Optional[List[Tuple[str, Dict[str, Any]]]] = None,
+        answer: str = DEFAULT_ANSWER
+    ):
+        super().__init__()
+        self.token_latency = token_latency
+        self.call_latency = call_latency
+        self.script = DEFAULT_SCRIPT if script is None else script
+        self.answer = answer
+    
+    @property
+    def model_id(self) -> str:
+        return "mock-granite"
+    
+    @property
+    def provider_id(self) -> str:
+        return "watsonx"
+    
+    def _step(self, input: ChatModelInput) -> int:
+        step = 0
+        for message in reversed(input.messages):
+            if isinstance(message, UserMessage):
+                break
+            if isinstance(message, ToolMessage):
+                step += 1
+        return step
+    
+    def _usage(self, input: ChatModelInput, completion: str) -> ChatModelUsage:
+        prompt_tokens = sum(len(message.text.split()) for message in input.messages)
+        completion_tokens = len(completion.split())
+        return ChatModelUsage(
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            total_tokens=prompt_tokens + completion_tokens
+        )
+    
+    def _tool_call(self, tool_name: str, args: Dict[str, Any]) -> AssistantMessage:
+        return AssistantMessage(
+            MessageToolCallContent(id=f"call_{uuid.uuid4().hex[:12]}", tool_name=tool_name, args=json.dumps(args))
+        )
+    
+    def _final_answer(self, input: ChatModelInput) -> Optional[AssistantMessage]:
+        """Answer through the agent's final_answer tool when one is offered"""
+        for tool in input.tools or []:
+            if tool.name == "final_answer":
+                field = next(iter(tool.input_schema.model_fields))
+                return self._tool_call(tool.name, {field: self.answer})
+        return None
+    
+    async def _create(self, input: ChatModelInput, run: RunContext) -> ChatModelOutput:
+        await asyncio.sleep(self.call_latency)
+        step = self._step(input)
+        
+        if step < len(self.script) and input.tools:
+            tool_name, args = self.script[step]
+            await asyncio.sleep(self.token_latency * len(json.dumps(args).split()))
+            message = self._tool_call(tool_name, args)
+            return ChatModelOutput(output=[message], usage=self._usage(input, json.dumps(args)), finish_reason="tool_calls")
+        
+        await asyncio.sleep(self.token_latency * len(self.answer.split()))
+        message = self._final_answer(input) or AssistantMessage(self.answer)
+        return ChatModelOutput(output=[message], usage=self._usage(input, self.answer), finish_reason="stop")
+    
+    async def _create_stream(self, input: ChatModelInput, run: RunContext) -> AsyncGenerator[ChatModelOutput, None]:
+        step = self._step(input)
+        if (step < len(self.script) and input.tools) or self._final_answer(input):
+            # Tool calls arrive in one piece
+            yield await self._create(input, run)
+            return
+        
+        await asyncio.sleep(self.call_latency)
+        words = self.answer.split(" ")
+        for index, word in enumerate(words):
+            await asyncio.sleep(self.token_latency)
+            token = word if index == 0 else f" {word}"
+            yield ChatModelOutput(output=[AssistantMessage(token)])
+        yield ChatModelOutput(output=[], usage=self._usage(input, self.answer), finish_reason="stop")
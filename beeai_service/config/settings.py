@@ -19,13 +19,115 @@ class Settings(BaseSettings):
     wxo_port: int = Field(default=8080, description="WXO HTTP server port")
     wxo_host: str = Field(default="0.0.0.0", description="WXO HTTP server host")
     api_key: str = Field(default="beeai-maintenance-key-2024", description="API key for WXO")
+    workers: int = Field(default=1, description="Worker processes (0 = one per CPU core)")
+    shutdown_grace_seconds: float = Field(default=30, description="Time to let in-flight streams finish on shutdown")
+    
+    # Startup
+    warmup_llm_call: bool = Field(default=True, description="Prime the watsonx connection with a one-token call before reporting ready")
+    warmup_timeout_seconds: float = Field(default=30, description="Timeout for each warm-up LLM call")
+    warmup_request_wait_seconds: float = Field(default=20, description="How long a request waits for a cold worker before 503")
+    
+    # Admission Control
+    admission_max_in_flight: int = Field(default=32, description="Max requests being served at the same time")
+    admission_queue_size: int = Field(default=64, description="Max requests waiting for an in-flight slot")
+    admission_queue_timeout_seconds: float = Field(default=10, description="Max time a request waits in the queue before 429")
+    rate_limit_per_second: float = Field(default=10, description="Sustained requests per second per API key (0 disables)")
+    rate_limit_burst: int = Field(default=20, description="Burst size of the per-API-key rate limit")
     
     # LLM Configuration
     llm_model: str = Field(default="watsonx:ibm/granite-3-8b-instruct", description="LLM model")
+    llm_tool_model: str = Field(default="", description="Smaller model for tool-selection steps (empty uses llm_model)")
+    llm_fallback_model: str = Field(default="", description="Model used when a call fails or exceeds its budget (empty disables fallback)")
+    llm_tool_step_budget_seconds: float = Field(default=20, description="Latency budget for one tool-selection LLM call")
+    llm_answer_step_budget_seconds: float = Field(default=60, description="Latency budget for the final-answer LLM call")
+    llm_hedge_enabled: bool = Field(default=True, description="Send a duplicate request when an LLM call is slower than the hedge threshold")
+    llm_hedge_after_seconds: float = Field(default=0, description="Hedge threshold in seconds (0 uses the model's observed p95)")
+    llm_hedge_min_samples: int = Field(default=20, description="Calls observed before the p95 hedge threshold applies")
+    
+    # Prompt Budget
+    prompt_compact_instructions: bool = Field(default=True, description="Send the short form of the agent instructions")
+    prompt_compact_tool_outputs: bool = Field(default=True, description="Serialize tool results as minimal JSON before they enter memory")
+    prompt_tool_output_max_items: int = Field(default=5, description="Max list entries kept in a compacted tool result")
+    prompt_tool_step_max_tokens: int = Field(default=256, description="max_tokens for tool-selection LLM calls (the final answer uses WATSONX_MAX_TOKENS)")
+    
+    # Agent Execution
+    agent_max_concurrency: int = Field(default=16, description="Max agent runs executing at the same time")
+    planned_execution: bool = Field(default=False, description="Run the fixed tool workflow directly for maintenance requests, then one LLM call")
+    agent_max_iterations: int = Field(default=12, description="Max agent iterations (LLM calls) per run")
+    
+    # Request Deadlines
+    request_deadline_seconds: float = Field(default=120, description="Default deadline for a chat request, including queueing")
+    request_deadline_max_seconds: float = Field(default=600, description="Upper bound for a deadline set with the X-Request-Timeout header")
+    disconnect_poll_seconds: float = Field(default=0.5, description="How often a buffered request checks whether the client is still connected")
+    
+    # Fleet Batch Analysis
+    fleet_max_concurrency: int = Field(default=8, description="Max vehicles analyzed at the same time per fleet request")
+    fleet_max_vehicles: int = Field(default=5000, description="Max vehicles per fleet request")
+    
+    # Background Jobs
+    jobs_workers: int = Field(default=2, description="Background jobs running at the same time per worker")
+    jobs_max_agent_slots: int = Field(default=4, description="Agent concurrency slots all background jobs may hold together")
+    jobs_max_queued: int = Field(default=1000, description="Max jobs waiting to run before new submissions get 429")
+    jobs_retention_seconds: float = Field(default=3600, description="How long results of finished jobs are kept")
+    jobs_max_retained: int = Field(default=1000, description="Max finished jobs kept per worker")
+    
+    # Response Cache
+    response_cache_enabled: bool = Field(default=True, description="Serve repeated single-turn vehicle requests from cache")
+    response_cache_ttl_seconds: float = Field(default=300, description="How long a cached answer stays valid")
+    response_cache_max_size: int = Field(default=1000, description="Max answers held in memory per worker (LRU)")
+    response_cache_disk_path: str = Field(default="", description="SQLite file shared by workers and kept across restarts; empty disables the disk tier")
+    response_cache_disk_max_entries: int = Field(default=10000, description="Max answers kept in the disk tier (LRU)")
+    
+    # Conversation Sessions
+    session_max_tokens: int = Field(default=2048, description="Token budget for the history kept per conversation")
+    session_max_count: int = Field(default=1000, description="Max conversations held in memory (LRU)")
+    session_idle_ttl_seconds: float = Field(default=1800, description="Idle time before a conversation is evicted")
+    
+    # Fleet Data Store
+    fleet_data_path: str = Field(default="", description="Directory with vehicles, driver_schedule, dealership_slots and parts_inventory snapshots (.csv or .parquet); empty uses demo data")
+    fleet_data_reload_interval_seconds: float = Field(default=60, description="How often to check the snapshot files for changes (0 disables reloading)")
+    fleet_data_cache_mb: int = Field(default=16, description="SQLite page cache and mmap size per worker in MB")
+    
+    # Slot Matching
+    slot_match_window_hours: float = Field(default=4, description="Length of a driver availability window that has no end time")
+    slot_match_slot_minutes: float = Field(default=60, description="Length of a dealership slot that has no end time")
+    slot_match_parts_lead_hours: float = Field(default=48, description="Delay before an appointment when the needed part is out of stock")
+    
+    # Tool Result Cache
+    tool_cache_enabled: bool = Field(default=True, description="Cache fleet tool results")
+    tool_cache_max_size: int = Field(default=1024, description="Max cached entries per tool (LRU)")
+    tool_cache_ttl_location: float = Field(default=30, description="TTL in seconds for get_vehicle_location")
+    tool_cache_ttl_driver_schedule: float = Field(default=120, description="TTL in seconds for get_driver_schedule")
+    tool_cache_ttl_dealership_slots: float = Field(default=60, description="TTL in seconds for get_dealership_slots")
+    tool_cache_ttl_parts_inventory: float = Field(default=60, description="TTL in seconds for get_parts_inventory")
+    
+    # Streaming
+    stream_tokens: bool = Field(default=True, description="Stream agent output incrementally when the client asks for stream=true")
+    stream_queue_size: int = Field(default=64, description="Max buffered stream events before the agent run is paused")
     
     # Logging
     log_level: str = Field(default="INFO", description="Logging level")
     log_intermediate_steps: bool = Field(default=False, description="Log agent steps")
+    log_format: str = Field(default="json", description="Log output format: json or text")
+    log_queue_size: int = Field(default=10000, description="Max log records buffered before new ones are dropped")
+    log_sample_rate: float = Field(default=0.1, description="Share of high-volume events (tool calls, stream events) that are logged")
+    
+    # Tracing
+    tracing_enabled: bool = Field(default=False, description="Record OpenTelemetry spans for requests, LLM calls and tool calls")
+    tracing_service_name: str = Field(default="beeai-maintenance-service", description="service.name resource attribute of exported spans")
+    tracing_sample_rate: float = Field(default=0.05, description="Share of traces kept regardless of outcome (head sampling)")
+    tracing_slow_threshold_seconds: float = Field(default=10, description="Traces at least this long are always kept (tail sampling)")
+    tracing_max_spans_per_trace: int = Field(default=512, description="Spans recorded per trace before further ones are dropped")
+    tracing_exporter: str = Field(default="file", description="Span exporter: file (OTLP/JSON lines) or otlp (OTLP/HTTP)")
+    tracing_file_path: str = Field(default="traces/spans.jsonl", description="Output file of the file exporter")
+    tracing_otlp_endpoint: str = Field(default="https://cloud.langfuse.com/api/public/otel", description="OTLP/HTTP base URL; /v1/traces is appended")
+    tracing_otlp_headers: str = Field(default="", description="Extra OTLP headers as key=value,key=value")
+    langfuse_public_key: str = Field(default="", description="Langfuse public key, sent as basic auth with the secret key")
+    langfuse_secret_key: str = Field(default="", description="Langfuse secret key")
+    tracing_queue_size: int = Field(default=2048, description="Sampled traces buffered for export before new ones are dropped")
+    tracing_batch_size: int = Field(default=512, description="Spans per export request")
+    tracing_flush_interval_seconds: float = Field(default=5, description="Max time a sampled span waits before export")
+    tracing_export_timeout_seconds: float = Field(default=10, description="Timeout of one OTLP export request")
 
 
 class WatsonxSettings(BaseSettings):
@@ -63,6 +165,34 @@ class WatsonxSettings(BaseSettings):
         default=0.7,
         description="Model temperature"
     )
+    iam_url: str = Field(
+        default="https://iam.cloud.ibm.com/identity/token",
+        description="IBM Cloud IAM token endpoint"
+    )
+    token_refresh_margin_seconds: float = Field(
+        default=300,
+        description="Refresh the IAM token this long before it expires"
+    )
+    pool_size: int = Field(
+        default=20,
+        description="Max connections in the shared watsonx connection pool"
+    )
+    keepalive_expiry_seconds: float = Field(
+        default=120,
+        description="How long idle pooled connections are kept open"
+    )
+    connect_timeout_seconds: float = Field(
+        default=5,
+        description="Connection timeout for watsonx requests"
+    )
+    read_timeout_seconds: float = Field(
+        default=120,
+        description="Read timeout for watsonx requests"
+    )
+    http2: bool = Field(
+        default=True,
+        description="Use HTTP/2 for watsonx connections"
+    )
 
 
 # Singleton instances
@@ -1,30 +1,28 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
 from beeai_framework.agents.requirement import RequirementAgent
 from beeai_framework.agents.requirement.requirements.conditional import ConditionalRequirement
-from beeai_framework.backend import ChatModel
-from beeai_framework.memory import UnconstrainedMemory
+from beeai_framework.backend import ChatModel, ChatModelParameters
+from beeai_framework.memory import BaseMemory, UnconstrainedMemory
 from beeai_framework.middleware.trajectory import GlobalTrajectoryMiddleware
 from beeai_framework.tools import Tool
 
+from beeai_service.core.budget import estimate_tokens
+from beeai_service.core.log import get_logger
+from beeai_service.core.router import RoutedChatModel
+from beeai_service.core.sessions import window_memory
 from beeai_service.core.tools import ALL_TOOLS, get_vehicle_location
+from beeai_service.core.watsonx import watsonx_backend
 from beeai_service.config.settings import app_settings, watsonx_settings
 
 
-def create_maintenance_agent() -> RequirementAgent:
-    """Create and configure the predictive maintenance agent with IBM watsonx.ai"""
-    
-    print(f"  📊 Loading model: {app_settings.llm_model}")
-    print(f"  🛠️ Tools loaded: {len(ALL_TOOLS)}")
-    
-    # Initialize LLM with watsonx.ai
-    llm = ChatModel.from_name(
-        app_settings.llm_model,
-        api_key=watsonx_settings.api_key,
-        url=watsonx_settings.url,
-        project_id=watsonx_settings.project_id
-    )
-    
-    # Agent instructions
-    instructions = """
+logger = get_logger(__name__)
+
+
+# Agent instructions
+MAINTENANCE_INSTRUCTIONS = """
 You are a Predictive Maintenance Agent for vehicle fleet management.
 Always use the tools provided.
 Never claim the vehicle is not known.
@@ -35,32 +33,127 @@ Follow this workflow:
 2. Call get_driver_schedule("driver-1") to check driver availability
 3. Call get_dealership_slots(city_from_step_1) to find available service slots
 4. Call get_parts_inventory("Brake Pads") to check parts availability
+5. Call find_earliest_appointment(vehicle_id, "driver-1", "Brake Pads") to get the earliest slot that fits the driver's availability
 
 Then provide a clear summary with:
 - Vehicle location
 - Driver availability windows
-- Earliest available dealership slot
+- Earliest feasible appointment (from find_earliest_appointment)
 - Parts inventory status
 - Recommended action plan
 """
+
+# Same workflow in a fraction of the tokens; sent with every agent LLM call
+MAINTENANCE_INSTRUCTIONS_COMPACT = """
+Predictive maintenance agent for a vehicle fleet. Always use the tools. Never say a vehicle is unknown or ask for details.
+Call get_vehicle_location(vehicle_id), get_driver_schedule("driver-1"), get_dealership_slots(city), get_parts_inventory("Brake Pads"), find_earliest_appointment(vehicle_id, "driver-1", "Brake Pads").
+Then summarize: location, driver availability, earliest feasible appointment, parts stock, recommended action plan.
+"""
+
+MAINTENANCE_ROLE = "Predictive Maintenance Specialist"
+
+
+def maintenance_instructions() -> str:
+    if app_settings.prompt_compact_instructions:
+        return MAINTENANCE_INSTRUCTIONS_COMPACT
+    return MAINTENANCE_INSTRUCTIONS
+
+
+def _chat_model(name: str) -> ChatModel:
+    # watsonx models share the managed connection pool and IAM token
+    backend_settings = watsonx_backend.chat_model_settings() if name.startswith("watsonx:") else {}
+    return ChatModel.from_name(
+        name,
+        api_key=watsonx_settings.api_key,
+        url=watsonx_settings.url,
+        project_id=watsonx_settings.project_id,
+        parameters=ChatModelParameters(
+            # Token streaming lets the server forward final-answer deltas as they arrive
+            stream=app_settings.stream_tokens,
+            max_tokens=watsonx_settings.max_tokens,
+            temperature=watsonx_settings.temperature
+        ),
+        **backend_settings
+    )
+
+
+def create_llm() -> ChatModel:
+    """Create the chat model shared by all agents
     
-    # Create agent
-    agent = RequirementAgent(
-        llm=llm,
-        instructions=instructions,
-        tools=ALL_TOOLS,
-        requirements=[
-            ConditionalRequirement(get_vehicle_location, force_at_step=1)
-        ],
-        middlewares=[
-            GlobalTrajectoryMiddleware(
-                included=[Tool],
-                enabled=app_settings.log_intermediate_steps
-            )
-        ],
-        memory=UnconstrainedMemory(),
-        role="Predictive Maintenance Specialist"
+    Calls are routed per step, which also applies the per-step max_tokens.
+    """
+    llm = _chat_model(app_settings.llm_model)
+    return RoutedChatModel(
+        answer_model=llm,
+        tool_model=_chat_model(app_settings.llm_tool_model) if app_settings.llm_tool_model else None,
+        fallback_model=_chat_model(app_settings.llm_fallback_model) if app_settings.llm_fallback_model else None,
+        workflow_tools={tool.name for tool in ALL_TOOLS},
+        parameters=ChatModelParameters(
+            stream=app_settings.stream_tokens,
+            max_tokens=watsonx_settings.max_tokens,
+            temperature=watsonx_settings.temperature
+        ),
+        instruction_tokens_saved=estimate_tokens(MAINTENANCE_INSTRUCTIONS) - estimate_tokens(maintenance_instructions())
     )
+
+
+class MaintenanceAgentFactory:
+    """Hands out per-request maintenance agents built from shared components
+    
+    The ChatModel client, tool objects and instructions are created once and
+    reused. Every agent gets its own memory, so concurrent requests never share
+    history and the prompt size does not grow with uptime.
+    """
+    
+    def __init__(self, llm: Optional[ChatModel] = None, max_concurrency: Optional[int] = None):
+        self.llm = llm or create_llm()
+        self.tools = ALL_TOOLS
+        self.instructions = maintenance_instructions()
+        self.max_concurrency = max_concurrency or app_settings.agent_max_concurrency
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+    
+    def create_memory(self) -> BaseMemory:
+        """Create a conversation memory bounded by the session token budget"""
+        return window_memory(self.llm)
+    
+    def create_agent(self, memory: Optional[BaseMemory] = None) -> RequirementAgent:
+        """Build a fresh agent around the shared model and tools"""
+        return RequirementAgent(
+            llm=self.llm,
+            instructions=self.instructions,
+            tools=self.tools,
+            requirements=[
+                ConditionalRequirement(get_vehicle_location, force_at_step=1)
+            ],
+            middlewares=[
+                GlobalTrajectoryMiddleware(
+                    included=[Tool],
+                    enabled=app_settings.log_intermediate_steps
+                )
+            ],
+            memory=memory or UnconstrainedMemory(),
+            role=MAINTENANCE_ROLE
+        )
+    
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Hold one of the concurrency slots shared by all runs"""
+        async with self._semaphore:
+            yield
+    
+    @asynccontextmanager
+    async def acquire(self, memory: Optional[BaseMemory] = None) -> AsyncIterator[RequirementAgent]:
+        """Wait for a free concurrency slot and yield a fresh agent for one run"""
+        async with self.slot():
+            yield self.create_agent(memory)
+
+
+def create_agent_factory() -> MaintenanceAgentFactory:
+    """Create the shared agent factory used by the server"""
+    
+    logger.info("Loading model", extra={"model": app_settings.llm_model, "tools": len(ALL_TOOLS)})
+    
+    factory = MaintenanceAgentFactory()
     
-    print(f"  ✅ Agent initialized successfully\n")
-    return agent
\ No newline at end of file
+    logger.info("Agent factory initialized", extra={"max_concurrency": factory.max_concurrency})
+    return factory
@@ -0,0 +1,84 @@
+"""
+Prompt budget
+Token estimates per LLM step, compact tool outputs and per-step max_tokens
+"""
+import functools
+import inspect
+import json
+import math
+from typing import Any, Callable, Sequence
+
+from beeai_framework.backend import AnyMessage
+from beeai_framework.backend.types import ChatModelInput
+
+from beeai_service.config.settings import app_settings, watsonx_settings
+
+
+# Granite and most BPE tokenizers average about four characters of English or JSON per token
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate; exact counts come back in the usage of each LLM call"""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def message_tokens(messages: Sequence[AnyMessage]) -> int:
+    return sum(estimate_tokens(message.text) for message in messages)
+
+
+def _minimal(value: Any, max_items: int) -> Any:
+    """Cap list lengths, recursively
+    
+    Every key is kept, even with a None or empty value: a missing field
+    would read as unknown data rather than as "none".
+    """
+    if isinstance(value, dict):
+        return {key: _minimal(item, max_items) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_minimal(item, max_items) for item in value[:max_items]]
+    return value
+
+
+def compact_output(result: Any) -> str:
+    """Serialize a tool result into the smallest JSON the agent needs"""
+    return json.dumps(_minimal(result, app_settings.prompt_tool_output_max_items), separators=(",", ":"), default=str)
+
+
+def compact_tool(fn: Callable) -> Callable:
+    """Return compact JSON instead of the tool's dict, counting the tokens saved
+
+    Applied under the cache, so cached entries are already compact. The
+    wrapper keeps fn's signature, which @tool builds the input schema from.
+    """
+    if not app_settings.prompt_compact_tool_outputs:
+        return fn
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        result = fn(*args, **kwargs)
+        compact = compact_output(result)
+        # Imported here because metrics pre-registers the tool labels from this package's tools
+        from beeai_service.core import metrics
+        metrics.TOKENS_SAVED.labels("tool_output").inc(
+            max(estimate_tokens(json.dumps(result, default=str)) - estimate_tokens(compact), 0)
+        )
+        return compact
+
+    wrapper.__signature__ = inspect.signature(fn)
+    return wrapper
+
+
+def step_max_tokens(step: str) -> int:
+    """Output token cap for a tool-selection or final-answer LLM call"""
+    if step == "tool":
+        return app_settings.prompt_tool_step_max_tokens
+    return watsonx_settings.max_tokens
+
+
+def apply_step_budget(step: str, input: ChatModelInput) -> ChatModelInput:
+    """Cap max_tokens for the step, keeping any smaller cap the caller asked for"""
+    limit = step_max_tokens(step)
+    if input.max_tokens is not None:
+        limit = min(limit, input.max_tokens)
+    return input.model_copy(update={"max_tokens": limit})
@@ -0,0 +1,147 @@
+"""
+TTL cache with LRU eviction
+Used to avoid repeated backend round-trips from the fleet tools
+"""
+import functools
+import inspect
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    
+    def as_dict(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions
+        }
+
+
+class TTLCache:
+    """Size-bounded LRU cache whose entries expire after a fixed TTL"""
+    
+    def __init__(self, name: str, ttl: float, max_size: int):
+        self.name = name
+        self.ttl = ttl
+        self.max_size = max_size
+        self.stats = CacheStats()
+        self._entries: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def _lookup(self, key: Hashable) -> tuple[bool, Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return False, None
+        self._entries.move_to_end(key)
+        return True, value
+    
+    def _store(self, key: Hashable, value: Any):
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.stats.evictions += 1
+    
+    def get(self, key: Hashable) -> tuple[bool, Any]:
+        """Return (found, value) without loading"""
+        found, value = self._lookup(key)
+        if found:
+            self.stats.hits += 1
+        else:
+            self.stats.misses += 1
+        return found, value
+    
+    def set(self, key: Hashable, value: Any):
+        self._store(key, value)
+    
+    def invalidate(self, key: Optional[Hashable] = None):
+        """Drop one entry, or every entry when no key is given"""
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+
+
+# Registry of caches by tool name, used for stats and invalidation
+TOOL_CACHES: Dict[str, TTLCache] = {}
+_TOOL_SIGNATURES: Dict[str, inspect.Signature] = {}
+
+
+def _call_key(signature: inspect.Signature, args: tuple, kwargs: dict) -> tuple:
+    bound = signature.bind(*args, **kwargs)
+    bound.apply_defaults()
+    return tuple(bound.arguments.values())
+
+
+def cached_tool(ttl: float, max_size: int = 1024, enabled: bool = True):
+    """Cache a tool function's results keyed on its call arguments
+    
+    Apply it under @tool. Failed calls are not cached.
+    """
+    
+    def decorator(fn: Callable[..., Any]) -> Callable[..., Any]:
+        if not enabled:
+            return fn
+        
+        cache = TTLCache(fn.__name__, ttl=ttl, max_size=max_size)
+        signature = inspect.signature(fn)
+        TOOL_CACHES[fn.__name__] = cache
+        _TOOL_SIGNATURES[fn.__name__] = signature
+        
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            key = _call_key(signature, args, kwargs)
+            found, value = cache.get(key)
+            if not found:
+                value = fn(*args, **kwargs)
+                cache.set(key, value)
+            return value
+        
+        # @tool builds the input schema with getfullargspec, which reads
+        # __signature__ but does not follow __wrapped__
+        wrapper.__signature__ = signature
+        wrapper.cache = cache
+        return wrapper
+    
+    return decorator
+
+
+def invalidate_tool_cache(tool_name: Optional[str] = None, *args: Hashable, **kwargs: Hashable):
+    """Invalidate cached tool results
+    
+    With no arguments every tool cache is cleared; with a tool name only that
+    tool's cache; with a tool name and call arguments only that entry.
+    """
+    if tool_name is None:
+        for cache in TOOL_CACHES.values():
+            cache.invalidate()
+        return
+    
+    cache = TOOL_CACHES.get(tool_name)
+    if cache is None:
+        return
+    if args or kwargs:
+        cache.invalidate(_call_key(_TOOL_SIGNATURES[tool_name], args, kwargs))
+    else:
+        cache.invalidate()
+
+
+def tool_cache_stats() -> Dict[str, Dict[str, int]]:
+    """Hit/miss counters and current size for every tool cache"""
+    return {
+        name: {**cache.stats.as_dict(), "size": len(cache)}
+        for name, cache in TOOL_CACHES.items()
+    }
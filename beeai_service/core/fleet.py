@@ -0,0 +1,131 @@
+"""
+Fleet batch analysis
+Runs the maintenance workflow for many vehicles with bounded concurrency
+"""
+import asyncio
+import time
+from contextlib import AbstractAsyncContextManager
+from typing import Any, AsyncIterator, Callable, Dict, Hashable, List, Optional
+
+from beeai_framework.backend import ChatModel
+from beeai_framework.tools import Tool
+
+from beeai_service.core.log import get_logger
+from beeai_service.core.planner import (
+    DEFAULT_COMPONENT,
+    DEFAULT_DRIVER_ID,
+    RunObserver,
+    collect_maintenance_context,
+    run_tool,
+    summarize_maintenance,
+)
+from beeai_service.core.slots import assign_appointments
+from beeai_service.core.tools import find_earliest_appointment
+
+
+logger = get_logger(__name__)
+
+
+class SharedToolLookups:
+    """Memoizes tool calls for the lifetime of one fleet batch
+    
+    Vehicles in the same city share one dealership-slot lookup, every vehicle
+    shares the driver schedule and inventory lookups, and so on. Failed
+    lookups are shared too, so a broken backend is only hit once per batch.
+    """
+    
+    def __init__(self, observe: Optional[RunObserver] = None):
+        self.observe = observe
+        self._tasks: Dict[Hashable, asyncio.Future] = {}
+    
+    def seed(self, tool: Tool, result: Dict[str, Any], **kwargs):
+        """Answer later calls of `tool` with these arguments from `result`"""
+        future = asyncio.get_running_loop().create_future()
+        future.set_result(result)
+        self._tasks[(tool.name, tuple(sorted(kwargs.items())))] = future
+    
+    async def run(self, tool: Tool, **kwargs) -> Dict[str, Any]:
+        key = (tool.name, tuple(sorted(kwargs.items())))
+        task = self._tasks.get(key)
+        if task is None:
+            task = asyncio.create_task(run_tool(tool, self.observe, **kwargs))
+            self._tasks[key] = task
+        return await asyncio.shield(task)
+    
+    def cancel(self):
+        for task in self._tasks.values():
+            task.cancel()
+
+
+async def analyze_fleet(
+    llm: ChatModel,
+    vehicle_ids: List[str],
+    concurrency: int,
+    slot: Callable[[], AbstractAsyncContextManager],
+    driver_id: str = DEFAULT_DRIVER_ID,
+    summarize: bool = True,
+    observe: Optional[RunObserver] = None,
+    drivers: Optional[Dict[str, str]] = None
+) -> AsyncIterator[Dict[str, Any]]:
+    """Analyze every vehicle and yield one result per vehicle as it completes
+    
+    At most `concurrency` vehicles are in flight at once, and each one also
+    holds a `slot` so batch work shares the service-wide LLM concurrency
+    limit with interactive requests. A failing vehicle is reported with
+    status "error" and never aborts the rest of the batch.
+    
+    Each vehicle is analyzed for its driver in `drivers`, or `driver_id`
+    when it has none. Appointments are assigned for the whole batch up
+    front, so vehicles never get the same dealership slot or overlapping
+    slots for one driver; vehicles sharing a driver therefore compete for
+    that driver's windows, and one left without a slot carries the reason.
+    """
+    drivers = {vehicle_id: (drivers or {}).get(vehicle_id, driver_id) for vehicle_id in vehicle_ids}
+    lookups = SharedToolLookups(observe)
+    try:
+        appointments = await asyncio.to_thread(assign_appointments, vehicle_ids, drivers, DEFAULT_COMPONENT)
+    except Exception:
+        # Each vehicle falls back to its own appointment lookup
+        logger.warning("Batch appointment assignment failed", exc_info=True)
+        appointments = {}
+    for vehicle_id, appointment in appointments.items():
+        lookups.seed(
+            find_earliest_appointment,
+            appointment,
+            vehicle_id=vehicle_id,
+            driver_id=drivers[vehicle_id],
+            component=DEFAULT_COMPONENT
+        )
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async def analyze(vehicle_id: str) -> Dict[str, Any]:
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                tool_results = await collect_maintenance_context(vehicle_id, drivers[vehicle_id], run=lookups.run)
+                result: Dict[str, Any] = {
+                    "vehicle_id": vehicle_id,
+                    "status": "ok",
+                    "tool_results": tool_results
+                }
+                if summarize:
+                    async with slot():
+                        result["analysis"] = await summarize_maintenance(
+                            llm,
+                            f"Check maintenance status for vehicle {vehicle_id}",
+                            tool_results,
+                            observe=observe
+                        )
+            except Exception as e:
+                result = {"vehicle_id": vehicle_id, "status": "error", "error": str(e)}
+            result["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+            return result
+    
+    tasks = [asyncio.create_task(analyze(vehicle_id)) for vehicle_id in vehicle_ids]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
+        lookups.cancel()
@@ -0,0 +1,361 @@
+"""
+Indexed fleet data store
+Loads vehicle, driver, dealership and parts snapshots (CSV or Parquet) into an
+on-disk SQLite database that the fleet tools query
+"""
+import asyncio
+import csv
+import hashlib
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from beeai_service.config.settings import app_settings
+from beeai_service.core.cache import invalidate_tool_cache
+from beeai_service.core.log import get_logger
+
+
+logger = get_logger(__name__)
+
+# Stays well under SQLite's bound-parameter limit
+BULK_CHUNK = 500
+
+# Answers used when no snapshot directory is configured
+DEMO_CITY = "San Francisco"
+DEMO_AVAILABILITY = ["2025-11-22T14:00:00"]
+DEMO_SLOTS = ["2025-11-22T15:00:00"]
+DEMO_STOCK = 5
+
+
+def _key(value: Optional[str]) -> str:
+    return (value or "").strip().casefold()
+
+
+def _optional(value: Any) -> Optional[str]:
+    if value is None or value == "":
+        return None
+    return str(value)
+
+
+@dataclass(frozen=True)
+class SnapshotTable:
+    """One snapshot file and the table it is loaded into"""
+    
+    name: str
+    source: str
+    ddl: Sequence[str]
+    insert: str
+    row: Callable[[Dict[str, Any]], Tuple]
+    tools: Tuple[str, ...]
+
+
+TABLES = [
+    SnapshotTable(
+        name="vehicles",
+        source="vehicles",
+        ddl=["CREATE TABLE vehicles (vehicle_id TEXT PRIMARY KEY, city TEXT NOT NULL) WITHOUT ROWID"],
+        insert="INSERT OR REPLACE INTO vehicles VALUES (?, ?)",
+        row=lambda r: (str(r["vehicle_id"]).strip(), str(r["city"]).strip()),
+        tools=("get_vehicle_location", "find_earliest_appointment")
+    ),
+    SnapshotTable(
+        name="driver_availability",
+        source="driver_schedule",
+        ddl=[
+            "CREATE TABLE driver_availability (driver_id TEXT NOT NULL, available_from TEXT NOT NULL, available_to TEXT)",
+            "CREATE INDEX driver_availability_idx ON driver_availability (driver_id, available_from)",
+        ],
+        insert="INSERT INTO driver_availability VALUES (?, ?, ?)",
+        row=lambda r: (str(r["driver_id"]).strip(), str(r["available_from"]), _optional(r.get("available_to"))),
+        tools=("get_driver_schedule", "find_earliest_appointment")
+    ),
+    SnapshotTable(
+        name="dealership_slots",
+        source="dealership_slots",
+        ddl=[
+            "CREATE TABLE dealership_slots (city_key TEXT NOT NULL, city TEXT NOT NULL, dealership TEXT, "
+            "slot_start TEXT NOT NULL, slot_end TEXT)",
+            "CREATE INDEX dealership_slots_idx ON dealership_slots (city_key, slot_start)",
+        ],
+        insert="INSERT INTO dealership_slots VALUES (?, ?, ?, ?, ?)",
+        row=lambda r: (
+            _key(r["city"]), str(r["city"]).strip(), _optional(r.get("dealership")),
+            str(r["slot_start"]), _optional(r.get("slot_end"))
+        ),
+        tools=("get_dealership_slots", "find_earliest_appointment")
+    ),
+    SnapshotTable(
+        name="parts_inventory",
+        source="parts_inventory",
+        ddl=[
+            "CREATE TABLE parts_inventory (component_key TEXT PRIMARY KEY, component TEXT NOT NULL, "
+            "stock INTEGER NOT NULL) WITHOUT ROWID"
+        ],
+        insert="INSERT OR REPLACE INTO parts_inventory VALUES (?, ?, ?)",
+        row=lambda r: (_key(r["component"]), str(r["component"]).strip(), int(r["stock"])),
+        tools=("get_parts_inventory", "find_earliest_appointment")
+    ),
+]
+
+
+def _snapshot_file(directory: Path, source: str) -> Optional[Path]:
+    for suffix in (".parquet", ".csv"):
+        path = directory / f"{source}{suffix}"
+        if path.is_file():
+            return path
+    return None
+
+
+def _read_records(path: Path) -> Iterator[Dict[str, Any]]:
+    if path.suffix == ".parquet":
+        try:
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise RuntimeError("Reading Parquet snapshots requires pyarrow (pip install beeai-service[parquet])") from e
+        for batch in pq.ParquetFile(path).iter_batches():
+            yield from batch.to_pylist()
+        return
+    
+    with path.open(newline="", encoding="utf-8") as f:
+        yield from csv.DictReader(f)
+
+
+def _chunks(values: Sequence[str]) -> Iterator[Sequence[str]]:
+    for start in range(0, len(values), BULK_CHUNK):
+        yield values[start:start + BULK_CHUNK]
+
+
+class FleetDataStore:
+    """SQLite-backed fleet snapshot with indexed and bulk lookups
+    
+    Rows live in a per-process database file, so memory use is bounded by
+    the SQLite page cache rather than the fleet size. Reloads only rebuild
+    tables whose snapshot file changed; each rebuild runs in one write
+    transaction on a separate connection, so readers keep seeing the
+    previous data until it commits. The tool caches for affected tools are
+    invalidated and the version stamp changes after every reload.
+    
+    With no snapshot directory configured the store stays empty and the
+    tools answer with their built-in demo data.
+    """
+    
+    def __init__(self, data_path: Optional[str] = None):
+        self.data_path = Path(data_path) if data_path else None
+        self.version: Optional[str] = None
+        self.loaded_at: Optional[float] = None
+        self.row_counts: Dict[str, int] = {}
+        self._fingerprints: Dict[str, Tuple[str, int, int]] = {}
+        self._db_path: Optional[str] = None
+        self._writer: Optional[sqlite3.Connection] = None
+        self._reader: Optional[sqlite3.Connection] = None
+        self._read_lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        self._poller: Optional[asyncio.Task] = None
+    
+    @property
+    def configured(self) -> bool:
+        return self.data_path is not None
+    
+    @property
+    def loaded(self) -> bool:
+        return self.version is not None
+    
+    def _open(self):
+        fd, self._db_path = tempfile.mkstemp(prefix="beeai-fleet-", suffix=".db")
+        os.close(fd)
+        cache_kib = app_settings.fleet_data_cache_mb * 1024
+        
+        self._writer = sqlite3.connect(self._db_path, check_same_thread=False, isolation_level=None)
+        self._writer.execute("PRAGMA journal_mode=WAL")
+        self._writer.execute("PRAGMA synchronous=OFF")
+        self._writer.execute(f"PRAGMA cache_size=-{cache_kib}")
+        for table in TABLES:
+            for statement in table.ddl:
+                self._writer.execute(statement)
+        
+        self._reader = sqlite3.connect(self._db_path, check_same_thread=False)
+        self._reader.execute("PRAGMA query_only=ON")
+        self._reader.execute(f"PRAGMA cache_size=-{cache_kib}")
+        self._reader.execute(f"PRAGMA mmap_size={cache_kib * 1024}")
+    
+    def reload(self, force: bool = False) -> List[str]:
+        """Reload changed snapshot files; returns the names of rebuilt tables
+        
+        A file that fails to load leaves its table as it was and is raised
+        after the rest are applied, so the version and tool caches still
+        reflect every table that did change.
+        """
+        if not self.configured:
+            return []
+        
+        with self._reload_lock:
+            if self._writer is None:
+                self._open()
+            
+            changed = []
+            error: Optional[Exception] = None
+            for table in TABLES:
+                path = _snapshot_file(self.data_path, table.source)
+                if path is None:
+                    if not self.loaded:
+                        logger.warning("Fleet snapshot file missing", extra={"table": table.name, "path": str(self.data_path)})
+                    continue
+                stat = path.stat()
+                fingerprint = (path.name, stat.st_mtime_ns, stat.st_size)
+                if force or self._fingerprints.get(table.name) != fingerprint:
+                    try:
+                        self._load_table(table, path)
+                    except Exception as e:
+                        # The table keeps its previous rows; the other files still apply
+                        logger.warning("Fleet table reload failed", extra={"table": table.name, "path": str(path)}, exc_info=True)
+                        error = error or e
+                        continue
+                    self._fingerprints[table.name] = fingerprint
+                    changed.append(table.name)
+            
+            if changed or (not self.loaded and error is None):
+                digest = hashlib.sha1(repr(sorted(self._fingerprints.items())).encode()).hexdigest()
+                self.version = digest[:12]
+                self.loaded_at = time.time()
+                for tool_name in {name for table in TABLES if table.name in changed for name in table.tools}:
+                    invalidate_tool_cache(tool_name)
+                logger.info(
+                    "Fleet data loaded",
+                    extra={"version": self.version, "tables": changed, "rows": self.row_counts}
+                )
+            if error is not None:
+                raise error
+            return changed
+    
+    def _load_table(self, table: SnapshotTable, path: Path):
+        started = time.perf_counter()
+        rows = (table.row(record) for record in _read_records(path))
+        self._writer.execute("BEGIN IMMEDIATE")
+        try:
+            self._writer.execute(f"DELETE FROM {table.name}")
+            self._writer.executemany(table.insert, rows)
+            self._writer.execute("COMMIT")
+        except BaseException:
+            self._writer.execute("ROLLBACK")
+            raise
+        self._writer.execute(f"ANALYZE {table.name}")
+        self.row_counts[table.name] = self._writer.execute(f"SELECT COUNT(*) FROM {table.name}").fetchone()[0]
+        logger.debug(
+            "Fleet table rebuilt",
+            extra={"table": table.name, "rows": self.row_counts[table.name], "elapsed_ms": round((time.perf_counter() - started) * 1000, 1)}
+        )
+    
+    async def start(self):
+        """Load the snapshot and start polling it for changes"""
+        if not self.configured or self._poller is not None:
+            return
+        if app_settings.fleet_data_reload_interval_seconds > 0:
+            self._poller = asyncio.create_task(self._poll())
+        await asyncio.to_thread(self.reload)
+    
+    async def _poll(self):
+        while True:
+            await asyncio.sleep(app_settings.fleet_data_reload_interval_seconds)
+            try:
+                await asyncio.to_thread(self.reload)
+            except Exception:
+                # Keep serving the previous snapshot; a half-written file is retried next round
+                logger.warning("Fleet data reload failed", exc_info=True)
+    
+    def close(self):
+        if self._poller is not None:
+            self._poller.cancel()
+            self._poller = None
+        for connection in (self._reader, self._writer):
+            if connection is not None:
+                connection.close()
+        self._reader = self._writer = None
+        if self._db_path is not None:
+            for suffix in ("", "-wal", "-shm"):
+                try:
+                    os.remove(self._db_path + suffix)
+                except FileNotFoundError:
+                    pass
+            self._db_path = None
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "configured": self.configured,
+            "version": self.version,
+            "loaded_at": self.loaded_at,
+            "rows": self.row_counts,
+        }
+    
+    def _query(self, sql: str, params: Iterable[Any]) -> List[Tuple]:
+        if not self.loaded:
+            raise RuntimeError("Fleet data is not loaded")
+        with self._read_lock:
+            return self._reader.execute(sql, tuple(params)).fetchall()
+    
+    def _bulk(self, sql: str, values: Iterable[str]) -> List[Tuple]:
+        unique = list(dict.fromkeys(values))
+        rows: List[Tuple] = []
+        for chunk in _chunks(unique):
+            placeholders = ",".join("?" * len(chunk))
+            rows.extend(self._query(sql.format(placeholders=placeholders), chunk))
+        return rows
+    
+    # Single lookups
+    
+    def vehicle_location(self, vehicle_id: str) -> Optional[str]:
+        rows = self._query("SELECT city FROM vehicles WHERE vehicle_id = ?", (vehicle_id.strip(),))
+        return rows[0][0] if rows else None
+    
+    def driver_availability(self, driver_id: str) -> List[Tuple[str, Optional[str]]]:
+        return self._query(
+            "SELECT available_from, available_to FROM driver_availability WHERE driver_id = ? ORDER BY available_from",
+            (driver_id.strip(),)
+        )
+    
+    def dealership_slots(self, city: str) -> List[Tuple[Optional[str], str, Optional[str]]]:
+        return self._query(
+            "SELECT dealership, slot_start, slot_end FROM dealership_slots WHERE city_key = ? ORDER BY slot_start",
+            (_key(city),)
+        )
+    
+    def parts_stock(self, component: str) -> Optional[int]:
+        rows = self._query("SELECT stock FROM parts_inventory WHERE component_key = ?", (_key(component),))
+        return rows[0][0] if rows else None
+    
+    # Bulk lookups
+    
+    def vehicle_locations(self, vehicle_ids: Iterable[str]) -> Dict[str, str]:
+        """City per vehicle id; unknown vehicles are left out"""
+        return dict(self._bulk(
+            "SELECT vehicle_id, city FROM vehicles WHERE vehicle_id IN ({placeholders})",
+            (vehicle_id.strip() for vehicle_id in vehicle_ids)
+        ))
+    
+    def driver_availabilities(self, driver_ids: Iterable[str]) -> Dict[str, List[Tuple[str, Optional[str]]]]:
+        result: Dict[str, List[Tuple[str, Optional[str]]]] = {}
+        for driver_id, available_from, available_to in self._bulk(
+            "SELECT driver_id, available_from, available_to FROM driver_availability "
+            "WHERE driver_id IN ({placeholders}) ORDER BY driver_id, available_from",
+            (driver_id.strip() for driver_id in driver_ids)
+        ):
+            result.setdefault(driver_id, []).append((available_from, available_to))
+        return result
+    
+    def dealership_slots_by_city(self, cities: Iterable[str]) -> Dict[str, List[Tuple[Optional[str], str, Optional[str]]]]:
+        """Slots per city, keyed by the city name as stored in the snapshot"""
+        result: Dict[str, List[Tuple[Optional[str], str, Optional[str]]]] = {}
+        for city, dealership, slot_start, slot_end in self._bulk(
+            "SELECT city, dealership, slot_start, slot_end FROM dealership_slots "
+            "WHERE city_key IN ({placeholders}) ORDER BY city_key, slot_start",
+            (_key(city) for city in cities)
+        ):
+            result.setdefault(city, []).append((dealership, slot_start, slot_end))
+        return result
+
+
+fleet_store = FleetDataStore(app_settings.fleet_data_path)
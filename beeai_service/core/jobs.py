@@ -0,0 +1,229 @@
+"""
+Background job manager
+Runs long agent and fleet analyses off the request path with priorities,
+bounded concurrency and a retention-limited result store
+"""
+import asyncio
+import itertools
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from beeai_service.config.settings import app_settings
+from beeai_service.core import metrics
+from beeai_service.core.log import get_logger, request_id_var
+from beeai_service.core.tracing import tracer
+
+
+logger = get_logger(__name__)
+
+# Lower runs first; scheduled bulk work uses "low" so it never delays ad-hoc jobs
+PRIORITIES = {"high": 0, "normal": 1, "low": 2}
+FINISHED = ("succeeded", "failed", "cancelled")
+
+
+class JobQueueFull(Exception):
+    """Too many jobs are waiting to run"""
+
+
+@dataclass
+class Job:
+    id: str
+    kind: str
+    payload: Dict[str, Any]
+    priority: str = "normal"
+    status: str = "queued"
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Any = None
+    error: Optional[str] = None
+    events: List[Dict[str, Any]] = field(default_factory=list)
+    task: Optional[asyncio.Task] = field(default=None, repr=False)
+    _changed: asyncio.Condition = field(default_factory=asyncio.Condition, repr=False)
+    
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED
+    
+    async def emit(self, event: Dict[str, Any]):
+        """Record a progress event and wake up anyone following the job"""
+        self.events.append(event)
+        async with self._changed:
+            self._changed.notify_all()
+    
+    async def set_status(self, status: str):
+        self.status = status
+        await self.emit({"type": "status", "status": status})
+    
+    async def follow(self) -> AsyncIterator[Dict[str, Any]]:
+        """Yield every event so far, then new ones until the job finishes"""
+        position = 0
+        while True:
+            while position < len(self.events):
+                yield self.events[position]
+                position += 1
+            if self.finished:
+                return
+            async with self._changed:
+                if position == len(self.events):
+                    await self._changed.wait()
+    
+    def as_dict(self, include_result: bool = True) -> Dict[str, Any]:
+        body = {
+            "id": self.id,
+            "kind": self.kind,
+            "priority": self.priority,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error
+        }
+        if include_result:
+            body["result"] = self.result
+        return body
+
+
+class JobManager:
+    """Priority queue of jobs drained by a fixed pool of worker tasks
+    
+    At most `workers` jobs run at once, and all of them together hold at
+    most `max_agent_slots` of the agent concurrency slots (see `slot`), so
+    a burst of scheduled fleet jobs cannot take every slot from interactive
+    chat. Finished jobs are kept for `retention_seconds`, and only the most
+    recent `max_retained` of them.
+    """
+    
+    def __init__(
+        self,
+        run: Callable[[Job], Awaitable[Any]],
+        workers: Optional[int] = None,
+        max_agent_slots: Optional[int] = None,
+        max_queued: Optional[int] = None,
+        retention_seconds: Optional[float] = None,
+        max_retained: Optional[int] = None
+    ):
+        self.run = run
+        self.workers = workers or app_settings.jobs_workers
+        self.max_queued = max_queued or app_settings.jobs_max_queued
+        self.retention_seconds = retention_seconds or app_settings.jobs_retention_seconds
+        self.max_retained = max_retained or app_settings.jobs_max_retained
+        self._agent_slots = asyncio.Semaphore(max_agent_slots or app_settings.jobs_max_agent_slots)
+        self._queue: asyncio.PriorityQueue = asyncio.PriorityQueue()
+        self._order = itertools.count()
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._workers: List[asyncio.Task] = []
+    
+    @property
+    def queued(self) -> int:
+        return self._queue.qsize()
+    
+    def start(self):
+        if not self._workers:
+            self._workers = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+    
+    async def close(self):
+        """Cancel the workers and every job still running"""
+        for worker in self._workers:
+            worker.cancel()
+        running = [job.task for job in self._jobs.values() if job.task is not None]
+        for task in running:
+            task.cancel()
+        await asyncio.gather(*self._workers, *running, return_exceptions=True)
+        self._workers = []
+    
+    def submit(self, kind: str, payload: Dict[str, Any], priority: str = "normal") -> Job:
+        self._prune()
+        if self._queue.qsize() >= self.max_queued:
+            raise JobQueueFull(f"{self._queue.qsize()} jobs are already queued")
+        
+        job = Job(id=f"job-{uuid.uuid4().hex}", kind=kind, payload=payload, priority=priority)
+        job.events.append({"type": "status", "status": job.status})
+        self._jobs[job.id] = job
+        self._queue.put_nowait((PRIORITIES[priority], next(self._order), job))
+        metrics.JOBS_QUEUED.inc()
+        logger.info("Job queued", extra={"job_id": job.id, "kind": kind, "priority": priority})
+        return job
+    
+    def get(self, job_id: str) -> Optional[Job]:
+        self._prune()
+        return self._jobs.get(job_id)
+    
+    async def cancel(self, job_id: str) -> Optional[Job]:
+        job = self._jobs.get(job_id)
+        if job is None or job.finished:
+            return job
+        if job.task is not None:
+            job.task.cancel()
+            await asyncio.wait({job.task})
+        else:
+            # Still queued: the worker skips it when it comes up
+            await self._finish(job, "cancelled")
+        return job
+    
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Hold one of the agent slots reserved for background jobs"""
+        async with self._agent_slots:
+            yield
+    
+    async def _work(self):
+        while True:
+            _, _, job = await self._queue.get()
+            metrics.JOBS_QUEUED.dec()
+            if job.finished:
+                continue
+            job.task = asyncio.create_task(self._execute(job))
+            # wait() rather than await, so cancelling the job never cancels the worker
+            await asyncio.wait({job.task})
+            job.task = None
+    
+    async def _execute(self, job: Job):
+        request_id_var.set(job.id)
+        job.started_at = time.time()
+        await job.set_status("running")
+        try:
+            with tracer.trace(f"job {job.kind}", attributes={"beeai.job.id": job.id, "beeai.job.priority": job.priority}):
+                job.result = await self.run(job)
+        except asyncio.CancelledError:
+            await self._finish(job, "cancelled")
+            return
+        except Exception as e:
+            metrics.ERRORS.labels(type(e).__name__).inc()
+            logger.exception("Job failed", extra={"job_id": job.id})
+            job.error = str(e)
+            await self._finish(job, "failed")
+            return
+        await self._finish(job, "succeeded")
+    
+    async def _finish(self, job: Job, status: str):
+        job.finished_at = time.time()
+        metrics.JOBS.labels(job.kind, status).inc()
+        if job.started_at is not None:
+            metrics.JOB_DURATION.labels(job.kind).observe(job.finished_at - job.started_at)
+        logger.info(
+            "Job finished",
+            extra={"job_id": job.id, "status": status, "elapsed_ms": round((job.finished_at - job.created_at) * 1000, 1)}
+        )
+        await job.set_status(status)
+    
+    def _prune(self):
+        """Drop finished jobs past their retention time or beyond the retained count"""
+        cutoff = time.time() - self.retention_seconds
+        finished = [job for job in self._jobs.values() if job.finished]
+        excess = len(finished) - self.max_retained
+        for job in finished:
+            if excess > 0 or job.finished_at < cutoff:
+                del self._jobs[job.id]
+                excess -= 1
+    
+    def stats(self) -> Dict[str, Any]:
+        self._prune()
+        counts: Dict[str, int] = {}
+        for job in self._jobs.values():
+            counts[job.status] = counts.get(job.status, 0) + 1
+        return {"workers": len(self._workers), "queued": self.queued, "jobs": counts}
@@ -0,0 +1,126 @@
+"""
+Structured, non-blocking logging
+Records are enqueued on the calling thread and formatted and written by a
+background listener, so logging from the event loop never waits on stdout.
+"""
+import atexit
+import json
+import logging
+import queue
+import random
+import sys
+import time
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+from beeai_service.config.settings import app_settings
+
+
+# Correlates every record logged while serving a request with its chatcmpl id
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+# Attributes every LogRecord has; anything else was passed through `extra`
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "request_id", "sample_rate"}
+
+_listener: Optional[QueueListener] = None
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, including any `extra` fields"""
+    
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        if record.request_id:
+            entry["request_id"] = record.request_id
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class RequestContextFilter(logging.Filter):
+    """Stamp records with the request id of the current context"""
+    
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Keep only a share of high-volume records
+    
+    Records logged with extra={"sample_rate": r} pass with probability r;
+    records without a sample rate always pass.
+    """
+    
+    def filter(self, record: logging.LogRecord) -> bool:
+        rate = getattr(record, "sample_rate", None)
+        return rate is None or random.random() < rate
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """QueueHandler that drops records instead of blocking when the queue is full"""
+    
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Formatting happens on the listener thread; only merge the args here
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+    
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def setup_logging(level: Optional[str] = None) -> QueueListener:
+    """Route all logging through a bounded queue to a background stdout writer
+    
+    Safe to call more than once; the listener is only started the first time.
+    """
+    global _listener
+    if _listener is not None:
+        return _listener
+    
+    output = logging.StreamHandler(sys.stdout)
+    if app_settings.log_format == "json":
+        output.setFormatter(JsonFormatter())
+    else:
+        output.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s"))
+    
+    handler = NonBlockingQueueHandler(queue.Queue(maxsize=app_settings.log_queue_size))
+    handler.addFilter(RequestContextFilter())
+    handler.addFilter(SamplingFilter())
+    
+    root = logging.getLogger()
+    root.handlers = [handler]
+    root.setLevel((level or app_settings.log_level).upper())
+    
+    _listener = QueueListener(handler.queue, output, respect_handler_level=False)
+    _listener.start()
+    atexit.register(_listener.stop)
+    return _listener
+
+
+def get_logger(name: str) -> logging.Logger:
+    return logging.getLogger(name)
+
+
+def new_request_id() -> str:
+    """Generate a chat completion id and bind it to the current context"""
+    request_id = f"chatcmpl-beeai-{int(time.time())}-{random.getrandbits(32):08x}"
+    request_id_var.set(request_id)
+    return request_id
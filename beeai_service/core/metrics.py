@@ -0,0 +1,196 @@
+"""
+Prometheus metrics for the BeeAI service
+Latency, token and error metrics are fed from agent, LLM and tool emitter events
+"""
+import os
+import time
+from typing import Any, Dict
+
+from beeai_framework.backend import ChatModel
+from beeai_framework.context import Run
+from beeai_framework.emitter import EmitterOptions, EventMeta
+from beeai_framework.tools import Tool
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+from prometheus_client.multiprocess import MultiProcessCollector
+
+from beeai_service.core.tools import ALL_TOOLS
+
+
+# Agent runs take seconds, so buckets extend well beyond the client defaults
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2, 4, 8, 15, 30, 60, 120)
+
+REQUEST_LATENCY = Histogram(
+    "beeai_request_latency_seconds",
+    "Total request latency",
+    ["endpoint"],
+    buckets=LATENCY_BUCKETS
+)
+TIME_TO_FIRST_BYTE = Histogram(
+    "beeai_time_to_first_byte_seconds",
+    "Time from request arrival to the first content chunk",
+    ["endpoint"],
+    buckets=LATENCY_BUCKETS
+)
+LLM_LATENCY = Histogram(
+    "beeai_llm_call_latency_seconds",
+    "Latency of a single LLM call",
+    ["model"],
+    buckets=LATENCY_BUCKETS
+)
+TOOL_LATENCY = Histogram(
+    "beeai_tool_latency_seconds",
+    "Latency of a single tool call",
+    ["tool"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+)
+TOKENS = Counter(
+    "beeai_llm_tokens_total",
+    "LLM tokens processed",
+    ["model", "direction"]
+)
+RESPONSE_CACHE = Counter(
+    "beeai_response_cache_lookups_total",
+    "Response cache lookups by result",
+    ["result"]
+)
+RUNS_CANCELLED = Counter(
+    "beeai_runs_cancelled_total",
+    "Agent runs cancelled because the client disconnected"
+)
+RUNS_EXPIRED = Counter(
+    "beeai_runs_expired_total",
+    "Agent runs cancelled because the request deadline passed"
+)
+PROMPT_TOKENS = Histogram(
+    "beeai_llm_prompt_tokens",
+    "Estimated input tokens per LLM call, by step",
+    ["step"],
+    buckets=(128, 256, 512, 1024, 2048, 4096, 8192, 16384)
+)
+TOKENS_SAVED = Counter(
+    "beeai_llm_tokens_saved_total",
+    "Estimated input tokens saved by prompt compaction",
+    ["source"]
+)
+# livesum adds up the live worker processes when running multi-worker
+REQUESTS_IN_FLIGHT = Gauge(
+    "beeai_requests_in_flight",
+    "Requests currently being served",
+    multiprocess_mode="livesum"
+)
+JOBS_QUEUED = Gauge(
+    "beeai_jobs_queued",
+    "Background jobs waiting for a job worker",
+    multiprocess_mode="livesum"
+)
+JOBS = Counter(
+    "beeai_jobs_total",
+    "Finished background jobs by kind and final status",
+    ["kind", "status"]
+)
+JOB_DURATION = Histogram(
+    "beeai_job_duration_seconds",
+    "Run time of a background job",
+    ["kind"],
+    buckets=LATENCY_BUCKETS + (300, 600, 1800, 3600)
+)
+TRACES = Counter(
+    "beeai_traces_total",
+    "Finished traces by sampling decision (head, slow, error or dropped)",
+    ["decision"]
+)
+TRACE_SPANS = Counter(
+    "beeai_trace_spans_total",
+    "Spans of sampled traces by outcome (exported, export_failed, queue_full, span_limit)",
+    ["outcome"]
+)
+QUEUE_DEPTH = Gauge(
+    "beeai_queue_depth",
+    "Requests waiting for an in-flight slot",
+    multiprocess_mode="livesum"
+)
+ERRORS = Counter(
+    "beeai_errors_total",
+    "Errors by type",
+    ["type"]
+)
+LLM_HEDGES = Counter(
+    "beeai_llm_hedged_requests_total",
+    "Duplicate LLM requests started because the first exceeded the hedge threshold",
+    ["model"]
+)
+LLM_FALLBACKS = Counter(
+    "beeai_llm_fallbacks_total",
+    "LLM calls answered by the fallback model",
+    ["step"]
+)
+WATSONX_HTTP_REQUESTS = Counter(
+    "beeai_watsonx_http_requests_total",
+    "HTTP requests sent through the shared watsonx connection pool"
+)
+WATSONX_CONNECTIONS_OPENED = Counter(
+    "beeai_watsonx_connections_opened_total",
+    "New connections opened by the shared watsonx connection pool"
+)
+WATSONX_TOKEN_REFRESHES = Counter(
+    "beeai_watsonx_token_refreshes_total",
+    "IAM token exchanges"
+)
+
+# Export every tool series from the start so dashboards do not have gaps
+for _tool in ALL_TOOLS:
+    TOOL_LATENCY.labels(_tool.name)
+
+
+class RunMetrics:
+    """Emitter observer that turns LLM and tool events into metrics
+    
+    Start times are keyed by the run id of the emitting LLM or tool call, so
+    handling one event is a dict operation plus a histogram observation.
+    """
+    
+    def __init__(self):
+        self._started: Dict[str, float] = {}
+    
+    @staticmethod
+    def matches(event: EventMeta) -> bool:
+        return isinstance(event.creator, (ChatModel, Tool)) and event.name in ("start", "success", "error", "finish")
+    
+    async def on_event(self, data: Any, event: EventMeta):
+        key = event.trace.run_id if event.trace else id(event.creator)
+        creator = event.creator
+        
+        if event.name == "start":
+            self._started[key] = time.perf_counter()
+        elif event.name == "finish":
+            started = self._started.pop(key, None)
+            if started is not None:
+                elapsed = time.perf_counter() - started
+                if isinstance(creator, Tool):
+                    TOOL_LATENCY.labels(creator.name).observe(elapsed)
+                else:
+                    LLM_LATENCY.labels(creator.model_id).observe(elapsed)
+        elif event.name == "error":
+            ERRORS.labels("tool_error" if isinstance(creator, Tool) else "llm_error").inc()
+        elif event.name == "success" and isinstance(creator, ChatModel):
+            usage = getattr(data.value, "usage", None)
+            if usage:
+                TOKENS.labels(creator.model_id, "input").inc(usage.prompt_tokens or 0)
+                TOKENS.labels(creator.model_id, "output").inc(usage.completion_tokens or 0)
+    
+    def observe(self, run: Run) -> Run:
+        """Attach this observer to every nested LLM and tool event of a run"""
+        return run.on(self.matches, self.on_event, EmitterOptions(match_nested=True))
+
+
+def render_metrics() -> tuple[bytes, str]:
+    """Serialize all metrics in the Prometheus text format
+    
+    In multi-worker mode every worker writes to PROMETHEUS_MULTIPROC_DIR and
+    the scraped worker aggregates all of them.
+    """
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
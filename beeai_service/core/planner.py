@@ -0,0 +1,163 @@
+"""
+Planned execution for vehicle maintenance requests
+Runs the fixed tool workflow directly and asks the LLM for one summary
+"""
+import ast
+import asyncio
+import functools
+import json
+import re
+from typing import Any, Awaitable, Callable, Dict, Optional, Sequence
+
+from beeai_framework.backend import AnyMessage, AssistantMessage, ChatModel, SystemMessage, UserMessage
+from beeai_framework.context import Run
+from beeai_framework.memory import BaseMemory
+from beeai_framework.tools import Tool, ToolOutput
+
+from beeai_service.core.tools import (
+    find_earliest_appointment,
+    get_dealership_slots,
+    get_driver_schedule,
+    get_parts_inventory,
+    get_vehicle_location,
+)
+
+
+DEFAULT_DRIVER_ID = "driver-1"
+DEFAULT_COMPONENT = "Brake Pads"
+
+SUMMARY_INSTRUCTIONS = """
+You are a Predictive Maintenance Agent for vehicle fleet management.
+The tool results below were collected for the user's vehicle.
+Never claim the vehicle is not known.
+Never ask the user for more details.
+
+Provide a clear summary with:
+- Vehicle location
+- Driver availability windows
+- Earliest feasible appointment (from find_earliest_appointment)
+- Parts inventory status
+- Recommended action plan
+"""
+
+# Attaches event handlers to a run before it is awaited
+RunObserver = Callable[[Run], Run]
+
+VEHICLE_ID_PATTERN = re.compile(r"\b([A-Z][A-Z0-9]*-\d+)\b", re.IGNORECASE)
+DRIVER_ID_PATTERN = re.compile(r"\b(driver-\d+)\b", re.IGNORECASE)
+MAINTENANCE_KEYWORDS = ("maintenance", "service", "check", "status", "repair", "inspect", "schedule")
+
+
+def extract_vehicle_id(prompt: str) -> Optional[str]:
+    """Return the vehicle id mentioned in a maintenance request, if any"""
+    for match in VEHICLE_ID_PATTERN.finditer(prompt):
+        candidate = match.group(1)
+        if not DRIVER_ID_PATTERN.fullmatch(candidate):
+            return candidate.upper()
+    return None
+
+
+def is_maintenance_request(prompt: str) -> bool:
+    """Whether the prompt is a plain vehicle-maintenance request the plan covers"""
+    lowered = prompt.lower()
+    return extract_vehicle_id(prompt) is not None and any(word in lowered for word in MAINTENANCE_KEYWORDS)
+
+
+def _tool_result(output: ToolOutput) -> Dict[str, Any]:
+    """Decode a tool's dict result from its text output"""
+    text = output.get_text_content()
+    try:
+        return json.loads(text)
+    except ValueError:
+        return ast.literal_eval(text)
+
+
+async def run_tool(tool: Tool, observe: Optional[RunObserver] = None, **kwargs) -> Dict[str, Any]:
+    """Run a tool directly and return its decoded dict result"""
+    run = tool.run(kwargs)
+    if observe:
+        run = observe(run)
+    return _tool_result(await run)
+
+
+async def collect_maintenance_context(
+    vehicle_id: str,
+    driver_id: str = DEFAULT_DRIVER_ID,
+    run: Callable[..., Awaitable[Dict[str, Any]]] = run_tool
+) -> Dict[str, Dict[str, Any]]:
+    """Run the fixed tool workflow for one vehicle
+    
+    Driver schedule, parts inventory and the appointment match do not depend
+    on other tool results, so they run alongside the location lookup;
+    dealership slots follow once the city is known. A vehicle without a
+    known city gets no slots instead of a lookup for an empty city.
+    """
+    async def location_and_slots():
+        location = await run(get_vehicle_location, vehicle_id=vehicle_id)
+        city = location.get("city")
+        if not city:
+            return location, {"city": None, "slots": [], "error": "Vehicle location unknown"}
+        slots = await run(get_dealership_slots, city=city)
+        return location, slots
+    
+    (location, slots), schedule, inventory, appointment = await asyncio.gather(
+        location_and_slots(),
+        run(get_driver_schedule, driver_id=driver_id),
+        run(get_parts_inventory, component=DEFAULT_COMPONENT),
+        run(find_earliest_appointment, vehicle_id=vehicle_id, driver_id=driver_id, component=DEFAULT_COMPONENT)
+    )
+    
+    return {
+        "get_vehicle_location": location,
+        "get_driver_schedule": schedule,
+        "get_dealership_slots": slots,
+        "get_parts_inventory": inventory,
+        "find_earliest_appointment": appointment
+    }
+
+
+async def summarize_maintenance(
+    llm: ChatModel,
+    prompt: str,
+    tool_results: Dict[str, Dict[str, Any]],
+    history: Sequence[AnyMessage] = (),
+    observe: Optional[RunObserver] = None
+) -> str:
+    """Write the maintenance summary from collected tool results in one LLM call"""
+    messages = [
+        SystemMessage(SUMMARY_INSTRUCTIONS),
+        *history,
+        UserMessage(prompt),
+        SystemMessage(f"Tool results:\n{json.dumps(tool_results, separators=(',', ':'))}")
+    ]
+    
+    run = llm.run(messages)
+    if observe:
+        run = observe(run)
+    output = await run
+    return output.get_text_content()
+
+
+async def run_planned_maintenance(
+    llm: ChatModel,
+    prompt: str,
+    memory: BaseMemory,
+    observe: Optional[RunObserver] = None
+) -> str:
+    """Answer a maintenance request with the fixed workflow and a single LLM call
+    
+    The final answer is written to memory like an agent turn.
+    """
+    vehicle_id = extract_vehicle_id(prompt)
+    driver_match = DRIVER_ID_PATTERN.search(prompt)
+    driver_id = driver_match.group(1).lower() if driver_match else DEFAULT_DRIVER_ID
+    
+    tool_results = await collect_maintenance_context(
+        vehicle_id,
+        driver_id,
+        run=functools.partial(run_tool, observe=observe)
+    )
+    answer = await summarize_maintenance(llm, prompt, tool_results, memory.messages, observe)
+    
+    await memory.add_many([UserMessage(prompt), AssistantMessage(answer)])
+    return answer
@@ -0,0 +1,154 @@
+"""
+Response cache for repeated maintenance requests
+Keyed on the normalized prompt, the vehicle id and the fleet data version
+"""
+import asyncio
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+from beeai_service.config.settings import app_settings
+from beeai_service.core import metrics
+from beeai_service.core.cache import TTLCache
+from beeai_service.core.fleet_data import fleet_store
+from beeai_service.core.log import get_logger
+from beeai_service.core.planner import extract_vehicle_id
+
+
+logger = get_logger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Case, spacing and trailing punctuation do not change the answer"""
+    return _WHITESPACE.sub(" ", prompt).strip().rstrip(".!?").casefold()
+
+
+def data_version() -> str:
+    """Version stamp of everything a cached answer was derived from"""
+    return f"{fleet_store.version or 'demo'}:{app_settings.llm_model}"
+
+
+class ResponseCache:
+    """Two-tier cache of final answers for single-turn vehicle requests
+    
+    The in-memory tier is a TTL/LRU cache per worker. The optional disk tier
+    is a SQLite file shared by all workers that survives restarts; its
+    queries run in a worker thread, so a busy database never blocks the
+    event loop. Every disk write drops expired rows and trims the table to
+    the most recently used disk_max_entries. The data version is part of every key, so answers computed
+    from an older fleet snapshot are never served; the first lookup after a
+    reload also drops them from both tiers.
+    """
+    
+    def __init__(self, ttl: float, max_size: int, disk_path: Optional[str] = None, disk_max_entries: int = 10000):
+        self.ttl = ttl
+        self.memory = TTLCache("responses", ttl=ttl, max_size=max_size)
+        self.disk_path = disk_path or None
+        self.disk_max_entries = disk_max_entries
+        self._version: Optional[str] = None
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+    
+    def key(self, prompt: str) -> Optional[str]:
+        """Cache key for a prompt, or None when the prompt names no vehicle"""
+        vehicle_id = extract_vehicle_id(prompt)
+        if vehicle_id is None:
+            return None
+        raw = f"{data_version()}|{vehicle_id}|{normalize_prompt(prompt)}"
+        return hashlib.sha256(raw.encode()).hexdigest()
+    
+    def _connect(self) -> sqlite3.Connection:
+        if self._db is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.disk_path)), exist_ok=True)
+            self._db = sqlite3.connect(self.disk_path, check_same_thread=False, isolation_level=None, timeout=1.0)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses "
+                "(key TEXT PRIMARY KEY, version TEXT NOT NULL, expires_at REAL NOT NULL, used_at REAL NOT NULL, "
+                "response TEXT NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS responses_used_at ON responses (used_at)")
+        return self._db
+    
+    def _execute(self, sql: str, params: tuple = ()) -> Optional[tuple]:
+        """Run one statement on the disk tier and return its first row; called in a worker thread"""
+        with self._db_lock:
+            return self._connect().execute(sql, params).fetchone()
+    
+    def _read(self, key: str) -> Optional[str]:
+        """Return a live answer from the disk tier and mark it as used"""
+        now = time.time()
+        with self._db_lock:
+            db = self._connect()
+            row = db.execute("SELECT response FROM responses WHERE key = ? AND expires_at > ?", (key, now)).fetchone()
+            if row is not None:
+                db.execute("UPDATE responses SET used_at = ? WHERE key = ?", (now, key))
+        return row[0] if row is not None else None
+    
+    def _write(self, key: str, version: str, response: str):
+        """Store one answer, then drop expired rows and the least recently used beyond the cap"""
+        now = time.time()
+        with self._db_lock:
+            db = self._connect()
+            db.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)", (key, version, now + self.ttl, now, response))
+            db.execute("DELETE FROM responses WHERE expires_at < ?", (now,))
+            db.execute(
+                "DELETE FROM responses WHERE key IN "
+                "(SELECT key FROM responses ORDER BY used_at DESC LIMIT -1 OFFSET ?)",
+                (self.disk_max_entries,)
+            )
+    
+    async def _check_version(self):
+        version = data_version()
+        if version == self._version:
+            return
+        if self._version is not None:
+            logger.info("Fleet data changed, response cache cleared", extra={"version": version})
+        self._version = version
+        self.memory.invalidate()
+        if self.disk_path:
+            await asyncio.to_thread(
+                self._execute,
+                "DELETE FROM responses WHERE version != ? OR expires_at < ?",
+                (version, time.time())
+            )
+    
+    async def get(self, key: str) -> Optional[str]:
+        await self._check_version()
+        found, response = self.memory.get(key)
+        if found:
+            metrics.RESPONSE_CACHE.labels("hit_memory").inc()
+            return response
+        
+        if self.disk_path:
+            try:
+                response = await asyncio.to_thread(self._read, key)
+            except sqlite3.Error:
+                logger.warning("Response cache disk read failed", exc_info=True)
+                response = None
+            if response is not None:
+                self.memory.set(key, response)
+                metrics.RESPONSE_CACHE.labels("hit_disk").inc()
+                return response
+        
+        metrics.RESPONSE_CACHE.labels("miss").inc()
+        return None
+    
+    async def set(self, key: str, response: str):
+        await self._check_version()
+        self.memory.set(key, response)
+        if self.disk_path:
+            try:
+                await asyncio.to_thread(self._write, key, self._version, response)
+            except sqlite3.Error:
+                # The memory tier still has it; a busy or read-only disk must not fail the request
+                logger.warning("Response cache disk write failed", exc_info=True)
+    
+    def stats(self) -> dict:
+        return {**self.memory.stats.as_dict(), "size": len(self.memory), "disk": bool(self.disk_path)}
@@ -0,0 +1,222 @@
+"""
+Tiered model routing
+Sends tool-selection steps to a fast model and the final answer to the main
+model, hedges slow calls and falls back to a secondary model on failure
+"""
+import asyncio
+import time
+from collections import deque
+from typing import AsyncGenerator, Deque, Dict, Optional, Set
+
+from beeai_framework.backend import ChatModel, ChatModelParameters, ToolMessage, UserMessage
+from beeai_framework.backend.types import ChatModelInput, ChatModelOutput
+from beeai_framework.context import RunContext
+from beeai_framework.tools import Tool
+
+from beeai_service.config.settings import app_settings
+from beeai_service.core import metrics
+from beeai_service.core.budget import apply_step_budget, message_tokens
+from beeai_service.core.log import get_logger
+
+
+logger = get_logger(__name__)
+
+TOOL_STEP = "tool"
+ANSWER_STEP = "answer"
+
+
+class LatencyTracker:
+    """Rolling window of recent call latencies for one model"""
+    
+    def __init__(self, window: int = 200):
+        self._samples: Deque[float] = deque(maxlen=window)
+    
+    def add(self, seconds: float):
+        self._samples.append(seconds)
+    
+    def p95(self, min_samples: int) -> Optional[float]:
+        if len(self._samples) < min_samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[int(0.95 * (len(ordered) - 1))]
+
+
+class RoutedChatModel(ChatModel):
+    """ChatModel that routes each call by step type
+    
+    A call is a tool-selection step while workflow tools are on offer and
+    some of them have no result yet in the current turn, or when the call is
+    forced to a workflow tool. Once every offered workflow tool has answered,
+    or when no workflow tool is offered, the call produces the final answer
+    and is the answer step. Each step runs under its own
+    latency budget and output token cap. When a call is slower than the
+    hedge threshold (configured, or the model's observed p95), a duplicate
+    request is started and the first response wins; for streams the race is
+    on the first chunk. Errors and budget overruns go to the fallback model
+    when one is configured.
+    """
+    
+    def __init__(
+        self,
+        answer_model: ChatModel,
+        tool_model: Optional[ChatModel] = None,
+        fallback_model: Optional[ChatModel] = None,
+        workflow_tools: Optional[Set[str]] = None,
+        parameters: Optional[ChatModelParameters] = None,
+        instruction_tokens_saved: int = 0
+    ):
+        super().__init__(parameters=parameters)
+        self.answer_model = answer_model
+        self.tool_model = tool_model or answer_model
+        self.fallback_model = fallback_model
+        self.workflow_tools = workflow_tools or set()
+        self.instruction_tokens_saved = instruction_tokens_saved
+        self.tool_choice_support = answer_model.tool_choice_support
+        self._latency: Dict[str, LatencyTracker] = {}
+    
+    @property
+    def model_id(self) -> str:
+        return self.answer_model.model_id
+    
+    @property
+    def provider_id(self) -> str:
+        return self.answer_model.provider_id
+    
+    def _step(self, input: ChatModelInput) -> str:
+        if isinstance(input.tool_choice, Tool):
+            return TOOL_STEP if input.tool_choice.name in self.workflow_tools else ANSWER_STEP
+        offered = {tool.name for tool in input.tools or []} & self.workflow_tools
+        if not offered or input.tool_choice == "none":
+            return ANSWER_STEP
+        
+        answered = set()
+        for message in reversed(input.messages):
+            if isinstance(message, UserMessage):
+                break
+            if isinstance(message, ToolMessage):
+                answered.update(result.tool_name for result in message.get_tool_results())
+        return TOOL_STEP if offered - answered else ANSWER_STEP
+    
+    def _route(self, input: ChatModelInput) -> tuple[str, ChatModel, float, ChatModelInput]:
+        """Pick the model and latency budget for this call and cap its output tokens"""
+        step = self._step(input)
+        metrics.PROMPT_TOKENS.labels(step).observe(message_tokens(input.messages))
+        if input.tools and self.instruction_tokens_saved:
+            # Agent calls carry the maintenance instructions in their system prompt
+            metrics.TOKENS_SAVED.labels("instructions").inc(self.instruction_tokens_saved)
+        
+        input = apply_step_budget(step, input)
+        if step == TOOL_STEP:
+            return step, self.tool_model, app_settings.llm_tool_step_budget_seconds, input
+        return step, self.answer_model, app_settings.llm_answer_step_budget_seconds, input
+    
+    def _tracker(self, model: ChatModel) -> LatencyTracker:
+        tracker = self._latency.get(model.model_id)
+        if tracker is None:
+            tracker = self._latency[model.model_id] = LatencyTracker()
+        return tracker
+    
+    def _hedge_after(self, model: ChatModel) -> Optional[float]:
+        if not app_settings.llm_hedge_enabled:
+            return None
+        if app_settings.llm_hedge_after_seconds > 0:
+            return app_settings.llm_hedge_after_seconds
+        return self._tracker(model).p95(app_settings.llm_hedge_min_samples)
+    
+    async def _hedged_create(self, model: ChatModel, input: ChatModelInput, run: RunContext) -> ChatModelOutput:
+        started = time.monotonic()
+        tasks = [asyncio.create_task(model._create(input, run))]
+        try:
+            hedge_after = self._hedge_after(model)
+            if hedge_after is not None:
+                done, _ = await asyncio.wait(tasks, timeout=hedge_after)
+                if not done:
+                    metrics.LLM_HEDGES.labels(model.model_id).inc()
+                    tasks.append(asyncio.create_task(model._create(input, run)))
+            
+            pending = set(tasks)
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        self._tracker(model).add(time.monotonic() - started)
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+    
+    async def _create(self, input: ChatModelInput, run: RunContext) -> ChatModelOutput:
+        step, model, budget, input = self._route(input)
+        try:
+            return await asyncio.wait_for(self._hedged_create(model, input, run), timeout=budget)
+        except Exception as e:
+            if self.fallback_model is None:
+                raise
+            metrics.LLM_FALLBACKS.labels(step).inc()
+            logger.warning("LLM call failed, using fallback model", extra={"step": step, "error": repr(e)})
+            return await asyncio.wait_for(self.fallback_model._create(input, run), timeout=budget)
+    
+    async def _first_chunk(
+        self,
+        model: ChatModel,
+        input: ChatModelInput,
+        run: RunContext
+    ) -> tuple[Optional[ChatModelOutput], AsyncGenerator[ChatModelOutput, None]]:
+        """Start streaming, hedging on time to first chunk; return the winning stream"""
+        started = time.monotonic()
+        streams = [model._create_stream(input, run)]
+        tasks = [asyncio.create_task(anext(streams[0], None))]
+        try:
+            hedge_after = self._hedge_after(model)
+            if hedge_after is not None:
+                done, _ = await asyncio.wait(tasks, timeout=hedge_after)
+                if not done:
+                    metrics.LLM_HEDGES.labels(model.model_id).inc()
+                    streams.append(model._create_stream(input, run))
+                    tasks.append(asyncio.create_task(anext(streams[1], None)))
+            
+            pending = set(tasks)
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        winner = tasks.index(task)
+                        self._tracker(model).add(time.monotonic() - started)
+                        for index, other in enumerate(tasks):
+                            if index != winner:
+                                # A generator cannot be closed while its anext() is still running
+                                other.cancel()
+                                await asyncio.gather(other, return_exceptions=True)
+                                await streams[index].aclose()
+                        return task.result(), streams[winner]
+                    error = task.exception()
+            raise error
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            for stream in streams:
+                await stream.aclose()
+            raise
+    
+    async def _create_stream(self, input: ChatModelInput, run: RunContext) -> AsyncGenerator[ChatModelOutput, None]:
+        step, model, budget, input = self._route(input)
+        try:
+            first, stream = await asyncio.wait_for(self._first_chunk(model, input, run), timeout=budget)
+        except Exception as e:
+            if self.fallback_model is None:
+                raise
+            metrics.LLM_FALLBACKS.labels(step).inc()
+            logger.warning("LLM stream failed before the first chunk, using fallback model", extra={"step": step, "error": repr(e)})
+            model = self.fallback_model
+            stream = model._create_stream(input, run)
+            first = await asyncio.wait_for(anext(stream, None), timeout=budget)
+        
+        if first is not None:
+            yield first
+        async for chunk in stream:
+            yield chunk
@@ -0,0 +1,117 @@
+"""
+Conversation session store
+Keeps bounded per-conversation memory so follow-up turns reuse earlier context
+"""
+import asyncio
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable, Optional, Sequence
+
+from beeai_framework.backend import AnyMessage
+from beeai_framework.memory import BaseMemory, TokenMemory, UnconstrainedMemory
+from beeai_framework.memory.token_memory import simple_estimate
+
+from beeai_service.config.settings import app_settings
+
+
+def window_memory(llm: Optional[Any] = None, max_tokens: Optional[int] = None) -> TokenMemory:
+    """Token-bounded memory that drops the oldest messages and never raises
+    
+    A message larger than the whole budget is counted as the full budget, so
+    it evicts the earlier history instead of failing the turn.
+    """
+    max_tokens = max_tokens or app_settings.session_max_tokens
+    
+    def estimate(message: AnyMessage) -> int:
+        return min(simple_estimate(message), max_tokens)
+    
+    return TokenMemory(llm, max_tokens=max_tokens, handlers={"estimate": estimate})
+
+
+@dataclass
+class Session:
+    """Memory and bookkeeping for one conversation"""
+    memory: BaseMemory
+    last_used: float = field(default_factory=time.monotonic)
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+
+class SessionStore:
+    """LRU session store with idle TTL eviction
+    
+    Sessions are kept in access order, so both the LRU cap and the idle
+    TTL only ever need to look at the oldest entries.
+    """
+    
+    def __init__(
+        self,
+        memory_factory: Callable[[], BaseMemory],
+        max_sessions: Optional[int] = None,
+        idle_ttl: Optional[float] = None
+    ):
+        self.memory_factory = memory_factory
+        self.max_sessions = max_sessions or app_settings.session_max_count
+        self.idle_ttl = idle_ttl or app_settings.session_idle_ttl_seconds
+        self._sessions: "OrderedDict[str, Session]" = OrderedDict()
+    
+    def __len__(self) -> int:
+        return len(self._sessions)
+    
+    def _evict(self, now: float):
+        """Drop idle sessions and trim the store to its size cap"""
+        while self._sessions:
+            oldest_id, oldest = next(iter(self._sessions.items()))
+            expired = now - oldest.last_used > self.idle_ttl
+            if not expired and len(self._sessions) <= self.max_sessions:
+                break
+            if oldest.lock.locked() and not expired:
+                # Never evict a conversation that is mid-turn just to make room
+                self._sessions.move_to_end(oldest_id)
+                break
+            del self._sessions[oldest_id]
+    
+    def _get_or_create(self, session_id: str) -> tuple[Session, bool]:
+        now = time.monotonic()
+        session = self._sessions.get(session_id)
+        created = session is None or now - session.last_used > self.idle_ttl
+        if created:
+            session = Session(memory=self.memory_factory())
+            self._sessions[session_id] = session
+        session.last_used = now
+        self._sessions.move_to_end(session_id)
+        self._evict(now)
+        return session, created
+    
+    def has_turns(self, session_id: str) -> bool:
+        """Whether a live conversation already holds earlier turns"""
+        session = self._sessions.get(session_id)
+        if session is None or time.monotonic() - session.last_used > self.idle_ttl:
+            return False
+        return bool(session.memory.messages)
+    
+    @asynccontextmanager
+    async def open(
+        self,
+        session_id: Optional[str],
+        history: Sequence[AnyMessage] = ()
+    ) -> AsyncIterator[BaseMemory]:
+        """Yield the memory to run a turn with
+        
+        Without a session id the turn gets a throwaway unbounded memory
+        seeded with the history sent by the client. With an id, the stored
+        memory is used and turns of the same conversation run one at a time.
+        """
+        if not session_id:
+            memory = UnconstrainedMemory()
+            await memory.add_many(history)
+            yield memory
+            return
+        
+        session, created = self._get_or_create(session_id)
+        async with session.lock:
+            if created:
+                await session.memory.add_many(history)
+            yield session.memory
+            session.last_used = time.monotonic()
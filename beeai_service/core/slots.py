@@ -0,0 +1,259 @@
+"""
+Slot matching
+Finds the earliest dealership slot that fits inside a driver's availability,
+for one vehicle or for a whole fleet without double-booking
+"""
+import heapq
+from bisect import bisect_left
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from beeai_service.config.settings import app_settings
+from beeai_service.core.fleet_data import DEMO_AVAILABILITY, DEMO_CITY, DEMO_SLOTS, DEMO_STOCK, fleet_store
+
+
+@dataclass(frozen=True)
+class Interval:
+    start: datetime
+    end: datetime
+    
+    def overlaps(self, other: "Interval") -> bool:
+        return self.start < other.end and other.start < self.end
+
+
+@dataclass(frozen=True)
+class Slot:
+    city: str
+    dealership: Optional[str]
+    interval: Interval
+    
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "dealership": self.dealership,
+            "city": self.city,
+            "start": self.interval.start.isoformat(),
+            "end": self.interval.end.isoformat()
+        }
+
+
+def _interval(start: str, end: Optional[str], default_length: timedelta) -> Interval:
+    begin = datetime.fromisoformat(start)
+    return Interval(begin, datetime.fromisoformat(end) if end else begin + default_length)
+
+
+def driver_windows(rows: Iterable[Tuple[str, Optional[str]]]) -> List[Interval]:
+    """Availability windows sorted by start; open-ended windows get the default length"""
+    length = timedelta(hours=app_settings.slot_match_window_hours)
+    return sorted(_interval(start, end, length) for start, end in rows)
+
+
+def city_slots(city: str, rows: Iterable[Tuple[Optional[str], str, Optional[str]]]) -> List[Slot]:
+    length = timedelta(minutes=app_settings.slot_match_slot_minutes)
+    return [Slot(city, dealership, _interval(start, end, length)) for dealership, start, end in rows]
+
+
+class SlotIndex:
+    """Dealership slots sorted by start time
+    
+    A bisect on the start times jumps straight to the first slot a driver
+    window can use, so a lookup only scans slots that begin inside the
+    window. Booked slots are skipped; rows with the same dealership and start
+    are separate bays and can be booked once each.
+    """
+    
+    def __init__(self, slots: Iterable[Slot]):
+        self.slots = sorted(slots, key=lambda slot: slot.interval.start)
+        self._starts = [slot.interval.start for slot in self.slots]
+        self._booked: Set[int] = set()
+    
+    def earliest(
+        self,
+        windows: Sequence[Interval],
+        not_before: Optional[datetime] = None,
+        busy: Sequence[Interval] = ()
+    ) -> Optional[int]:
+        """Position of the earliest free slot inside one of `windows`
+        
+        The slot may not start before `not_before` or overlap any interval
+        in `busy` (the driver's other appointments).
+        """
+        best: Optional[int] = None
+        for window in windows:
+            lower = max(window.start, not_before) if not_before else window.start
+            # Windows are sorted, so a later one cannot beat a slot found earlier
+            if best is not None and window.start >= self._starts[best]:
+                break
+            position = bisect_left(self._starts, lower)
+            while position < len(self.slots) and self._starts[position] < window.end:
+                slot = self.slots[position]
+                if (
+                    position not in self._booked
+                    and slot.interval.end <= window.end
+                    and not any(slot.interval.overlaps(other) for other in busy)
+                ):
+                    if best is None or position < best:
+                        best = position
+                    break
+                position += 1
+        return best
+    
+    def is_booked(self, position: int) -> bool:
+        return position in self._booked
+    
+    def book(self, position: int) -> Slot:
+        self._booked.add(position)
+        return self.slots[position]
+
+
+@dataclass
+class AppointmentRequest:
+    vehicle_id: str
+    driver_id: str
+    city: Optional[str]
+    not_before: Optional[datetime] = None
+
+
+def _not_before(windows: Sequence[Interval], in_stock: Optional[bool]) -> Optional[datetime]:
+    """Out-of-stock parts push the appointment back by the parts lead time"""
+    if in_stock is False and windows:
+        return windows[0].start + timedelta(hours=app_settings.slot_match_parts_lead_hours)
+    return None
+
+
+def assign(
+    requests: Sequence[AppointmentRequest],
+    indexes: Dict[str, SlotIndex],
+    windows: Dict[str, List[Interval]]
+) -> Dict[str, Optional[Slot]]:
+    """Give every vehicle its earliest slot without double-booking
+    
+    Vehicles are served earliest-feasible-first from a heap. When a popped
+    candidate was taken in the meantime (or now clashes with another
+    appointment of the same driver) it is recomputed and pushed back, so each
+    vehicle ends up with the earliest slot still free when its turn comes.
+    """
+    booked_by_driver: Dict[str, List[Interval]] = {}
+    result: Dict[str, Optional[Slot]] = {request.vehicle_id: None for request in requests}
+    heap: List[Tuple[datetime, int, int]] = []
+    
+    def candidate(request: AppointmentRequest) -> Optional[int]:
+        index = indexes.get(request.city or "")
+        if index is None:
+            return None
+        return index.earliest(
+            windows.get(request.driver_id, []),
+            request.not_before,
+            booked_by_driver.get(request.driver_id, ())
+        )
+    
+    for order, request in enumerate(requests):
+        position = candidate(request)
+        if position is not None:
+            heap.append((indexes[request.city].slots[position].interval.start, order, position))
+    heapq.heapify(heap)
+    
+    while heap:
+        _, order, position = heapq.heappop(heap)
+        request = requests[order]
+        index = indexes[request.city]
+        slot = index.slots[position]
+        busy = booked_by_driver.get(request.driver_id, ())
+        if index.is_booked(position) or any(slot.interval.overlaps(other) for other in busy):
+            position = candidate(request)
+            if position is not None:
+                heapq.heappush(heap, (index.slots[position].interval.start, order, position))
+            continue
+        result[request.vehicle_id] = index.book(position)
+        booked_by_driver.setdefault(request.driver_id, []).append(slot.interval)
+    
+    return result
+
+
+def _load(
+    vehicle_ids: Sequence[str],
+    driver_ids: Iterable[str],
+    component: Optional[str]
+) -> Tuple[Dict[str, Optional[str]], Dict[str, SlotIndex], Dict[str, List[Interval]], Optional[bool]]:
+    """Fetch cities, slot indexes, driver windows and parts stock in bulk"""
+    driver_ids = list(dict.fromkeys(driver_ids))
+    if not fleet_store.configured:
+        cities: Dict[str, Optional[str]] = {vehicle_id: DEMO_CITY for vehicle_id in vehicle_ids}
+        slot_rows = {DEMO_CITY: [(None, start, None) for start in DEMO_SLOTS]}
+        window_rows = {driver_id: [(start, None) for start in DEMO_AVAILABILITY] for driver_id in driver_ids}
+        stock = DEMO_STOCK if component else None
+    else:
+        locations = fleet_store.vehicle_locations(vehicle_ids)
+        cities = {vehicle_id: locations.get(vehicle_id.strip()) for vehicle_id in vehicle_ids}
+        slot_rows = fleet_store.dealership_slots_by_city(city for city in cities.values() if city)
+        window_rows = fleet_store.driver_availabilities(driver_ids)
+        stock = (fleet_store.parts_stock(component) or 0) if component else None
+    
+    # Slot rows come back keyed by the stored city name; look them up case-insensitively
+    indexes = {city.casefold(): SlotIndex(city_slots(city, rows)) for city, rows in slot_rows.items()}
+    indexes = {
+        city: indexes.get(city.casefold(), SlotIndex(()))
+        for city in set(cities.values()) if city
+    }
+    windows = {driver_id: driver_windows(window_rows.get(driver_id, [])) for driver_id in driver_ids}
+    in_stock = None if stock is None else stock > 0
+    return cities, indexes, windows, in_stock
+
+
+def _unassigned_reason(
+    request: AppointmentRequest,
+    indexes: Dict[str, SlotIndex],
+    windows: Dict[str, List[Interval]]
+) -> str:
+    """Why a vehicle got no slot"""
+    if request.city is None:
+        return "Vehicle not found in fleet data"
+    if not windows.get(request.driver_id):
+        return f"Driver {request.driver_id} has no availability"
+    if not indexes[request.city].slots:
+        return f"No dealership slots in {request.city}"
+    return f"No free dealership slot fits the availability of driver {request.driver_id}"
+
+
+def assign_appointments(
+    vehicle_ids: Sequence[str],
+    drivers: Dict[str, str],
+    component: Optional[str] = None
+) -> Dict[str, Dict[str, Any]]:
+    """Batch slot assignment for many vehicles; `drivers` maps vehicle id to driver id
+    
+    A vehicle without an appointment gets a `reason` saying why.
+    """
+    cities, indexes, windows, in_stock = _load(vehicle_ids, drivers.values(), component)
+    requests = [
+        AppointmentRequest(
+            vehicle_id=vehicle_id,
+            driver_id=drivers[vehicle_id],
+            city=cities[vehicle_id],
+            not_before=_not_before(windows[drivers[vehicle_id]], in_stock)
+        )
+        for vehicle_id in vehicle_ids
+    ]
+    slots = assign(requests, indexes, windows)
+    
+    results = {}
+    for request in requests:
+        slot = slots[request.vehicle_id]
+        result = {
+            "vehicle_id": request.vehicle_id,
+            "driver_id": request.driver_id,
+            "city": request.city,
+            "appointment": slot.as_dict() if slot else None,
+            "parts_in_stock": in_stock
+        }
+        if slot is None:
+            result["reason"] = _unassigned_reason(request, indexes, windows)
+        if request.city is None:
+            result["error"] = result["reason"]
+        results[request.vehicle_id] = result
+    return results
+
+
+def find_appointment(vehicle_id: str, driver_id: str, component: Optional[str] = None) -> Dict[str, Any]:
+    """Earliest feasible appointment for one vehicle"""
+    return assign_appointments([vehicle_id], {vehicle_id: driver_id}, component)[vehicle_id]
@@ -1,27 +1,75 @@
 from beeai_framework.tools import tool
 
+from beeai_service.config.settings import app_settings
+from beeai_service.core.budget import compact_tool
+from beeai_service.core.cache import cached_tool
+from beeai_service.core.fleet_data import DEMO_AVAILABILITY, DEMO_CITY, DEMO_SLOTS, DEMO_STOCK, fleet_store
+from beeai_service.core.slots import find_appointment
+
+
+def _cached(ttl: float):
+    """Per-tool result cache configured from Settings"""
+    return cached_tool(
+        ttl=ttl,
+        max_size=app_settings.tool_cache_max_size,
+        enabled=app_settings.tool_cache_enabled
+    )
+
+
 @tool(description="Get the current city for the given vehicle ID.")
+@_cached(app_settings.tool_cache_ttl_location)
+@compact_tool
 def get_vehicle_location(vehicle_id: str):
     """Get vehicle location"""
-    return {"vehicle_id": vehicle_id, "city": "San Francisco"}
+    if not fleet_store.configured:
+        return {"vehicle_id": vehicle_id, "city": DEMO_CITY}
+    city = fleet_store.vehicle_location(vehicle_id)
+    if city is None:
+        return {"vehicle_id": vehicle_id, "city": None, "error": "Vehicle not found in fleet data"}
+    return {"vehicle_id": vehicle_id, "city": city}
 
 
 @tool(description="Get the schedule availability for the driver.")
+@_cached(app_settings.tool_cache_ttl_driver_schedule)
+@compact_tool
 def get_driver_schedule(driver_id: str):
     """Get driver schedule"""
-    return {"driver_id": driver_id, "availability": ["2025-11-22T14:00:00"]}
+    if not fleet_store.configured:
+        return {"driver_id": driver_id, "availability": DEMO_AVAILABILITY}
+    windows = fleet_store.driver_availability(driver_id)
+    return {"driver_id": driver_id, "availability": [available_from for available_from, _ in windows]}
 
 
 @tool(description="Get dealership service slots available in a given city.")
+@_cached(app_settings.tool_cache_ttl_dealership_slots)
+@compact_tool
 def get_dealership_slots(city: str):
     """Get dealership slots"""
-    return {"city": city, "slots": ["2025-11-22T15:00:00"]}
+    if not fleet_store.configured:
+        return {"city": city, "slots": DEMO_SLOTS}
+    slots = fleet_store.dealership_slots(city) if city else []
+    return {"city": city, "slots": [slot_start for _, slot_start, _ in slots]}
 
 
 @tool(description="Check inventory count for a specific vehicle component.")
+@_cached(app_settings.tool_cache_ttl_parts_inventory)
+@compact_tool
 def get_parts_inventory(component: str):
     """Check parts inventory"""
-    return {"component": component, "stock": 5}
+    if not fleet_store.configured:
+        return {"component": component, "stock": DEMO_STOCK}
+    return {"component": component, "stock": fleet_store.parts_stock(component) or 0}
+
+
+@tool(description=(
+    "Find the earliest dealership appointment for a vehicle that fits inside the driver's availability. "
+    "Pass the component to be replaced so out-of-stock parts are taken into account."
+))
+@_cached(app_settings.tool_cache_ttl_dealership_slots)
+@compact_tool
+def find_earliest_appointment(vehicle_id: str, driver_id: str, component: str = ""):
+    """Find earliest appointment"""
+    return find_appointment(vehicle_id, driver_id, component or None)
 
 
 # Export all tools as a list
@@ -29,5 +77,6 @@ ALL_TOOLS = [
     get_vehicle_location,
     get_driver_schedule,
     get_dealership_slots,
-    get_parts_inventory
-]
\ No newline at end of file
+    get_parts_inventory,
+    find_earliest_appointment
+]
@@ -0,0 +1,440 @@
+"""
+Request tracing
+Spans for requests, LLM calls and tool calls, sampled per trace and exported
+as OTLP/JSON in batches by a background thread, so recording a span on the
+event loop costs a few microseconds and never waits on the collector.
+"""
+import atexit
+import base64
+import json
+import queue
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from beeai_framework.backend import ChatModel
+from beeai_framework.context import Run
+from beeai_framework.emitter import EmitterOptions, EventMeta
+from beeai_framework.tools import Tool
+
+from beeai_service.config.settings import app_settings
+from beeai_service.core import metrics
+from beeai_service.core.log import get_logger
+
+
+logger = get_logger(__name__)
+
+# OTLP span kinds
+INTERNAL, SERVER, CLIENT = 1, 2, 3
+
+# Probes and scrapes would drown out the traces worth looking at
+UNTRACED_PATHS = {"/health", "/ready", "/metrics", "/.well-known/agent-card.json"}
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+
+class Trace:
+    """Spans of one request, kept in memory until the sampling decision"""
+    
+    __slots__ = ("trace_id", "spans", "head_sampled", "error", "dropped_spans")
+    
+    def __init__(self, head_sampled: bool):
+        self.trace_id = f"{random.getrandbits(128):032x}"
+        self.spans: List[Span] = []
+        self.head_sampled = head_sampled
+        self.error = False
+        self.dropped_spans = 0
+
+
+class Span:
+    __slots__ = ("trace", "span_id", "parent_id", "name", "kind", "start_ns", "end_ns", "attributes", "error")
+    
+    def __init__(self, trace: Trace, name: str, kind: int, parent_id: Optional[str], attributes: Optional[Dict[str, Any]]):
+        self.trace = trace
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes = attributes or {}
+        self.error: Optional[str] = None
+    
+    def set(self, key: str, value: Any):
+        self.attributes[key] = value
+    
+    def record_error(self, message: str):
+        self.error = message
+        self.trace.error = True
+    
+    def end(self):
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+
+
+def _attribute(key: str, value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+def encode_otlp(spans: List[Span]) -> Dict[str, Any]:
+    """ExportTraceServiceRequest in the OTLP/JSON encoding"""
+    encoded = []
+    for span in spans:
+        item = {
+            "traceId": span.trace.trace_id,
+            "spanId": span.span_id,
+            "name": span.name,
+            "kind": span.kind,
+            "startTimeUnixNano": str(span.start_ns),
+            "endTimeUnixNano": str(span.end_ns or span.start_ns),
+            "attributes": [_attribute(key, value) for key, value in span.attributes.items() if value is not None],
+            "status": {"code": 2, "message": span.error} if span.error else {"code": 1}
+        }
+        if span.parent_id:
+            item["parentSpanId"] = span.parent_id
+        encoded.append(item)
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [_attribute("service.name", app_settings.tracing_service_name)]},
+            "scopeSpans": [{"scope": {"name": "beeai_service"}, "spans": encoded}]
+        }]
+    }
+
+
+class FileSpanExporter:
+    """Appends one OTLP/JSON export request per line, for offline inspection"""
+    
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+    
+    def export(self, spans: List[Span]):
+        with self.path.open("a", encoding="utf-8") as f:
+            f.write(json.dumps(encode_otlp(spans), separators=(",", ":")) + "\n")
+    
+    def close(self):
+        pass
+
+
+class OtlpHttpSpanExporter:
+    """Posts OTLP/JSON to an OTLP/HTTP traces endpoint such as Langfuse's /api/public/otel"""
+    
+    def __init__(self, endpoint: str, headers: Dict[str, str]):
+        import httpx
+        self.url = endpoint.rstrip("/") + "/v1/traces"
+        self.client = httpx.Client(headers=headers, timeout=app_settings.tracing_export_timeout_seconds)
+    
+    def export(self, spans: List[Span]):
+        response = self.client.post(self.url, json=encode_otlp(spans))
+        response.raise_for_status()
+    
+    def close(self):
+        self.client.close()
+
+
+def _otlp_headers() -> Dict[str, str]:
+    """Headers from BEEAI_TRACING_OTLP_HEADERS ("k=v,k=v"), plus Langfuse basic auth when keys are set"""
+    headers = {}
+    for pair in app_settings.tracing_otlp_headers.split(","):
+        if "=" in pair:
+            key, value = pair.split("=", 1)
+            headers[key.strip()] = value.strip()
+    if app_settings.langfuse_public_key and app_settings.langfuse_secret_key:
+        credentials = f"{app_settings.langfuse_public_key}:{app_settings.langfuse_secret_key}"
+        headers["Authorization"] = "Basic " + base64.b64encode(credentials.encode()).decode()
+    return headers
+
+
+def create_exporter():
+    if app_settings.tracing_exporter == "otlp":
+        return OtlpHttpSpanExporter(app_settings.tracing_otlp_endpoint, _otlp_headers())
+    return FileSpanExporter(app_settings.tracing_file_path)
+
+
+_STOP = object()
+
+
+class BatchSpanProcessor:
+    """Bounded queue of finished traces drained by a background exporter thread
+    
+    Spans are exported once `batch_size` have accumulated or every
+    `flush_interval` seconds. When the collector is slow the queue fills up
+    and further traces are dropped and counted instead of blocking callers.
+    """
+    
+    def __init__(self, exporter, queue_size: int, batch_size: int, flush_interval: float):
+        self.exporter = exporter
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+        self._thread.start()
+    
+    def submit(self, spans: List[Span]) -> bool:
+        try:
+            self._queue.put_nowait(spans)
+            return True
+        except queue.Full:
+            return False
+    
+    def _run(self):
+        batch: List[Span] = []
+        flush_at = time.monotonic() + self.flush_interval
+        while True:
+            try:
+                item = self._queue.get(timeout=max(flush_at - time.monotonic(), 0))
+            except queue.Empty:
+                item = None
+            if item is _STOP:
+                self._export(batch)
+                return
+            if item:
+                batch.extend(item)
+            if len(batch) >= self.batch_size or time.monotonic() >= flush_at:
+                self._export(batch)
+                batch = []
+                flush_at = time.monotonic() + self.flush_interval
+    
+    def _export(self, batch: List[Span]):
+        if not batch:
+            return
+        try:
+            self.exporter.export(batch)
+            metrics.TRACE_SPANS.labels("exported").inc(len(batch))
+        except Exception:
+            metrics.TRACE_SPANS.labels("export_failed").inc(len(batch))
+            logger.warning("Trace export failed", extra={"spans": len(batch)}, exc_info=True)
+    
+    def shutdown(self, timeout: float = 5.0):
+        """Flush what is queued, waiting at most `timeout` seconds"""
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            pass
+        self._thread.join(timeout)
+        self.exporter.close()
+
+
+class Tracer:
+    """Records spans and decides per trace whether to export it
+    
+    Head sampling keeps a random `sample_rate` share of traces. Tail
+    sampling looks at the finished trace and also keeps every trace that
+    failed or took longer than `slow_seconds`. Every trace is recorded in
+    memory, so the tail decision sees all of its spans; dropped traces are
+    simply garbage.
+    """
+    
+    def __init__(self):
+        self.enabled = app_settings.tracing_enabled
+        self.sample_rate = app_settings.tracing_sample_rate
+        self.slow_ns = int(app_settings.tracing_slow_threshold_seconds * 1e9)
+        self.max_spans = app_settings.tracing_max_spans_per_trace
+        self._processor: Optional[BatchSpanProcessor] = None
+        self._lock = threading.Lock()
+    
+    def current_span(self) -> Optional[Span]:
+        return _current_span.get()
+    
+    def start_span(
+        self,
+        name: str,
+        kind: int = INTERNAL,
+        parent: Optional[Span] = None,
+        attributes: Optional[Dict[str, Any]] = None
+    ) -> Optional[Span]:
+        """Start a child span of `parent` (default: the current span); None outside a trace"""
+        parent = parent or _current_span.get()
+        if parent is None:
+            return None
+        trace = parent.trace
+        if len(trace.spans) >= self.max_spans:
+            trace.dropped_spans += 1
+            return None
+        span = Span(trace, name, kind, parent.span_id, attributes)
+        trace.spans.append(span)
+        return span
+    
+    @contextmanager
+    def trace(self, name: str, kind: int = SERVER, attributes: Optional[Dict[str, Any]] = None) -> Iterator[Optional[Span]]:
+        """Run the block as the root span of a new trace"""
+        if not self.enabled:
+            yield None
+            return
+        
+        trace = Trace(head_sampled=random.random() < self.sample_rate)
+        root = Span(trace, name, kind, None, attributes)
+        trace.spans.append(root)
+        token = _current_span.set(root)
+        try:
+            yield root
+        except BaseException as e:
+            root.record_error(f"{type(e).__name__}: {e}")
+            raise
+        finally:
+            _current_span.reset(token)
+            root.end()
+            self._finish(trace, root)
+    
+    def record_error(self, message: str):
+        """Mark the current trace as failed, for errors reported to the client as content"""
+        span = _current_span.get()
+        if span is not None:
+            span.record_error(message)
+    
+    def _finish(self, trace: Trace, root: Span):
+        if trace.error:
+            decision = "error"
+        elif root.end_ns - root.start_ns >= self.slow_ns:
+            decision = "slow"
+        elif trace.head_sampled:
+            decision = "head"
+        else:
+            metrics.TRACES.labels("dropped").inc()
+            return
+        
+        metrics.TRACES.labels(decision).inc()
+        if trace.dropped_spans:
+            root.set("beeai.dropped_spans", trace.dropped_spans)
+            metrics.TRACE_SPANS.labels("span_limit").inc(trace.dropped_spans)
+        root.set("beeai.sampling", decision)
+        if not self._get_processor().submit(trace.spans):
+            metrics.TRACE_SPANS.labels("queue_full").inc(len(trace.spans))
+    
+    def _get_processor(self) -> BatchSpanProcessor:
+        # Started on first use so each forked worker gets its own thread
+        if self._processor is None:
+            with self._lock:
+                if self._processor is None:
+                    self._processor = BatchSpanProcessor(
+                        create_exporter(),
+                        queue_size=app_settings.tracing_queue_size,
+                        batch_size=app_settings.tracing_batch_size,
+                        flush_interval=app_settings.tracing_flush_interval_seconds
+                    )
+                    atexit.register(self.shutdown)
+        return self._processor
+    
+    def shutdown(self):
+        processor, self._processor = self._processor, None
+        if processor is not None:
+            processor.shutdown()
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "exporter": app_settings.tracing_exporter if self.enabled else None,
+            "queued": self._processor._queue.qsize() if self._processor else 0
+        }
+
+
+tracer = Tracer()
+
+
+class RunTracer:
+    """Emitter observer that records a span per LLM and tool call of a run
+    
+    Spans are parented to the span that was current when the observer was
+    built (the request or job), or to the span of the enclosing LLM or tool
+    call when the framework reports one. Token usage comes from the LLM
+    success event.
+    """
+    
+    def __init__(self):
+        self.parent = tracer.current_span()
+        self._spans: Dict[str, Span] = {}
+    
+    @staticmethod
+    def matches(event: EventMeta) -> bool:
+        return isinstance(event.creator, (ChatModel, Tool)) and event.name in ("start", "success", "error", "finish")
+    
+    async def on_event(self, data: Any, event: EventMeta):
+        key = event.trace.run_id if event.trace else id(event.creator)
+        creator = event.creator
+        
+        if event.name == "start":
+            parent_run_id = getattr(event.trace, "parent_run_id", None)
+            parent = self._spans.get(parent_run_id) or self.parent
+            if isinstance(creator, Tool):
+                span = tracer.start_span(
+                    f"execute_tool {creator.name}",
+                    INTERNAL,
+                    parent,
+                    {"gen_ai.operation.name": "execute_tool", "gen_ai.tool.name": creator.name}
+                )
+            else:
+                span = tracer.start_span(
+                    f"chat {creator.model_id}",
+                    CLIENT,
+                    parent,
+                    {
+                        "gen_ai.operation.name": "chat",
+                        "gen_ai.system": creator.provider_id,
+                        "gen_ai.request.model": creator.model_id
+                    }
+                )
+            if span is not None:
+                self._spans[key] = span
+            return
+        
+        span = self._spans.get(key)
+        if span is None:
+            return
+        if event.name == "finish":
+            span.end()
+            del self._spans[key]
+        elif event.name == "error":
+            span.record_error(str(getattr(data, "error", data)))
+        elif isinstance(creator, ChatModel):
+            usage = getattr(data.value, "usage", None)
+            if usage:
+                span.set("gen_ai.usage.input_tokens", usage.prompt_tokens)
+                span.set("gen_ai.usage.output_tokens", usage.completion_tokens)
+            span.set("gen_ai.response.finish_reasons", getattr(data.value, "finish_reason", None))
+    
+    def observe(self, run: Run) -> Run:
+        if self.parent is None:
+            return run
+        return run.on(self.matches, self.on_event, EmitterOptions(match_nested=True))
+
+
+class TracingMiddleware:
+    """ASGI middleware wrapping every API request in a trace
+    
+    The trace stays open until the last body chunk is sent, so streamed
+    responses are timed in full.
+    """
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not tracer.enabled or scope["path"] in UNTRACED_PATHS:
+            await self.app(scope, receive, send)
+            return
+        
+        attributes = {"http.request.method": scope["method"], "url.path": scope["path"]}
+        with tracer.trace(f"{scope['method']} {scope['path']}", SERVER, attributes) as root:
+            async def traced_send(message):
+                if message["type"] == "http.response.start":
+                    status = message["status"]
+                    root.set("http.response.status_code", status)
+                    if status >= 500:
+                        root.record_error(f"HTTP {status}")
+                await send(message)
+            
+            await self.app(scope, receive, traced_send)
+            route = scope.get("route")
+            if route is not None:
+                root.name = f"{scope['method']} {route.path}"
+                root.set("http.route", route.path)
@@ -0,0 +1,128 @@
+"""
+Background warm-up for fast cold starts
+The server binds its port first; the model client is built and primed afterwards
+"""
+import asyncio
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+from beeai_framework.backend import UserMessage
+
+import beeai_service
+from beeai_service.config.settings import app_settings
+from beeai_service.core.agent import MaintenanceAgentFactory, create_agent_factory
+from beeai_service.core.fleet_data import fleet_store
+from beeai_service.core.log import get_logger
+from beeai_service.core.watsonx import watsonx_backend
+
+
+logger = get_logger(__name__)
+
+
+class StartupReport:
+    """Seconds spent in each startup phase, measured from package import"""
+    
+    def __init__(self):
+        self.phases: Dict[str, float] = {}
+        self.ready_after: Optional[float] = None
+        self.error: Optional[str] = None
+    
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.phases[name] = round(time.monotonic() - started, 3)
+    
+    def mark_ready(self):
+        self.ready_after = round(time.monotonic() - beeai_service.STARTED_AT, 3)
+        self.error = None
+    
+    def as_dict(self) -> dict:
+        return {"phases": self.phases, "ready_after_seconds": self.ready_after, "last_error": self.error}
+
+
+class WarmUp:
+    """Loads the fleet snapshot and builds the agent factory off the event loop,
+    authenticates with watsonx, then opens the first LLM connection with a
+    one-token call
+    
+    Requests can use the factory as soon as it exists; the service only
+    reports ready once the LLM round-trip has succeeded. Priming is retried
+    with capped backoff, so a watsonx outage at boot delays readiness instead
+    of leaving the instance permanently unready.
+    """
+    
+    def __init__(self, agent_factory: Optional[MaintenanceAgentFactory] = None):
+        self.agent_factory = agent_factory
+        self.ready = False
+        self.report = StartupReport()
+        self.report.phases["imports"] = round(time.monotonic() - beeai_service.STARTED_AT, 3)
+        self._factory_ready = asyncio.Event()
+    
+    async def run(self):
+        if fleet_store.configured:
+            with self.report.phase("fleet_data"):
+                await self._load_fleet_data()
+        
+        if self.agent_factory is None:
+            with self.report.phase("agent_factory"):
+                self.agent_factory = await asyncio.to_thread(create_agent_factory)
+        self._factory_ready.set()
+        
+        with self.report.phase("watsonx_auth"):
+            await self._start_backend()
+        
+        if app_settings.warmup_llm_call:
+            await self._prime_llm()
+        
+        self.ready = True
+        self.report.mark_ready()
+        logger.info("Service ready", extra={"startup": self.report.as_dict()})
+    
+    async def _load_fleet_data(self):
+        try:
+            await fleet_store.start()
+        except Exception as e:
+            # Tools raise until the poller picks up a readable snapshot
+            self.report.error = f"{type(e).__name__}: {e}"
+            logger.exception("Fleet data load failed")
+    
+    async def _start_backend(self):
+        delay = 1.0
+        while True:
+            try:
+                await watsonx_backend.start()
+                return
+            except Exception as e:
+                await watsonx_backend.close()
+                self.report.error = f"{type(e).__name__}: {e}"
+                logger.warning("watsonx authentication failed, retrying", extra={"retry_in": delay, "error": self.report.error})
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30.0)
+    
+    async def _prime_llm(self):
+        delay = 1.0
+        with self.report.phase("llm_warmup"):
+            while True:
+                try:
+                    await asyncio.wait_for(
+                        self.agent_factory.llm.run([UserMessage("ping")], max_tokens=1),
+                        timeout=app_settings.warmup_timeout_seconds
+                    )
+                    return
+                except Exception as e:
+                    self.report.error = f"{type(e).__name__}: {e}"
+                    logger.warning("LLM warm-up failed, retrying", extra={"retry_in": delay, "error": self.report.error})
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, 30.0)
+    
+    async def get_factory(self, timeout: float) -> Optional[MaintenanceAgentFactory]:
+        """Wait up to `timeout` seconds for the agent factory; None if it is not built yet"""
+        try:
+            await asyncio.wait_for(self._factory_ready.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return None
+        return self.agent_factory
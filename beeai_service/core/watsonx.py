@@ -0,0 +1,203 @@
+"""
+Managed watsonx.ai backend layer
+One shared keep-alive HTTP/2 connection pool per process and an IAM token
+that is refreshed in the background before it expires
+"""
+import asyncio
+import time
+from typing import Any, AsyncIterator, Dict, Optional
+
+import httpx
+
+from beeai_service.config.settings import app_settings, watsonx_settings
+from beeai_service.core import metrics
+from beeai_service.core.log import get_logger
+
+
+logger = get_logger(__name__)
+
+IAM_GRANT_TYPE = "urn:ibm:params:oauth:grant-type:apikey"
+
+# LiteLLM exchanges the API key itself (a blocking call) unless it is given a
+# token; the pooled client's auth replaces this one on every request
+MANAGED_TOKEN = "managed-by-watsonx-backend"
+
+
+class PoolStatsTransport(httpx.AsyncHTTPTransport):
+    """HTTP transport that counts requests and newly opened connections"""
+    
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.requests = 0
+        self.connections_opened = 0
+        self._known: set = set()
+    
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        response = await super().handle_async_request(request)
+        self.requests += 1
+        metrics.WATSONX_HTTP_REQUESTS.inc()
+        current = {id(connection) for connection in self._pool.connections}
+        opened = len(current - self._known)
+        if opened:
+            self.connections_opened += opened
+            metrics.WATSONX_CONNECTIONS_OPENED.inc(opened)
+        self._known = current
+        return response
+
+
+class IAMToken:
+    """Cached IBM Cloud IAM access token"""
+    
+    def __init__(self, access_token: str, expires_at: float):
+        self.access_token = access_token
+        self.expires_at = expires_at
+    
+    @property
+    def ttl(self) -> float:
+        return self.expires_at - time.time()
+
+
+class IAMTokenAuth(httpx.Auth):
+    """Sends the backend's current IAM token with every request of the pooled client"""
+    
+    def __init__(self, backend: "WatsonxBackend"):
+        self.backend = backend
+    
+    async def async_auth_flow(self, request: httpx.Request) -> AsyncIterator[httpx.Request]:
+        request.headers["Authorization"] = f"Bearer {await self.backend.access_token()}"
+        yield request
+
+
+class WatsonxBackend:
+    """Owns the process-wide watsonx HTTP client and IAM token lifecycle
+    
+    Watsonx chat models get the pooled client and a token through their
+    provider settings (see `chat_model_settings`), so every LLM call reuses
+    the pool and none of them exchanges the API key itself. The client's
+    auth attaches the current IAM token to each request, and a background
+    task refreshes the token `token_refresh_margin` seconds before it
+    expires.
+    """
+    
+    def __init__(self):
+        self.client: Optional[httpx.AsyncClient] = None
+        self.token: Optional[IAMToken] = None
+        self.token_refreshes = 0
+        self._transport: Optional[PoolStatsTransport] = None
+        self._http_handler = None
+        self._token_lock = asyncio.Lock()
+        self._refresher: Optional[asyncio.Task] = None
+    
+    @property
+    def enabled(self) -> bool:
+        return app_settings.llm_model.startswith("watsonx:") and bool(watsonx_settings.api_key)
+    
+    def chat_model_settings(self) -> Dict[str, Any]:
+        """Provider settings that route a watsonx ChatModel through the pooled client
+        
+        Models keep the same LiteLLM handler for the life of the process; a
+        reopened pool is swapped in underneath it.
+        """
+        if not self.enabled:
+            return {}
+        if self._http_handler is None:
+            from litellm.llms.custom_httpx.http_handler import AsyncHTTPHandler
+            self._http_handler = AsyncHTTPHandler()
+        self._open_client()
+        return {"client": self._http_handler, "token": MANAGED_TOKEN}
+    
+    async def start(self):
+        """Open the connection pool, fetch the first token and start the refresher"""
+        if not self.enabled or self._refresher is not None:
+            return
+        
+        self._open_client()
+        await self._refresh_token()
+        self._refresher = asyncio.create_task(self._refresh_loop())
+        logger.info(
+            "watsonx backend started",
+            extra={"pool_size": watsonx_settings.pool_size, "http2": watsonx_settings.http2}
+        )
+    
+    def _open_client(self):
+        if self.client is not None:
+            return
+        
+        self._transport = PoolStatsTransport(
+            http2=watsonx_settings.http2,
+            limits=httpx.Limits(
+                max_connections=watsonx_settings.pool_size,
+                max_keepalive_connections=watsonx_settings.pool_size,
+                keepalive_expiry=watsonx_settings.keepalive_expiry_seconds
+            )
+        )
+        self.client = httpx.AsyncClient(
+            transport=self._transport,
+            auth=IAMTokenAuth(self),
+            timeout=httpx.Timeout(
+                watsonx_settings.read_timeout_seconds,
+                connect=watsonx_settings.connect_timeout_seconds
+            )
+        )
+        if self._http_handler is not None:
+            self._http_handler.client = self.client
+    
+    async def access_token(self) -> str:
+        """Current IAM access token, fetched first when there is none yet"""
+        if self.token is None:
+            async with self._token_lock:
+                if self.token is None:
+                    await self._refresh_token()
+        return self.token.access_token
+    
+    async def _refresh_token(self):
+        response = await self.client.post(
+            watsonx_settings.iam_url,
+            data={"grant_type": IAM_GRANT_TYPE, "apikey": watsonx_settings.api_key},
+            headers={"Accept": "application/json"},
+            auth=None
+        )
+        response.raise_for_status()
+        body = response.json()
+        expires_at = body.get("expiration") or time.time() + body.get("expires_in", 3600)
+        self.token = IAMToken(body["access_token"], float(expires_at))
+        self.token_refreshes += 1
+        metrics.WATSONX_TOKEN_REFRESHES.inc()
+    
+    async def _refresh_loop(self):
+        while True:
+            delay = max(self.token.ttl - watsonx_settings.token_refresh_margin_seconds, 5.0)
+            await asyncio.sleep(delay)
+            try:
+                await self._refresh_token()
+                logger.info("IAM token refreshed", extra={"expires_in": round(self.token.ttl)})
+            except Exception:
+                # The current token is still valid for the refresh margin; try again shortly
+                logger.warning("IAM token refresh failed", exc_info=True)
+                await asyncio.sleep(min(30.0, max(self.token.ttl / 4, 1.0)))
+    
+    def stats(self) -> Dict[str, Any]:
+        """Connection reuse and token statistics"""
+        requests = self._transport.requests if self._transport else 0
+        opened = self._transport.connections_opened if self._transport else 0
+        return {
+            "enabled": self.enabled,
+            "requests": requests,
+            "connections_opened": opened,
+            "connection_reuse_ratio": round(1 - opened / requests, 3) if requests else None,
+            "token_refreshes": self.token_refreshes,
+            "token_expires_in": round(self.token.ttl) if self.token else None
+        }
+    
+    async def close(self):
+        if self._refresher:
+            self._refresher.cancel()
+            self._refresher = None
+        if self.client:
+            await self.client.aclose()
+            self.client = None
+        self.token = None
+
+
+# Process-wide backend; every worker process starts its own
+watsonx_backend = WatsonxBackend()
@@ -2,15 +2,54 @@
 WXO-compatible HTTP server
 Converts WXO /chat/completions format to BeeAI agent calls
 """
+import os
 import time
 import json
+import math
 import asyncio
-from typing import List, Optional
-from fastapi import FastAPI, HTTPException, Header
-from fastapi.responses import StreamingResponse
+import tempfile
+import weakref
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, List, Literal, Optional
+from fastapi import FastAPI, HTTPException, Header, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel
-from beeai_framework.agents.requirement import RequirementAgent
+from beeai_framework.backend import AnyMessage, AssistantMessage, UserMessage
+from beeai_framework.context import Run
+from beeai_framework.emitter import EmitterOptions, EventMeta
+from beeai_framework.tools import Tool
 from beeai_service.config.settings import app_settings
+from beeai_service.core.agent import MaintenanceAgentFactory
+from beeai_service.core import metrics
+from beeai_service.core.cache import tool_cache_stats
+from beeai_service.core.log import get_logger, new_request_id, setup_logging
+from beeai_service.core.fleet import analyze_fleet
+from beeai_service.core.fleet_data import fleet_store
+from beeai_service.core.jobs import Job, JobManager, JobQueueFull
+from beeai_service.core.planner import (
+    DEFAULT_DRIVER_ID,
+    RunObserver,
+    is_maintenance_request,
+    run_planned_maintenance,
+)
+from beeai_service.core.response_cache import ResponseCache
+from beeai_service.core.sessions import SessionStore
+from beeai_service.core.slots import assign_appointments
+from beeai_service.core.tracing import RunTracer, TracingMiddleware, tracer
+from beeai_service.core.warmup import WarmUp
+from beeai_service.core.watsonx import watsonx_backend
+
+
+logger = get_logger(__name__)
+
+# Start of the content chunk that replaces the answer when a run fails
+ERROR_PREFIX = "⚠️ BeeAI Error:"
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "Connection": "keep-alive",
+    "X-Accel-Buffering": "no"
+}
 
 
 class Message(BaseModel):
@@ -24,26 +63,225 @@ class ChatCompletionRequest(BaseModel):
     stream: Optional[bool] = False
 
 
+class FleetAnalyzeRequest(BaseModel):
+    vehicle_ids: List[str]
+    driver_id: Optional[str] = None
+    drivers: Dict[str, str] = {}
+    concurrency: Optional[int] = None
+    summarize: bool = True
+
+
+class FleetAppointmentsRequest(BaseModel):
+    vehicle_ids: List[str]
+    driver_id: Optional[str] = None
+    drivers: Dict[str, str] = {}
+    component: Optional[str] = None
+
+
+class JobRequest(BaseModel):
+    kind: Literal["chat", "fleet"] = "chat"
+    prompt: Optional[str] = None
+    vehicle_ids: List[str] = []
+    driver_id: Optional[str] = None
+    drivers: Dict[str, str] = {}
+    concurrency: Optional[int] = None
+    summarize: bool = True
+    priority: Literal["high", "normal", "low"] = "normal"
+
+
+class ClientDisconnected(Exception):
+    """The client went away before the response was ready"""
+
+
+class DeadlineExceeded(Exception):
+    """The request ran past its deadline"""
+    
+    def __init__(self, timeout: float):
+        super().__init__(f"Request deadline of {timeout:g}s exceeded")
+        self.timeout = timeout
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request cannot be admitted; maps to HTTP 429"""
+    
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """Token-bucket rate limiter refilled continuously at `rate` tokens per second"""
+    
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+    
+    def try_acquire(self) -> float:
+        """Take one token; return 0 on success or the seconds until one is available"""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class Admission:
+    """A granted in-flight slot; release() is idempotent"""
+    
+    def __init__(self, controller: "AdmissionController"):
+        self._controller = controller
+        self._released = False
+        self._started = time.monotonic()
+    
+    def release(self):
+        if not self._released:
+            self._released = True
+            self._controller._release(time.monotonic() - self._started)
+
+
+class AdmissionController:
+    """Bounds in-flight requests, queues a limited number of waiters and rate-limits per API key
+    
+    Requests beyond the in-flight limit wait in a bounded queue for at most
+    `queue_timeout` seconds. Anything that cannot be served in time is
+    rejected up front with a Retry-After hint instead of piling onto watsonx.
+    """
+    
+    def __init__(
+        self,
+        max_in_flight: int,
+        queue_size: int,
+        queue_timeout: float,
+        rate_per_second: float,
+        burst: int
+    ):
+        self.max_in_flight = max_in_flight
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.rate_per_second = rate_per_second
+        self.burst = burst
+        self.in_flight = 0
+        self.queued = 0
+        self.rejected = 0
+        self._semaphore = asyncio.Semaphore(max_in_flight)
+        self._buckets: Dict[str, TokenBucket] = {}
+        # Moving average of how long a request holds its slot, for Retry-After
+        self._avg_hold = 1.0
+    
+    def _retry_after(self) -> float:
+        return max(1.0, self._avg_hold * (self.queued + 1) / self.max_in_flight)
+    
+    async def admit(self, api_key: str) -> Admission:
+        if self.rate_per_second > 0:
+            bucket = self._buckets.get(api_key)
+            if bucket is None:
+                bucket = self._buckets[api_key] = TokenBucket(self.rate_per_second, self.burst)
+            wait = bucket.try_acquire()
+            if wait:
+                self.rejected += 1
+                raise AdmissionRejected("Rate limit exceeded", wait)
+        
+        if self._semaphore.locked():
+            if self.queued >= self.queue_size:
+                self.rejected += 1
+                raise AdmissionRejected("Server busy, queue is full", self._retry_after())
+            self.queued += 1
+            metrics.QUEUE_DEPTH.inc()
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), timeout=self.queue_timeout)
+            except asyncio.TimeoutError:
+                self.rejected += 1
+                raise AdmissionRejected("Server busy, timed out waiting in queue", self._retry_after())
+            finally:
+                self.queued -= 1
+                metrics.QUEUE_DEPTH.dec()
+        else:
+            await self._semaphore.acquire()
+        
+        self.in_flight += 1
+        metrics.REQUESTS_IN_FLIGHT.inc()
+        return Admission(self)
+    
+    def _release(self, held: float):
+        self.in_flight -= 1
+        metrics.REQUESTS_IN_FLIGHT.dec()
+        self._avg_hold = 0.9 * self._avg_hold + 0.1 * held
+        self._semaphore.release()
+
+
 class WXOServer:
     
-    def __init__(self, agent: RequirementAgent):
-        self.agent = agent
+    def __init__(self, agent_factory: Optional[MaintenanceAgentFactory] = None):
+        # Without a factory, one is built in the background after startup
+        self.warmup = WarmUp(agent_factory)
+        self.sessions = SessionStore(lambda: self.agent_factory.create_memory())
+        self.response_cache = ResponseCache(
+            ttl=app_settings.response_cache_ttl_seconds,
+            max_size=app_settings.response_cache_max_size,
+            disk_path=app_settings.response_cache_disk_path,
+            disk_max_entries=app_settings.response_cache_disk_max_entries
+        ) if app_settings.response_cache_enabled else None
+        self.jobs = JobManager(self._run_job)
+        self.admission = AdmissionController(
+            max_in_flight=app_settings.admission_max_in_flight,
+            queue_size=app_settings.admission_queue_size,
+            queue_timeout=app_settings.admission_queue_timeout_seconds,
+            rate_per_second=app_settings.rate_limit_per_second,
+            burst=app_settings.rate_limit_burst
+        )
         self.app = FastAPI(
             title="BeeAI Predictive Maintenance Service",
             description="AI-powered vehicle maintenance analysis with IBM watsonx.ai",
-            version="1.0.0"
+            version="1.0.0",
+            lifespan=self._lifespan
         )
+        if app_settings.tracing_enabled:
+            self.app.add_middleware(TracingMiddleware)
         self._setup_routes()
     
+    @property
+    def agent_factory(self) -> MaintenanceAgentFactory:
+        return self.warmup.agent_factory
+    
+    @asynccontextmanager
+    async def _lifespan(self, app: FastAPI):
+        """Warm up in the background once the port is bound, report drained state on shutdown"""
+        logger.info("Worker started", extra={"pid": os.getpid()})
+        warmup_task = asyncio.create_task(self.warmup.run())
+        self.jobs.start()
+        yield
+        warmup_task.cancel()
+        await self.jobs.close()
+        await asyncio.to_thread(tracer.shutdown)
+        await watsonx_backend.close()
+        fleet_store.close()
+        # uvicorn has already waited up to the graceful-shutdown timeout for open streams
+        logger.info(
+            "Worker stopped",
+            extra={"pid": os.getpid(), "in_flight": self.admission.in_flight, "queued": self.admission.queued}
+        )
+    
     def _setup_routes(self):
         """Setup FastAPI routes"""
         
         @self.app.post("/chat/completions")
         async def chat_completions(
             request: ChatCompletionRequest,
-            x_api_key: Optional[str] = Header(None)
+            http_request: Request,
+            x_api_key: Optional[str] = Header(None),
+            x_conversation_id: Optional[str] = Header(None),
+            x_ibm_thread_id: Optional[str] = Header(None),
+            x_request_timeout: Optional[float] = Header(None)
         ):
             """WXO-compatible chat completions endpoint"""
+            started = time.perf_counter()
+            timeout = self._request_timeout(x_request_timeout)
+            deadline_at = started + timeout
             
             # Verify API key
             if x_api_key != app_settings.api_key:
@@ -55,53 +293,248 @@ class WXOServer:
                 raise HTTPException(status_code=400, detail="No user message found")
             
             prompt = user_messages[-1].content
-            
-            print(f"\n{'='*60}")
-            print(f"📨 Received: {prompt}")
-            print(f"{'='*60}")
+            conversation_id = x_conversation_id or x_ibm_thread_id
+            history = self._history_messages(request.messages)
             
             # Generate IDs
-            timestamp = int(time.time())
-            request_id = f"chatcmpl-beeai-{timestamp}"
+            request_id = new_request_id()
             model_name = app_settings.llm_model.replace("watsonx:", "")
             
+            cache_key = self._response_cache_key(prompt, conversation_id, history)
+            if cache_key:
+                cached = await self.response_cache.get(cache_key)
+                if cached is not None:
+                    return await self._cached_response(cached, prompt, conversation_id, request_id, model_name, started)
+            
+            await self._require_agent_factory()
+            admission = await self._admit(x_api_key)
+            
+            logger.info(
+                "Request received",
+                extra={"prompt_chars": len(prompt), "conversation_id": conversation_id, "stream": request.stream}
+            )
+            logger.debug("Prompt", extra={"prompt": prompt})
+            
+            if request.stream and app_settings.stream_tokens:
+                logger.info("Running agent (streaming)")
+                return StreamingResponse(
+                    self._hold_admission(
+                        self._stream_agent_response(
+                            prompt, conversation_id, history, request_id, model_name, started, deadline_at, timeout,
+                            cache_key
+                        ),
+                        admission,
+                        "chat_completions",
+                        started
+                    ),
+                    media_type="text/event-stream",
+                    headers=SSE_HEADERS
+                )
+            
             try:
                 # Run agent
-                print("🤖 Running agent...\n")
-                response = await self.agent.run(prompt)
-                response_text = response.last_message.text
+                logger.info("Running agent")
+                response_text = await self._await_request(
+                    self._run_agent(prompt, conversation_id, history),
+                    http_request,
+                    deadline_at,
+                    timeout
+                )
+                if cache_key:
+                    await self.response_cache.set(cache_key, response_text)
                 
-                print(f"\n{'='*60}")
-                print(f"✅ Response: {len(response_text)} characters")
-                print(f"{'='*60}\n")
+                elapsed = time.perf_counter() - started
+                logger.info(
+                    "Response ready",
+                    extra={"response_chars": len(response_text), "elapsed_ms": round(elapsed * 1000, 1)}
+                )
+                metrics.TIME_TO_FIRST_BYTE.labels("chat_completions").observe(elapsed)
+                metrics.REQUEST_LATENCY.labels("chat_completions").observe(elapsed)
                 
                 # Return SSE streaming response
                 return StreamingResponse(
                     self._generate_sse_response(response_text, request_id, model_name),
                     media_type="text/event-stream",
-                    headers={
-                        "Cache-Control": "no-cache",
-                        "Connection": "keep-alive",
-                        "X-Accel-Buffering": "no"
-                    }
+                    headers=SSE_HEADERS
                 )
                 
+            except ClientDisconnected:
+                return Response(status_code=499)
+            
+            except DeadlineExceeded as e:
+                tracer.record_error(str(e))
+                return StreamingResponse(
+                    self._generate_error_sse_response(str(e), request_id, model_name),
+                    media_type="text/event-stream",
+                    headers=SSE_HEADERS
+                )
+            
             except Exception as e:
-                print(f"\n{'='*60}")
-                print(f"❌ ERROR: {str(e)}")
-                print(f"{'='*60}\n")
-                import traceback
-                traceback.print_exc()
+                metrics.ERRORS.labels(type(e).__name__).inc()
+                logger.exception("Agent run failed")
+                tracer.record_error(f"{type(e).__name__}: {e}")
                 
                 return StreamingResponse(
                     self._generate_error_sse_response(str(e), request_id, model_name),
                     media_type="text/event-stream",
-                    headers={
-                        "Cache-Control": "no-cache",
-                        "Connection": "keep-alive",
-                        "X-Accel-Buffering": "no"
-                    }
+                    headers=SSE_HEADERS
                 )
+            finally:
+                admission.release()
+        
+        @self.app.post("/v1/fleet/analyze")
+        async def fleet_analyze(
+            request: FleetAnalyzeRequest,
+            x_api_key: Optional[str] = Header(None)
+        ):
+            """Analyze many vehicles in one request, streaming NDJSON results as they complete"""
+            started = time.perf_counter()
+            
+            if x_api_key != app_settings.api_key:
+                raise HTTPException(status_code=401, detail="Invalid API key")
+            
+            vehicle_ids = list(dict.fromkeys(request.vehicle_ids))
+            if not vehicle_ids:
+                raise HTTPException(status_code=400, detail="No vehicle ids given")
+            if len(vehicle_ids) > app_settings.fleet_max_vehicles:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"At most {app_settings.fleet_max_vehicles} vehicles per request"
+                )
+            
+            concurrency = min(
+                request.concurrency or app_settings.fleet_max_concurrency,
+                app_settings.fleet_max_concurrency
+            )
+            await self._require_agent_factory()
+            admission = await self._admit(x_api_key)
+            logger.info("Fleet analysis started", extra={"vehicles": len(vehicle_ids), "concurrency": concurrency})
+            
+            return StreamingResponse(
+                self._hold_admission(
+                    self._generate_fleet_ndjson(vehicle_ids, concurrency, request),
+                    admission,
+                    "fleet_analyze",
+                    started
+                ),
+                media_type="application/x-ndjson",
+                headers=SSE_HEADERS
+            )
+        
+        @self.app.post("/v1/fleet/appointments")
+        async def fleet_appointments(
+            request: FleetAppointmentsRequest,
+            x_api_key: Optional[str] = Header(None)
+        ):
+            """Assign the earliest feasible dealership slot to many vehicles without double-booking"""
+            if x_api_key != app_settings.api_key:
+                raise HTTPException(status_code=401, detail="Invalid API key")
+            
+            vehicle_ids = list(dict.fromkeys(request.vehicle_ids))
+            if not vehicle_ids:
+                raise HTTPException(status_code=400, detail="No vehicle ids given")
+            if len(vehicle_ids) > app_settings.fleet_max_vehicles:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"At most {app_settings.fleet_max_vehicles} vehicles per request"
+                )
+            
+            default_driver = request.driver_id or DEFAULT_DRIVER_ID
+            drivers = {vehicle_id: request.drivers.get(vehicle_id, default_driver) for vehicle_id in vehicle_ids}
+            started = time.perf_counter()
+            appointments = await asyncio.to_thread(assign_appointments, vehicle_ids, drivers, request.component)
+            return {
+                "appointments": list(appointments.values()),
+                "unassigned": [vehicle_id for vehicle_id, result in appointments.items() if result["appointment"] is None],
+                "elapsed_ms": round((time.perf_counter() - started) * 1000, 1)
+            }
+        
+        @self.app.post("/v1/fleet/data/reload")
+        async def fleet_data_reload(force: bool = False, x_api_key: Optional[str] = Header(None)):
+            """Reload changed fleet snapshot files in this worker without a restart
+            
+            `force` rebuilds every table. Other workers pick up the new files
+            on their next poll.
+            """
+            if x_api_key != app_settings.api_key:
+                raise HTTPException(status_code=401, detail="Invalid API key")
+            if not fleet_store.configured:
+                raise HTTPException(status_code=409, detail="No fleet data path configured")
+            
+            try:
+                changed = await asyncio.to_thread(fleet_store.reload, force)
+            except Exception as e:
+                logger.exception("Fleet data reload failed")
+                raise HTTPException(status_code=500, detail=f"Fleet data reload failed: {e}")
+            return {"reloaded": changed, **fleet_store.stats()}
+        
+        @self.app.post("/v1/jobs")
+        async def submit_job(request: JobRequest, x_api_key: Optional[str] = Header(None)):
+            """Queue an agent or fleet analysis and return its id right away"""
+            if x_api_key != app_settings.api_key:
+                raise HTTPException(status_code=401, detail="Invalid API key")
+            
+            if request.kind == "chat":
+                if not request.prompt:
+                    raise HTTPException(status_code=400, detail="A chat job needs a prompt")
+                payload: Dict[str, Any] = {"prompt": request.prompt}
+            else:
+                vehicle_ids = list(dict.fromkeys(request.vehicle_ids))
+                if not vehicle_ids:
+                    raise HTTPException(status_code=400, detail="No vehicle ids given")
+                if len(vehicle_ids) > app_settings.fleet_max_vehicles:
+                    raise HTTPException(
+                        status_code=400,
+                        detail=f"At most {app_settings.fleet_max_vehicles} vehicles per request"
+                    )
+                payload = {
+                    "vehicle_ids": vehicle_ids,
+                    "driver_id": request.driver_id or DEFAULT_DRIVER_ID,
+                    "drivers": request.drivers,
+                    "concurrency": min(
+                        request.concurrency or app_settings.fleet_max_concurrency,
+                        app_settings.fleet_max_concurrency
+                    ),
+                    "summarize": request.summarize
+                }
+            
+            try:
+                job = self.jobs.submit(request.kind, payload, request.priority)
+            except JobQueueFull as e:
+                raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "30"})
+            return JSONResponse(
+                job.as_dict(include_result=False),
+                status_code=202,
+                headers={"Location": f"/v1/jobs/{job.id}"}
+            )
+        
+        @self.app.get("/v1/jobs/{job_id}")
+        async def get_job(job_id: str, x_api_key: Optional[str] = Header(None)):
+            """Status of a job, with its result once it has finished"""
+            return self._get_job(job_id, x_api_key).as_dict()
+        
+        @self.app.get("/v1/jobs/{job_id}/events")
+        async def job_events(job_id: str, x_api_key: Optional[str] = Header(None)):
+            """Stream a job's status changes and progress as SSE until it finishes"""
+            job = self._get_job(job_id, x_api_key)
+            return StreamingResponse(
+                self._generate_job_events(job),
+                media_type="text/event-stream",
+                headers=SSE_HEADERS
+            )
+        
+        @self.app.delete("/v1/jobs/{job_id}")
+        async def cancel_job(job_id: str, x_api_key: Optional[str] = Header(None)):
+            """Cancel a queued or running job"""
+            self._get_job(job_id, x_api_key)
+            job = await self.jobs.cancel(job_id)
+            return job.as_dict(include_result=False)
+        
+        @self.app.get("/metrics")
+        async def prometheus_metrics():
+            """Prometheus metrics endpoint"""
+            body, content_type = metrics.render_metrics()
+            return Response(content=body, media_type=content_type)
         
         @self.app.get("/health")
         async def health():
@@ -110,8 +543,24 @@ class WXOServer:
                 "status": "healthy",
                 "service": "BeeAI Predictive Maintenance",
                 "model": app_settings.llm_model,
+                "tool_caches": tool_cache_stats(),
+                "timestamp": int(time.time())
+            }
+        
+        @self.app.get("/ready")
+        async def ready():
+            """Readiness probe: green only after the model client has been warmed up"""
+            body = {
+                "status": "ready" if self.warmup.ready else "warming_up",
+                "startup": self.warmup.report.as_dict(),
+                "watsonx": watsonx_backend.stats(),
+                "fleet_data": fleet_store.stats(),
+                "response_cache": self.response_cache.stats() if self.response_cache else None,
+                "jobs": self.jobs.stats(),
+                "tracing": tracer.stats(),
                 "timestamp": int(time.time())
             }
+            return JSONResponse(body, status_code=200 if self.warmup.ready else 503)
         
         @self.app.get("/.well-known/agent-card.json")
         async def agent_card():
@@ -128,85 +577,496 @@ class WXOServer:
                 "url": f"http://{app_settings.wxo_host}:{app_settings.wxo_port}"
             }
     
-    async def _generate_sse_response(self, response_text: str, request_id: str, model: str):
-        """Generate SSE streaming response"""
-        timestamp = int(time.time())
+    def _response_cache_key(
+        self,
+        prompt: str,
+        conversation_id: Optional[str],
+        history: List[AnyMessage]
+    ) -> Optional[str]:
+        """Cache key for a standalone vehicle request, or None when the answer depends on earlier turns"""
+        if self.response_cache is None or history:
+            return None
+        if conversation_id and self.sessions.has_turns(conversation_id):
+            return None
+        return self.response_cache.key(prompt)
+    
+    async def _cached_response(
+        self,
+        response_text: str,
+        prompt: str,
+        conversation_id: Optional[str],
+        request_id: str,
+        model: str,
+        started: float
+    ) -> StreamingResponse:
+        """Replay a cached answer in the normal SSE format, recording the turn for follow-ups"""
+        if conversation_id:
+            await self._require_agent_factory()
+            async with self.sessions.open(conversation_id) as memory:
+                await memory.add_many([UserMessage(prompt), AssistantMessage(response_text)])
         
-        # Content chunk
+        elapsed = time.perf_counter() - started
+        logger.info(
+            "Response served from cache",
+            extra={"response_chars": len(response_text), "elapsed_ms": round(elapsed * 1000, 1)}
+        )
+        metrics.TIME_TO_FIRST_BYTE.labels("chat_completions").observe(elapsed)
+        metrics.REQUEST_LATENCY.labels("chat_completions").observe(elapsed)
+        return StreamingResponse(
+            self._generate_sse_response(response_text, request_id, model),
+            media_type="text/event-stream",
+            headers={**SSE_HEADERS, "X-Cache": "hit"}
+        )
+    
+    async def _require_agent_factory(self):
+        """Wait briefly for a cold-starting worker to build its agent factory, else 503"""
+        if await self.warmup.get_factory(app_settings.warmup_request_wait_seconds) is None:
+            raise HTTPException(
+                status_code=503,
+                detail="Service is warming up",
+                headers={"Retry-After": "5"}
+            )
+    
+    async def _admit(self, api_key: str) -> Admission:
+        """Admit a request or reject it with 429 and a Retry-After header"""
+        try:
+            return await self.admission.admit(api_key)
+        except AdmissionRejected as e:
+            metrics.ERRORS.labels("rejected").inc()
+            logger.warning("Request rejected", extra={"reason": e.reason, "retry_after": e.retry_after})
+            raise HTTPException(
+                status_code=429,
+                detail=e.reason,
+                headers={"Retry-After": str(math.ceil(e.retry_after))}
+            )
+    
+    def _hold_admission(
+        self,
+        body: AsyncIterator[str],
+        admission: Admission,
+        endpoint: str,
+        started: float
+    ) -> AsyncIterator[str]:
+        """Keep the admission slot until the streamed body has been fully sent
+        
+        The slot is also released when the generator is garbage collected, which
+        covers clients that disconnect before the body is ever iterated.
+        """
+        async def stream():
+            try:
+                async for chunk in body:
+                    yield chunk
+            finally:
+                admission.release()
+                metrics.REQUEST_LATENCY.labels(endpoint).observe(time.perf_counter() - started)
+        
+        generator = stream()
+        weakref.finalize(generator, admission.release)
+        return generator
+    
+    def _request_timeout(self, requested: Optional[float]) -> float:
+        """Deadline for one request: the X-Request-Timeout header, capped by Settings"""
+        if requested is None:
+            return app_settings.request_deadline_seconds
+        if requested <= 0:
+            raise HTTPException(status_code=400, detail="X-Request-Timeout must be positive")
+        return min(requested, app_settings.request_deadline_max_seconds)
+    
+    async def _await_request(self, coro, http_request: Request, deadline_at: float, timeout: float):
+        """Await a buffered agent run, cancelling it when the client leaves or the deadline passes
+        
+        Cancellation reaches the agent's pending LLM and tool calls, and the
+        run has fully unwound before this returns, so its concurrency slot is
+        free again when the admission is released.
+        """
+        task = asyncio.create_task(coro)
+        try:
+            while True:
+                remaining = deadline_at - time.perf_counter()
+                if remaining <= 0:
+                    metrics.RUNS_EXPIRED.inc()
+                    logger.warning("Request deadline exceeded, run cancelled", extra={"timeout": timeout})
+                    raise DeadlineExceeded(timeout)
+                
+                done, _ = await asyncio.wait({task}, timeout=min(app_settings.disconnect_poll_seconds, remaining))
+                if done:
+                    return task.result()
+                if await http_request.is_disconnected():
+                    metrics.RUNS_CANCELLED.inc()
+                    logger.info("Client disconnected, run cancelled")
+                    raise ClientDisconnected()
+        finally:
+            if not task.done():
+                task.cancel()
+                await asyncio.wait({task})
+    
+    async def _run_agent(
+        self,
+        prompt: str,
+        conversation_id: Optional[str],
+        history: List[AnyMessage],
+        on_event: Optional[Callable] = None
+    ) -> str:
+        """Run one agent turn inside its conversation session and return the answer text
+        
+        Plain vehicle-maintenance requests take the planned fast path when it
+        is enabled; anything else, or a planned run that fails, goes to the
+        free-form agent.
+        """
+        async with self.sessions.open(conversation_id, history) as memory:
+            if app_settings.planned_execution and is_maintenance_request(prompt):
+                try:
+                    async with self.agent_factory.slot():
+                        return await run_planned_maintenance(
+                            self.agent_factory.llm,
+                            prompt,
+                            memory,
+                            self._observer(on_event, stream_llm_tokens=True)
+                        )
+                except Exception:
+                    metrics.ERRORS.labels("planned_fallback").inc()
+                    logger.warning("Planned execution failed, falling back to agent", exc_info=True)
+            
+            async with self.agent_factory.acquire(memory) as agent:
+                observe = self._observer(on_event, stream_llm_tokens=False)
+                response = await observe(agent.run(prompt, max_iterations=app_settings.agent_max_iterations))
+                return response.last_message.text
+    
+    def _observer(self, on_event: Optional[Callable], stream_llm_tokens: bool) -> RunObserver:
+        """Build the observer attaching metrics, spans and, when streaming, the stream handler to a run
+        
+        Raw LLM tokens are only forwarded when the LLM writes the answer
+        directly; inside the agent they would include tool-call arguments.
+        """
+        run_metrics = metrics.RunMetrics()
+        run_tracer = RunTracer()
+        
+        def stream_matcher(event: EventMeta) -> bool:
+            return (
+                event.name == "final_answer"
+                or isinstance(event.creator, Tool)
+                or (stream_llm_tokens and event.name == "new_token")
+            )
+        
+        def observe(run: Run) -> Run:
+            run = run_tracer.observe(run_metrics.observe(run))
+            if on_event:
+                run = run.on(stream_matcher, on_event, EmitterOptions(match_nested=True))
+            return run
+        
+        return observe
+    
+    def _history_messages(self, messages: List[Message]) -> List[AnyMessage]:
+        """Convert the turns before the latest user message into agent memory messages"""
+        last_user = max(i for i, msg in enumerate(messages) if msg.role == "user")
+        history: List[AnyMessage] = []
+        for msg in messages[:last_user]:
+            if msg.role == "user":
+                history.append(UserMessage(msg.content))
+            elif msg.role == "assistant":
+                history.append(AssistantMessage(msg.content))
+        return history
+    
+    async def _stream_agent_response(
+        self,
+        prompt: str,
+        conversation_id: Optional[str],
+        history: List[AnyMessage],
+        request_id: str,
+        model: str,
+        started: float,
+        deadline_at: float,
+        timeout: float,
+        cache_key: Optional[str] = None
+    ):
+        """Run the agent and forward its output as SSE chunks while it is produced
+        
+        Final-answer deltas (summary tokens on the planned path) become content
+        chunks as soon as the LLM emits them. Tool start/finish events are sent
+        as SSE comments, which keep the connection alive without leaking into
+        the answer text. Events go through a bounded queue, so a slow client
+        pauses the agent run instead of letting output pile up in memory.
+        
+        When the client disconnects the server cancels this generator, which
+        cancels the run; past the deadline the run is cancelled and the client
+        gets an error chunk. A completed answer is stored under `cache_key`.
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=app_settings.stream_queue_size)
+        
+        async def on_event(data, event: EventMeta):
+            if event.name == "final_answer":
+                delta = getattr(data, "delta", None)
+                if delta:
+                    await queue.put(("delta", delta))
+            elif event.name == "new_token":
+                delta = data.value.get_text_content()
+                if delta:
+                    await queue.put(("delta", delta))
+            elif isinstance(event.creator, Tool) and event.name in ("start", "success", "error"):
+                await queue.put(("tool", f"{event.creator.name} {event.name}"))
+        
+        async def run_agent():
+            try:
+                response_text = await self._run_agent(prompt, conversation_id, history, on_event)
+                await queue.put(("done", response_text))
+            except Exception as e:
+                await queue.put(("error", e))
+        
+        task = asyncio.create_task(run_agent())
+        streamed_chars = 0
+        first_content = True
+        finished = False
+        try:
+            # Send the role immediately so the client sees the first byte right away
+            yield self._format_chunk(request_id, model, {"role": "assistant", "content": ""})
+            
+            while True:
+                try:
+                    kind, value = await asyncio.wait_for(queue.get(), timeout=max(deadline_at - time.perf_counter(), 0))
+                except asyncio.TimeoutError:
+                    metrics.RUNS_EXPIRED.inc()
+                    logger.warning("Request deadline exceeded, run cancelled", extra={"timeout": timeout})
+                    tracer.record_error(str(DeadlineExceeded(timeout)))
+                    yield self._format_chunk(request_id, model, {"content": self._error_content(str(DeadlineExceeded(timeout)))})
+                    break
+                
+                if first_content and kind != "tool":
+                    first_content = False
+                    metrics.TIME_TO_FIRST_BYTE.labels("chat_completions").observe(time.perf_counter() - started)
+                
+                if kind == "delta":
+                    streamed_chars += len(value)
+                    yield self._format_chunk(request_id, model, {"content": value})
+                elif kind == "tool":
+                    logger.debug("Tool event", extra={"event": value, "sample_rate": app_settings.log_sample_rate})
+                    yield f": {value}\n\n"
+                elif kind == "done":
+                    # Agents that do not stream their final answer deliver it here in one piece
+                    if not streamed_chars and value:
+                        yield self._format_chunk(request_id, model, {"content": value})
+                    if cache_key and value:
+                        await self.response_cache.set(cache_key, value)
+                    logger.info(
+                        "Response streamed",
+                        extra={
+                            "response_chars": max(streamed_chars, len(value or "")),
+                            "elapsed_ms": round((time.perf_counter() - started) * 1000, 1)
+                        }
+                    )
+                    break
+                else:
+                    metrics.ERRORS.labels(type(value).__name__).inc()
+                    logger.error("Agent run failed", exc_info=value)
+                    tracer.record_error(f"{type(value).__name__}: {value}")
+                    yield self._format_chunk(request_id, model, {"content": self._error_content(str(value))})
+                    break
+            
+            finished = True
+            yield self._format_chunk(request_id, model, {}, finish_reason="stop")
+            yield "data: [DONE]\n\n"
+        finally:
+            if not task.done():
+                task.cancel()
+                # Let the run unwind its spans, sessions and slots before the response closes
+                await asyncio.wait({task})
+                if not finished:
+                    metrics.RUNS_CANCELLED.inc()
+                    logger.info("Client disconnected, run cancelled")
+    
+    def _get_job(self, job_id: str, api_key: Optional[str]) -> Job:
+        if api_key != app_settings.api_key:
+            raise HTTPException(status_code=401, detail="Invalid API key")
+        job = self.jobs.get(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail="Job not found or expired")
+        return job
+    
+    async def _run_job(self, job: Job) -> Dict[str, Any]:
+        """Run one background job and return its result
+        
+        Jobs wait for the agent factory instead of failing during warm-up.
+        Every agent run of a job also holds a job slot, which caps how much
+        of the shared agent concurrency background work can take.
+        """
+        await self.warmup.get_factory(None)
+        
+        if job.kind == "chat":
+            async def on_event(data, event: EventMeta):
+                if isinstance(event.creator, Tool) and event.name in ("start", "success", "error"):
+                    await job.emit({"type": "tool", "tool": event.creator.name, "event": event.name})
+            
+            async with self.jobs.slot():
+                response_text = await self._run_agent(job.payload["prompt"], None, [], on_event)
+            return {"response": response_text}
+        
+        @asynccontextmanager
+        async def slot():
+            async with self.jobs.slot(), self.agent_factory.slot():
+                yield
+        
+        started = time.perf_counter()
+        results = []
+        async for result in analyze_fleet(
+            self.agent_factory.llm,
+            job.payload["vehicle_ids"],
+            job.payload["concurrency"],
+            slot,
+            driver_id=job.payload["driver_id"],
+            summarize=job.payload["summarize"],
+            observe=self._observer(None, stream_llm_tokens=False),
+            drivers=job.payload["drivers"]
+        ):
+            results.append(result)
+            await job.emit({"type": "vehicle", **result})
+        
+        failed = [result["vehicle_id"] for result in results if result["status"] != "ok"]
+        return {
+            "results": results,
+            "summary": {
+                "total": len(results),
+                "succeeded": len(results) - len(failed),
+                "failed": len(failed),
+                "failed_vehicle_ids": failed,
+                "elapsed_ms": round((time.perf_counter() - started) * 1000, 1)
+            }
+        }
+    
+    async def _generate_job_events(self, job: Job):
+        """Replay a job's events so far, then follow it; the last event carries the job with its result"""
+        async for event in job.follow():
+            yield f"event: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
+        yield f"event: result\ndata: {json.dumps(job.as_dict(), default=str)}\n\n"
+    
+    async def _generate_fleet_ndjson(self, vehicle_ids: List[str], concurrency: int, request: FleetAnalyzeRequest):
+        """Stream one JSON line per vehicle, then a summary line"""
+        started = time.perf_counter()
+        succeeded = 0
+        failed: List[str] = []
+        
+        async for result in analyze_fleet(
+            self.agent_factory.llm,
+            vehicle_ids,
+            concurrency,
+            self.agent_factory.slot,
+            driver_id=request.driver_id or DEFAULT_DRIVER_ID,
+            summarize=request.summarize,
+            observe=self._observer(None, stream_llm_tokens=False),
+            drivers=request.drivers
+        ):
+            if result["status"] == "ok":
+                succeeded += 1
+            else:
+                failed.append(result["vehicle_id"])
+            yield json.dumps(result) + "\n"
+        
+        summary = {
+            "summary": {
+                "total": len(vehicle_ids),
+                "succeeded": succeeded,
+                "failed": len(failed),
+                "failed_vehicle_ids": failed,
+                "elapsed_ms": round((time.perf_counter() - started) * 1000, 1)
+            }
+        }
+        logger.info(
+            "Fleet analysis done",
+            extra={"succeeded": succeeded, "failed": len(failed), "elapsed_ms": summary["summary"]["elapsed_ms"]}
+        )
+        yield json.dumps(summary) + "\n"
+    
+    def _format_chunk(self, request_id: str, model: str, delta: dict, finish_reason: Optional[str] = None) -> str:
+        """Format a single chat.completion.chunk SSE event"""
         chunk = {
             "id": request_id,
             "object": "chat.completion.chunk",
-            "created": timestamp,
+            "created": int(time.time()),
             "model": model,
             "choices": [{
                 "index": 0,
-                "delta": {"role": "assistant", "content": response_text},
-                "finish_reason": None
+                "delta": delta,
+                "finish_reason": finish_reason
             }]
         }
-        yield f"data: {json.dumps(chunk)}\n\n"
+        return f"data: {json.dumps(chunk)}\n\n"
+    
+    def _error_content(self, error_msg: str) -> str:
+        """User-facing error text sent in place of the agent response"""
+        return f"{ERROR_PREFIX} {error_msg}\n\nPlease check:\n1. IBM watsonx.ai credentials are correct\n2. Project ID is valid\n3. Network connectivity to {app_settings.wxo_host}"
+    
+    async def _generate_sse_response(self, response_text: str, request_id: str, model: str):
+        """Generate SSE streaming response"""
+        # Content chunk
+        yield self._format_chunk(request_id, model, {"role": "assistant", "content": response_text})
         
         # Final chunk
-        final_chunk = {
-            "id": request_id,
-            "object": "chat.completion.chunk",
-            "created": timestamp,
-            "model": model,
-            "choices": [{
-                "index": 0,
-                "delta": {},
-                "finish_reason": "stop"
-            }]
-        }
-        yield f"data: {json.dumps(final_chunk)}\n\n"
+        yield self._format_chunk(request_id, model, {}, finish_reason="stop")
         yield "data: [DONE]\n\n"
     
     async def _generate_error_sse_response(self, error_msg: str, request_id: str, model: str):
         """Generate error SSE response"""
-        timestamp = int(time.time())
-        error_content = f"⚠️ BeeAI Error: {error_msg}\n\nPlease check:\n1. IBM watsonx.ai credentials are correct\n2. Project ID is valid\n3. Network connectivity to {app_settings.wxo_host}"
-        
-        chunk = {
-            "id": request_id,
-            "object": "chat.completion.chunk",
-            "created": timestamp,
-            "model": model,
-            "choices": [{
-                "index": 0,
-                "delta": {"role": "assistant", "content": error_content},
-                "finish_reason": None
-            }]
-        }
-        yield f"data: {json.dumps(chunk)}\n\n"
-        
-        final_chunk = {
-            "id": request_id,
-            "object": "chat.completion.chunk",
-            "created": timestamp,
-            "model": model,
-            "choices": [{
-                "index": 0,
-                "delta": {},
-                "finish_reason": "stop"
-            }]
-        }
-        yield f"data: {json.dumps(final_chunk)}\n\n"
+        yield self._format_chunk(request_id, model, {"role": "assistant", "content": self._error_content(error_msg)})
+        yield self._format_chunk(request_id, model, {}, finish_reason="stop")
         yield "data: [DONE]\n\n"
     
     def serve(self):
-        """Start the server"""
+        """Start the server in this process"""
         import uvicorn
-        print("=" * 60)
-        print("🌐 BeeAI WXO Server Ready")
-        print("=" * 60)
-        print(f"🔌 Endpoint: http://{app_settings.wxo_host}:{app_settings.wxo_port}")
-        print(f"📚 Docs: http://localhost:{app_settings.wxo_port}/docs")
-        print(f"🔑 API Key: {app_settings.api_key[:10]}...")
-        print("=" * 60 + "\n")
+        _log_ready(workers=1)
         
         uvicorn.run(
             self.app,
             host=app_settings.wxo_host,
             port=app_settings.wxo_port,
-            log_level=app_settings.log_level.lower()
-        )
\ No newline at end of file
+            log_level=app_settings.log_level.lower(),
+            timeout_graceful_shutdown=app_settings.shutdown_grace_seconds,
+            # Let uvicorn's loggers propagate to the queue-backed root handler
+            log_config=None
+        )
+
+
+def _log_ready(workers: int):
+    logger.info(
+        "BeeAI WXO Server ready",
+        extra={
+            "endpoint": f"http://{app_settings.wxo_host}:{app_settings.wxo_port}",
+            "docs": f"http://localhost:{app_settings.wxo_port}/docs",
+            "api_key_prefix": f"{app_settings.api_key[:10]}...",
+            "workers": workers
+        }
+    )
+
+
+def worker_count() -> int:
+    """Configured worker processes; 0 means one per CPU core"""
+    return app_settings.workers or os.cpu_count() or 1
+
+
+def create_app() -> FastAPI:
+    """App factory run inside each worker process
+    
+    Nothing heavy happens here: the agent factory (ChatModel client, tools)
+    is built by the app's startup hook, so every worker owns its own client
+    and connections.
+    """
+    setup_logging()
+    return WXOServer().app
+
+
+def serve_workers():
+    """Start uvicorn with one process per worker, each building its own app"""
+    import uvicorn
+    workers = worker_count()
+    # Workers write metrics to shared files so /metrics aggregates every process
+    os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", tempfile.mkdtemp(prefix="beeai-metrics-"))
+    _log_ready(workers=workers)
+    
+    uvicorn.run(
+        "beeai_service.servers.wxo_server:create_app",
+        factory=True,
+        workers=workers,
+        host=app_settings.wxo_host,
+        port=app_settings.wxo_port,
+        log_level=app_settings.log_level.lower(),
+        timeout_graceful_shutdown=app_settings.shutdown_grace_seconds,
+        log_config=None
+    )
\ No newline at end of file
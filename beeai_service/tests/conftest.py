@@ -0,0 +1,37 @@
+"""
+Shared fixtures
+"""
+import pytest
+
+from beeai_service.core.fleet_data import fleet_store
+
+
+FLEET_SNAPSHOT = {
+    "vehicles.csv": "vehicle_id,city\nBUS-1,Austin\nBUS-2,Austin\n",
+    "driver_schedule.csv": (
+        "driver_id,available_from,available_to\n"
+        "driver-a,2025-12-01T09:00:00,2025-12-01T12:00:00\n"
+        "driver-b,2025-12-01T09:00:00,2025-12-01T12:00:00\n"
+    ),
+    "dealership_slots.csv": (
+        "city,dealership,slot_start,slot_end\n"
+        "Austin,North Bay,2025-12-01T10:00:00,2025-12-01T11:00:00\n"
+        "Austin,South Bay,2025-12-01T10:00:00,2025-12-01T11:00:00\n"
+    ),
+    "parts_inventory.csv": "component,stock\nBrake Pads,4\n",
+}
+
+
+@pytest.fixture
+def fleet_data(tmp_path, monkeypatch):
+    """Point the process-wide fleet store at a small snapshot directory and load it"""
+    for name, content in FLEET_SNAPSHOT.items():
+        (tmp_path / name).write_text(content)
+    monkeypatch.setattr(fleet_store, "data_path", tmp_path)
+    monkeypatch.setattr(fleet_store, "version", None)
+    monkeypatch.setattr(fleet_store, "loaded_at", None)
+    monkeypatch.setattr(fleet_store, "row_counts", {})
+    monkeypatch.setattr(fleet_store, "_fingerprints", {})
+    fleet_store.reload()
+    yield tmp_path
+    fleet_store.close()
@@ -0,0 +1,39 @@
+"""
+Compact tool outputs
+"""
+import asyncio
+import json
+
+from beeai_framework.tools import tool
+
+from beeai_service.config.settings import app_settings
+from beeai_service.core.budget import compact_output, compact_tool
+
+
+def test_compact_output_keeps_empty_fields_and_trims_lists(monkeypatch):
+    monkeypatch.setattr(app_settings, "prompt_tool_output_max_items", 2)
+    result = {"city": None, "slots": [], "driver": {}, "windows": [{"start": "09:00", "note": None}] * 4}
+    
+    assert json.loads(compact_output(result)) == {
+        "city": None,
+        "slots": [],
+        "driver": {},
+        "windows": [{"start": "09:00", "note": None}] * 2
+    }
+
+
+def test_compact_tool_keeps_the_input_schema(monkeypatch):
+    monkeypatch.setattr(app_settings, "prompt_compact_tool_outputs", True)
+    
+    @tool(description="Look up a vehicle.")
+    @compact_tool
+    def lookup(vehicle_id: str, component: str = ""):
+        return {"vehicle_id": vehicle_id, "component": component}
+    
+    assert list(lookup.input_schema.model_fields) == ["vehicle_id", "component"]
+    
+    async def run():
+        return await lookup.run({"vehicle_id": "BUS-1"})
+    
+    output = asyncio.run(run())
+    assert json.loads(output.get_text_content()) == {"vehicle_id": "BUS-1", "component": ""}
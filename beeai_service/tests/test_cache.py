@@ -0,0 +1,42 @@
+"""
+Tool result cache
+"""
+import asyncio
+
+from beeai_framework.tools import tool
+
+from beeai_service.core.cache import cached_tool
+from beeai_service.core.tools import ALL_TOOLS
+
+
+def test_cached_tool_keeps_the_input_schema():
+    calls = []
+    
+    @tool(description="Look up a vehicle.")
+    @cached_tool(ttl=60)
+    def lookup(vehicle_id: str, component: str = ""):
+        calls.append(vehicle_id)
+        return vehicle_id
+    
+    assert list(lookup.input_schema.model_fields) == ["vehicle_id", "component"]
+    assert lookup.input_schema.model_fields["vehicle_id"].is_required()
+    
+    async def run_twice():
+        for _ in range(2):
+            output = await lookup.run({"vehicle_id": "BUS-1"})
+            assert output.get_text_content() == "BUS-1"
+    
+    asyncio.run(run_twice())
+    assert calls == ["BUS-1"]
+
+
+def test_fleet_tools_expose_their_arguments():
+    schemas = {fleet_tool.name: list(fleet_tool.input_schema.model_fields) for fleet_tool in ALL_TOOLS}
+    
+    assert schemas == {
+        "get_vehicle_location": ["vehicle_id"],
+        "get_driver_schedule": ["driver_id"],
+        "get_dealership_slots": ["city"],
+        "get_parts_inventory": ["component"],
+        "find_earliest_appointment": ["vehicle_id", "driver_id", "component"]
+    }
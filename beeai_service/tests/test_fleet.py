@@ -0,0 +1,69 @@
+"""
+Fleet batch analysis against the mock ChatModel
+"""
+import asyncio
+from contextlib import asynccontextmanager
+
+from beeai_service.benchmarks.mock_llm import DEFAULT_ANSWER, MockChatModel
+from beeai_service.core.fleet import analyze_fleet
+
+
+@asynccontextmanager
+async def no_slot():
+    yield
+
+
+async def collect(**kwargs):
+    return [result async for result in analyze_fleet(**kwargs)]
+
+
+def test_fleet_analysis_reaches_llm_summary():
+    llm = MockChatModel(token_latency=0, call_latency=0)
+    results = asyncio.run(collect(llm=llm, vehicle_ids=["TRUCK-22", "VAN-7"], concurrency=2, slot=no_slot))
+    
+    assert sorted(result["vehicle_id"] for result in results) == ["TRUCK-22", "VAN-7"]
+    for result in results:
+        assert result["status"] == "ok", result.get("error")
+        assert result["analysis"] == DEFAULT_ANSWER
+        assert set(result["tool_results"]) == {
+            "get_vehicle_location",
+            "get_driver_schedule",
+            "get_dealership_slots",
+            "get_parts_inventory",
+            "find_earliest_appointment"
+        }
+
+
+def test_fleet_analysis_uses_each_vehicles_driver(fleet_data):
+    llm = MockChatModel(token_latency=0, call_latency=0)
+    results = asyncio.run(collect(
+        llm=llm,
+        vehicle_ids=["BUS-1", "BUS-2"],
+        concurrency=2,
+        slot=no_slot,
+        summarize=False,
+        drivers={"BUS-1": "driver-a", "BUS-2": "driver-b"}
+    ))
+    
+    appointments = {result["vehicle_id"]: result["tool_results"]["find_earliest_appointment"] for result in results}
+    assert appointments["BUS-1"]["driver_id"] == "driver-a"
+    assert appointments["BUS-2"]["driver_id"] == "driver-b"
+    assert all(appointment["appointment"] for appointment in appointments.values())
+
+
+def test_fleet_analysis_explains_unassigned_vehicles(fleet_data):
+    llm = MockChatModel(token_latency=0, call_latency=0)
+    results = asyncio.run(collect(
+        llm=llm,
+        vehicle_ids=["BUS-1", "BUS-2"],
+        concurrency=2,
+        slot=no_slot,
+        driver_id="driver-a",
+        summarize=False
+    ))
+    
+    # Both vehicles share driver-a, who cannot be at both 10:00 appointments
+    appointments = [result["tool_results"]["find_earliest_appointment"] for result in results]
+    unassigned = [appointment for appointment in appointments if appointment["appointment"] is None]
+    assert len(unassigned) == 1
+    assert unassigned[0]["reason"] == "No free dealership slot fits the availability of driver driver-a"
@@ -0,0 +1,24 @@
+"""
+Fleet snapshot reloads
+"""
+import asyncio
+
+import pytest
+
+from beeai_service.core.fleet_data import fleet_store
+from beeai_service.core.planner import run_tool
+from beeai_service.core.tools import get_vehicle_location
+
+
+def test_partial_reload_applies_and_invalidates_good_files(fleet_data):
+    assert asyncio.run(run_tool(get_vehicle_location, vehicle_id="BUS-1"))["city"] == "Austin"
+    version = fleet_store.version
+    
+    (fleet_data / "vehicles.csv").write_text("vehicle_id,city\nBUS-1,Dallas\nBUS-2,Austin\n")
+    (fleet_data / "parts_inventory.csv").write_text("component,stock\nBrake Pads,plenty\n")
+    with pytest.raises(ValueError):
+        fleet_store.reload()
+    
+    assert fleet_store.version != version
+    assert asyncio.run(run_tool(get_vehicle_location, vehicle_id="BUS-1"))["city"] == "Dallas"
+    assert fleet_store.parts_stock("Brake Pads") == 4
@@ -0,0 +1,27 @@
+"""
+Run metrics collected from agent runs against the mock ChatModel
+"""
+import asyncio
+
+from prometheus_client import REGISTRY
+
+from beeai_service.benchmarks.mock_llm import MockChatModel
+from beeai_service.core.agent import MaintenanceAgentFactory
+from beeai_service.core.metrics import RunMetrics
+
+
+def tool_calls(tool: str) -> float:
+    return REGISTRY.get_sample_value("beeai_tool_latency_seconds_count", {"tool": tool}) or 0.0
+
+
+def test_agent_run_records_nested_tool_latency():
+    factory = MaintenanceAgentFactory(llm=MockChatModel(token_latency=0, call_latency=0))
+    before = tool_calls("get_vehicle_location")
+    
+    async def run():
+        async with factory.acquire() as agent:
+            await RunMetrics().observe(agent.run("Check maintenance status for vehicle TRUCK-22"))
+    
+    asyncio.run(run())
+    
+    assert tool_calls("get_vehicle_location") == before + 1
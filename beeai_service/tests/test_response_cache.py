@@ -0,0 +1,60 @@
+"""
+Two-tier response cache
+"""
+import asyncio
+import sqlite3
+import threading
+import time
+
+from beeai_service.core.response_cache import ResponseCache
+
+
+def test_disk_tier_is_shared_and_queried_off_the_event_loop(tmp_path, monkeypatch):
+    disk_path = str(tmp_path / "responses.db")
+    threads = []
+    read, write = ResponseCache._read, ResponseCache._write
+    
+    def recording_read(self, *args):
+        threads.append(threading.get_ident())
+        return read(self, *args)
+    
+    def recording_write(self, *args):
+        threads.append(threading.get_ident())
+        return write(self, *args)
+    
+    monkeypatch.setattr(ResponseCache, "_read", recording_read)
+    monkeypatch.setattr(ResponseCache, "_write", recording_write)
+    
+    async def run():
+        writer = ResponseCache(ttl=60, max_size=10, disk_path=disk_path)
+        key = writer.key("Check maintenance status for vehicle TRUCK-22")
+        await writer.set(key, "cached answer")
+        # A second worker only sees the answer through the disk tier
+        reader = ResponseCache(ttl=60, max_size=10, disk_path=disk_path)
+        return await reader.get(key), threading.get_ident()
+    
+    response, loop_thread = asyncio.run(run())
+    
+    assert response == "cached answer"
+    assert len(threads) == 2 and loop_thread not in threads
+
+
+def test_disk_tier_drops_expired_and_least_recently_used_answers(tmp_path):
+    disk_path = str(tmp_path / "responses.db")
+    cache = ResponseCache(ttl=60, max_size=10, disk_path=disk_path, disk_max_entries=2)
+    keys = [cache.key(f"Check maintenance status for vehicle BUS-{number}") for number in range(4)]
+    
+    async def run():
+        await cache.set(keys[0], "expired")
+        cache._execute("UPDATE responses SET expires_at = ? WHERE key = ?", (time.time() - 1, keys[0]))
+        await cache.set(keys[1], "answer 1")
+        await cache.set(keys[2], "answer 2")
+        # Reading from disk makes answer 1 the most recently used
+        cache.memory.invalidate()
+        await cache.get(keys[1])
+        await cache.set(keys[3], "answer 3")
+    
+    asyncio.run(run())
+    
+    rows = sqlite3.connect(disk_path).execute("SELECT response FROM responses ORDER BY response").fetchall()
+    assert rows == [("answer 1",), ("answer 3",)]
@@ -0,0 +1,65 @@
+"""
+Step routing and output budgets of RoutedChatModel
+"""
+import asyncio
+
+from beeai_framework.backend import AssistantMessage, ChatModelParameters, UserMessage
+from beeai_framework.backend.types import ChatModelOutput
+
+from beeai_service.benchmarks.mock_llm import DEFAULT_ANSWER, MockChatModel
+from beeai_service.config.settings import app_settings, watsonx_settings
+from beeai_service.core.agent import MaintenanceAgentFactory
+from beeai_service.core.router import ANSWER_STEP, TOOL_STEP, RoutedChatModel
+from beeai_service.core.tools import ALL_TOOLS
+
+
+def test_workflow_steps_get_the_tool_budget_until_the_answer():
+    calls = []
+    
+    class RecordingModel(MockChatModel):
+        async def _create(self, input, run):
+            calls.append(input)
+            return await super()._create(input, run)
+    
+    llm = RoutedChatModel(
+        answer_model=RecordingModel(token_latency=0, call_latency=0),
+        workflow_tools={tool.name for tool in ALL_TOOLS},
+        parameters=ChatModelParameters()
+    )
+    
+    async def run():
+        async with MaintenanceAgentFactory(llm=llm).acquire() as agent:
+            return await agent.run("Check maintenance status for vehicle TRUCK-22")
+    
+    response = asyncio.run(run())
+    
+    assert response.last_message.text == DEFAULT_ANSWER
+    # One call per workflow tool, then the call that answers once every tool has a result
+    assert len(calls) == len(ALL_TOOLS) + 1
+    assert [llm._step(input) for input in calls] == [TOOL_STEP] * len(ALL_TOOLS) + [ANSWER_STEP]
+    assert all(input.max_tokens == app_settings.prompt_tool_step_max_tokens for input in calls[:-1])
+    assert calls[-1].max_tokens == watsonx_settings.max_tokens
+
+
+def test_hedged_stream_wins_when_the_first_request_is_slow(monkeypatch):
+    monkeypatch.setattr(app_settings, "llm_hedge_enabled", True)
+    monkeypatch.setattr(app_settings, "llm_hedge_after_seconds", 0.05)
+    streams = []
+    
+    class SlowFirstModel(MockChatModel):
+        async def _create_stream(self, input, run):
+            attempt = len(streams)
+            streams.append(attempt)
+            if attempt == 0:
+                await asyncio.sleep(5)
+            yield ChatModelOutput(output=[AssistantMessage(f"attempt {attempt}")])
+    
+    llm = RoutedChatModel(answer_model=SlowFirstModel(), parameters=ChatModelParameters())
+    
+    async def run():
+        return await asyncio.wait_for(llm.run([UserMessage("ping")], stream=True), timeout=2)
+    
+    response = asyncio.run(run())
+    
+    assert streams == [0, 1]
+    assert response.get_text_content() == "attempt 1"
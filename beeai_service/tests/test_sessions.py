@@ -0,0 +1,34 @@
+"""
+Conversation session memory
+"""
+import asyncio
+
+from beeai_framework.backend import AssistantMessage, UserMessage
+from beeai_framework.memory import UnconstrainedMemory
+
+from beeai_service.core.sessions import SessionStore, window_memory
+
+
+def test_long_prompt_evicts_history_instead_of_failing():
+    store = SessionStore(lambda: window_memory(max_tokens=512))
+    long_prompt = "Vehicle BUS-1 reported brake wear. " * 260
+    
+    async def run():
+        async with store.open("conversation-1", [UserMessage("Hi"), AssistantMessage("Hello")]) as memory:
+            await memory.add(UserMessage(long_prompt))
+            return [message.text for message in memory.messages]
+    
+    assert asyncio.run(run()) == [long_prompt]
+
+
+def test_sessionless_turns_keep_the_whole_history():
+    store = SessionStore(lambda: window_memory(max_tokens=16))
+    history = [UserMessage("Check BUS-1"), AssistantMessage("BUS-1 is in Austin")]
+    
+    async def run():
+        async with store.open(None, history) as memory:
+            return memory
+    
+    memory = asyncio.run(run())
+    assert isinstance(memory, UnconstrainedMemory)
+    assert memory.messages == history
@@ -0,0 +1,32 @@
+"""
+Spans recorded for agent runs against the mock ChatModel
+"""
+import asyncio
+
+from beeai_service.benchmarks.mock_llm import MockChatModel
+from beeai_service.core.agent import MaintenanceAgentFactory
+from beeai_service.core.tracing import RunTracer, tracer
+
+
+def test_agent_run_records_llm_and_tool_child_spans(monkeypatch):
+    finished = []
+    monkeypatch.setattr(tracer, "enabled", True)
+    monkeypatch.setattr(tracer, "_finish", lambda trace, root: finished.append(trace))
+    factory = MaintenanceAgentFactory(llm=MockChatModel(token_latency=0, call_latency=0))
+    
+    async def run():
+        with tracer.trace("POST /chat/completions"):
+            async with factory.acquire() as agent:
+                await RunTracer().observe(agent.run("Check maintenance status for vehicle TRUCK-22"))
+    
+    asyncio.run(run())
+    
+    [trace] = finished
+    root, *children = trace.spans
+    names = [span.name for span in children]
+    assert "chat mock-granite" in names
+    assert "execute_tool get_vehicle_location" in names
+    assert all(span.parent_id for span in children)
+    assert all(span.end_ns is not None for span in children)
+    llm_span = next(span for span in children if span.name == "chat mock-granite")
+    assert llm_span.attributes["gen_ai.usage.output_tokens"] > 0
@@ -0,0 +1,30 @@
+"""
+Startup warm-up and readiness against the mock ChatModel
+"""
+import time
+
+from fastapi.testclient import TestClient
+
+from beeai_service.benchmarks.mock_llm import MockChatModel
+from beeai_service.config.settings import app_settings
+from beeai_service.core.agent import MaintenanceAgentFactory
+from beeai_service.servers.wxo_server import WXOServer
+
+
+def test_ready_after_llm_warmup(monkeypatch):
+    monkeypatch.setattr(app_settings, "warmup_llm_call", True)
+    llm = MockChatModel(token_latency=0, call_latency=0)
+    server = WXOServer(MaintenanceAgentFactory(llm=llm))
+    
+    with TestClient(server.app) as client:
+        deadline = time.monotonic() + 5
+        response = client.get("/ready")
+        while response.status_code != 200 and time.monotonic() < deadline:
+            time.sleep(0.05)
+            response = client.get("/ready")
+    
+    assert response.status_code == 200, response.json()
+    body = response.json()
+    assert body["status"] == "ready"
+    assert "llm_warmup" in body["startup"]["phases"]
+    assert body["startup"]["last_error"] is None
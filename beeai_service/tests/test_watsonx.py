@@ -0,0 +1,62 @@
+"""
+Managed watsonx backend: pooled client and IAM token injected into chat models
+"""
+import asyncio
+import os
+
+import httpx
+from beeai_framework.backend import UserMessage
+
+from beeai_service.config.settings import app_settings, watsonx_settings
+from beeai_service.core import agent
+from beeai_service.core.watsonx import WatsonxBackend
+
+
+def fake_watsonx(seen):
+    async def handle_async_request(transport, request: httpx.Request) -> httpx.Response:
+        seen.append(request)
+        if request.url == watsonx_settings.iam_url:
+            return httpx.Response(200, json={"access_token": "iam-token-1", "expires_in": 3600})
+        return httpx.Response(200, json={
+            "id": "chat-1",
+            "model_id": "ibm/granite-3-8b-instruct",
+            "created": 0,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": "pong"}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2}
+        })
+    
+    return handle_async_request
+
+
+def test_chat_model_calls_go_through_the_pool(monkeypatch):
+    seen = []
+    backend = WatsonxBackend()
+    monkeypatch.setattr(watsonx_settings, "api_key", "test-api-key")
+    monkeypatch.setattr(watsonx_settings, "project_id", "test-project")
+    monkeypatch.setattr(watsonx_settings, "http2", False)
+    monkeypatch.setattr(app_settings, "llm_model", "watsonx:ibm/granite-3-8b-instruct")
+    monkeypatch.setattr(agent, "watsonx_backend", backend)
+    monkeypatch.setattr(httpx.AsyncHTTPTransport, "handle_async_request", fake_watsonx(seen))
+    monkeypatch.delenv("WATSONX_TOKEN", raising=False)
+    # Keep LiteLLM from fetching its model cost map over the network on first import
+    monkeypatch.setenv("LITELLM_LOCAL_MODEL_COST_MAP", "True")
+    
+    async def run():
+        llm = agent.create_llm()
+        await backend.start()
+        try:
+            for _ in range(3):
+                output = await llm.run([UserMessage("ping")], max_tokens=1, stream=False)
+                assert output.get_text_content() == "pong"
+        finally:
+            await backend.close()
+    
+    asyncio.run(run())
+    
+    # One IAM exchange, then every chat call on the shared pool with the managed token
+    assert backend.stats()["requests"] == 4
+    assert backend.token_refreshes == 1
+    chat_requests = [request for request in seen if request.url != watsonx_settings.iam_url]
+    assert len(chat_requests) == 3
+    assert all(request.headers["Authorization"] == "Bearer iam-token-1" for request in chat_requests)
+    assert "WATSONX_TOKEN" not in os.environ
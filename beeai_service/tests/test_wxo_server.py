@@ -0,0 +1,63 @@
+"""
+WXO server agent runs against the mock ChatModel
+"""
+import asyncio
+
+import pytest
+from beeai_framework.agents import AgentError
+from fastapi.testclient import TestClient
+
+from beeai_service.benchmarks.mock_llm import DEFAULT_ANSWER, MockChatModel
+from beeai_service.config.settings import app_settings
+from beeai_service.core.agent import MaintenanceAgentFactory
+from beeai_service.servers.wxo_server import WXOServer
+
+
+def create_server() -> WXOServer:
+    return WXOServer(MaintenanceAgentFactory(llm=MockChatModel(token_latency=0, call_latency=0)))
+
+
+def test_agent_run_forwards_nested_tool_events():
+    server = create_server()
+    events = []
+    
+    async def on_event(data, event):
+        events.append((getattr(event.creator, "name", None), event.name))
+    
+    answer = asyncio.run(server._run_agent("Check maintenance status for vehicle TRUCK-22", None, [], on_event))
+    
+    assert answer == DEFAULT_ANSWER
+    assert ("get_vehicle_location", "start") in events
+    assert ("get_vehicle_location", "success") in events
+
+
+def test_agent_run_stops_at_max_iterations(monkeypatch):
+    monkeypatch.setattr(app_settings, "agent_max_iterations", 3)
+    server = create_server()
+    calls = []
+    create = server.agent_factory.llm._create
+    
+    async def counting_create(input, run):
+        calls.append(input)
+        return await create(input, run)
+    
+    monkeypatch.setattr(server.agent_factory.llm, "_create", counting_create)
+    
+    with pytest.raises(AgentError):
+        asyncio.run(server._run_agent("Check maintenance status for vehicle TRUCK-22", None, []))
+    
+    assert len(calls) == 3
+
+
+def test_repeated_request_is_served_from_response_cache(monkeypatch):
+    monkeypatch.setattr(app_settings, "response_cache_enabled", True)
+    server = create_server()
+    request = {"messages": [{"role": "user", "content": "Check maintenance status for vehicle TRUCK-22"}]}
+    
+    with TestClient(server.app) as client:
+        first = client.post("/chat/completions", json=request, headers={"x-api-key": app_settings.api_key})
+        second = client.post("/chat/completions", json=request, headers={"x-api-key": app_settings.api_key})
+    
+    assert first.status_code == 200 and "X-Cache" not in first.headers
+    assert second.status_code == 200 and second.headers["X-Cache"] == "hit"
+    assert DEFAULT_ANSWER.split()[0] in second.text
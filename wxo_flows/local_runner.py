@@ -0,0 +1,257 @@
+"""
+Local asyncio runner for Orchestrate flow definitions
+Derives the data dependencies between flow steps, runs independent steps
+concurrently and runs whole fleets with bounded concurrency, so flows can be
+executed and benchmarked offline
+
+    python -m wxo_flows.local_runner --vehicles TRUCK-22 VAN-7 --repeat 500 --concurrency 32
+"""
+import argparse
+import ast
+import asyncio
+import inspect
+import json
+import textwrap
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Set, get_type_hints, is_typeddict
+
+# Source name for values that come from the flow input
+FLOW_INPUT = "input"
+
+
+def _function(step: Any) -> Callable:
+    """The plain Python function behind an Orchestrate @tool object"""
+    return inspect.unwrap(getattr(step, "fn", step))
+
+
+def _step_name(step: Any) -> str:
+    return getattr(step, "name", None) or getattr(_function(step), "__name__")
+
+
+def output_keys(fn: Callable) -> Set[str]:
+    """Keys of the dict a step returns
+
+    Taken from a TypedDict return annotation when there is one, otherwise
+    from the string keys of every dict literal the function returns.
+    """
+    returned = get_type_hints(fn).get("return")
+    if returned is not None and is_typeddict(returned):
+        return set(get_type_hints(returned))
+
+    tree = ast.parse(textwrap.dedent(inspect.getsource(fn)))
+    keys: Set[str] = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Return) and isinstance(node.value, ast.Dict):
+            keys.update(
+                key.value for key in node.value.keys
+                if isinstance(key, ast.Constant) and isinstance(key.value, str)
+            )
+    return keys
+
+
+@dataclass
+class FlowStep:
+    name: str
+    fn: Callable
+    params: List[str]
+    outputs: Set[str]
+    # Parameter name -> step (or FLOW_INPUT) whose output supplies it
+    sources: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def depends_on(self) -> Set[str]:
+        return {source for source in self.sources.values() if source != FLOW_INPUT}
+
+
+def plan(steps: Sequence[Any], input_fields: Iterable[str]) -> List[FlowStep]:
+    """Resolve which earlier step feeds each parameter of each step
+
+    Steps are given in their declared sequence order. A parameter comes from
+    the flow input when the input has that field, otherwise from the earliest
+    preceding step that outputs it; pass-through copies further down the
+    sequence are ignored, which is what lets independent steps run side by
+    side. Parameters nobody produces keep their default.
+    """
+    input_fields = set(input_fields)
+    planned: List[FlowStep] = []
+    for step in steps:
+        fn = _function(step)
+        params = list(inspect.signature(fn).parameters)
+        flow_step = FlowStep(_step_name(step), fn, params, output_keys(fn))
+
+        for param in params:
+            if param in input_fields:
+                flow_step.sources[param] = FLOW_INPUT
+                continue
+            producer = next((earlier for earlier in planned if param in earlier.outputs), None)
+            if producer is not None:
+                flow_step.sources[param] = producer.name
+            elif inspect.signature(fn).parameters[param].default is inspect.Parameter.empty:
+                raise ValueError(f"No input or earlier step provides '{param}' for step '{flow_step.name}'")
+        planned.append(flow_step)
+    return planned
+
+
+@dataclass
+class FlowRun:
+    inputs: Dict[str, Any]
+    outputs: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    timings: Dict[str, Dict[str, float]] = field(default_factory=dict)
+    elapsed_ms: float = 0.0
+    error: Optional[str] = None
+
+    def as_dict(self, last_step: str) -> Dict[str, Any]:
+        result = {
+            "inputs": self.inputs,
+            "status": "error" if self.error else "ok",
+            "output": self.outputs.get(last_step),
+            "timings": self.timings,
+            "elapsed_ms": self.elapsed_ms
+        }
+        if self.error:
+            result["error"] = self.error
+        return result
+
+
+class LocalFlowRunner:
+    """Runs a planned flow as a DAG of asyncio tasks
+
+    Each step starts as soon as the steps it depends on have finished. Tools
+    are plain blocking functions, so every step runs in a worker thread and
+    parallel branches really overlap. The flow's result is the output of its
+    last declared step, like in Orchestrate.
+    """
+
+    def __init__(self, steps: Sequence[Any], input_fields: Iterable[str], step_timeout: Optional[float] = None):
+        self.steps = plan(steps, input_fields)
+        self.step_timeout = step_timeout
+
+    @property
+    def last_step(self) -> str:
+        return self.steps[-1].name
+
+    async def run(self, **inputs) -> FlowRun:
+        run = FlowRun(inputs)
+        started = time.perf_counter()
+        tasks: Dict[str, asyncio.Task] = {}
+
+        async def execute(step: FlowStep) -> Dict[str, Any]:
+            await asyncio.gather(*(tasks[name] for name in step.depends_on))
+            kwargs = {}
+            for param, source in step.sources.items():
+                values = inputs if source == FLOW_INPUT else run.outputs[source]
+                if param in values:
+                    kwargs[param] = values[param]
+
+            step_started = time.perf_counter()
+            output = await asyncio.wait_for(asyncio.to_thread(step.fn, **kwargs), timeout=self.step_timeout)
+            run.timings[step.name] = {
+                "started_ms": round((step_started - started) * 1000, 3),
+                "elapsed_ms": round((time.perf_counter() - step_started) * 1000, 3)
+            }
+            run.outputs[step.name] = output
+            return output
+
+        for step in self.steps:
+            tasks[step.name] = asyncio.create_task(execute(step))
+        try:
+            await asyncio.gather(*tasks.values())
+        except Exception as e:
+            run.error = f"{type(e).__name__}: {e}"
+            for task in tasks.values():
+                task.cancel()
+        run.elapsed_ms = round((time.perf_counter() - started) * 1000, 3)
+        return run
+
+    async def run_fleet(self, inputs: Sequence[Dict[str, Any]], concurrency: int = 16) -> List[FlowRun]:
+        """Run the flow once per input with at most `concurrency` runs in flight"""
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def run_one(flow_input: Dict[str, Any]) -> FlowRun:
+            async with semaphore:
+                return await self.run(**flow_input)
+
+        return await asyncio.gather(*(run_one(flow_input) for flow_input in inputs))
+
+    def critical_path(self, step_ms: Dict[str, float]) -> List[str]:
+        """Longest dependency chain given each step's duration"""
+        finish: Dict[str, float] = {}
+        previous: Dict[str, Optional[str]] = {}
+        for step in self.steps:
+            before = max(step.depends_on, key=lambda name: finish[name], default=None)
+            finish[step.name] = (finish[before] if before else 0.0) + step_ms.get(step.name, 0.0)
+            previous[step.name] = before
+
+        node: Optional[str] = max(finish, key=finish.get)
+        path = []
+        while node is not None:
+            path.append(node)
+            node = previous[node]
+        return path[::-1]
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)]
+
+
+def summarize(runner: LocalFlowRunner, runs: Sequence[FlowRun], wall_seconds: float) -> Dict[str, Any]:
+    """Per-step timing statistics and throughput for a fleet run"""
+    ok = [run for run in runs if not run.error]
+    steps = {}
+    for step in runner.steps:
+        samples = [run.timings[step.name]["elapsed_ms"] for run in ok if step.name in run.timings]
+        if samples:
+            steps[step.name] = {
+                "mean_ms": round(sum(samples) / len(samples), 3),
+                "p95_ms": round(_percentile(samples, 0.95), 3),
+                "depends_on": sorted(step.depends_on)
+            }
+    totals = [run.elapsed_ms for run in ok]
+    return {
+        "runs": len(runs),
+        "failed": len(runs) - len(ok),
+        "runs_per_second": round(len(runs) / wall_seconds, 1) if wall_seconds else None,
+        "flow_p50_ms": round(_percentile(totals, 0.5), 3) if totals else None,
+        "flow_p95_ms": round(_percentile(totals, 0.95), 3) if totals else None,
+        "critical_path": runner.critical_path({name: stats["mean_ms"] for name, stats in steps.items()}),
+        "steps": steps
+    }
+
+
+def predictive_maintenance_runner(step_timeout: Optional[float] = None) -> LocalFlowRunner:
+    from wxo_flows.predictive_maintenance_flow import FLOW_STEPS, MaintenanceInput
+    return LocalFlowRunner(FLOW_STEPS, MaintenanceInput.model_fields, step_timeout)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run predictive_maintenance_flow locally for one or many vehicles")
+    parser.add_argument("--vehicles", nargs="+", default=["TRUCK-22"], help="Vehicle ids to run the flow for")
+    parser.add_argument("--driver-id", default="driver-1", help="Driver notified for every vehicle")
+    parser.add_argument("--repeat", type=int, default=1, help="Run each vehicle this many times (for benchmarking)")
+    parser.add_argument("--concurrency", type=int, default=16, help="Flow runs in flight at once")
+    parser.add_argument("--step-timeout", type=float, default=None, help="Timeout in seconds for a single step")
+    parser.add_argument("--plan", action="store_true", help="Print the derived dependency graph and exit")
+    parser.add_argument("--show-results", action="store_true", help="Print every flow result")
+    args = parser.parse_args()
+
+    runner = predictive_maintenance_runner(args.step_timeout)
+    if args.plan:
+        for step in runner.steps:
+            print(f"{step.name}: {json.dumps(step.sources)}")
+        return
+
+    inputs = [{"vehicle_id": vehicle_id, "driver_id": args.driver_id} for vehicle_id in args.vehicles] * args.repeat
+    started = time.perf_counter()
+    runs = asyncio.run(runner.run_fleet(inputs, args.concurrency))
+    wall_seconds = time.perf_counter() - started
+
+    if args.show_results:
+        for run in runs:
+            print(json.dumps(run.as_dict(runner.last_step), default=str))
+    print(json.dumps(summarize(runner, runs, wall_seconds), indent=2))
+
+
+if __name__ == "__main__":
+    main()
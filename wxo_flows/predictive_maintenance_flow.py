@@ -7,6 +7,16 @@ from wxo_tools.book_slot_tool import book_service_slot
 from wxo_tools.send_notification_tool import notify_driver
 
 
+# Declared step order; wxo_flows.local_runner derives the real data dependencies from it
+FLOW_STEPS = [
+    predict_vehicle_failure,
+    check_maintenance_cost,
+    order_parts,
+    book_service_slot,
+    notify_driver,
+]
+
+
 class MaintenanceInput(BaseModel):
     """Input schema for predictive maintenance flow."""
     vehicle_id: str = Field(description="Vehicle ID to check maintenance for")
@@ -26,12 +36,8 @@ def build(aflow: Flow = None) -> Flow:
     - sent, driver_id, message, booking_ref, summary
     """
     
-    predict = aflow.tool(predict_vehicle_failure)
-    cost = aflow.tool(check_maintenance_cost)
-    order = aflow.tool(order_parts)
-    book = aflow.tool(book_service_slot)
-    notify = aflow.tool(notify_driver)
+    nodes = [aflow.tool(step) for step in FLOW_STEPS]
     
-    aflow.sequence(START, predict, cost, order, book, notify, END)
+    aflow.sequence(START, *nodes, END)
     
     return aflow
\ No newline at end of file
@@ -1,17 +1,246 @@
-import random
+import csv
+import hashlib
+import os
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple, TypedDict
+
+import numpy as np
 from ibm_watsonx_orchestrate.agent_builder.tools import tool, ToolPermission
 
+
+# Telemetry feature columns, in model order
+FEATURES = (
+    "daily_km",
+    "km_since_brake_service",
+    "km_since_tire_change",
+    "km_since_oil_change",
+    "battery_age_days",
+    "harsh_brakes_per_100km",
+    "avg_load_pct",
+    "ambient_temp_c",
+)
+
+# Optional CSV with a vehicle_id column plus the FEATURES columns
+TELEMETRY_PATH_ENV = "PREDICT_TELEMETRY_PATH"
+# Optional .npz written by FailureModel.save
+MODEL_PATH_ENV = "PREDICT_MODEL_PATH"
+
+# Predictions are capped at ten years
+HORIZON_DAYS = 3650.0
+
+
+class FailurePrediction(TypedDict):
+    vehicle_id: str
+    component: str
+    failure_in_days: int
+    confidence: float
+    remaining_useful_life_days: Dict[str, float]
+
+
+@dataclass
+class FailureModel:
+    """Per-component wear model scored for many vehicles at once
+
+    Each component has a rated life in km (or days for the battery). Wear
+    accrues faster under stress, which is a linear function of the driving
+    features: stress = 1 + Z @ stress_weights. For a fleet matrix X this
+    gives remaining useful life in days as
+    (rated_life - usage * stress) / (daily_usage * stress), one matrix
+    expression for all vehicles and components.
+    """
+
+    components: np.ndarray       # (C,) component names
+    rated_life: np.ndarray       # (C,) km or days
+    usage_column: np.ndarray     # (C,) FEATURES index of the usage so far
+    per_km: np.ndarray           # (C,) 1 for km-based wear, 0 for calendar wear
+    stress_columns: np.ndarray   # (K,) FEATURES index of each stress feature
+    stress_scale: np.ndarray     # (K,) value that counts as one unit of stress
+    stress_offset: np.ndarray    # (K,) neutral value of each stress feature
+    stress_weights: np.ndarray   # (K, C)
+    base_confidence: np.ndarray  # (C,)
+    defaults: np.ndarray         # (F,) fleet-typical value used for missing features
+
+    @classmethod
+    def default(cls) -> "FailureModel":
+        return cls(
+            components=np.array(["Brake Pads", "Tires", "Engine Oil", "Battery"]),
+            rated_life=np.array([50_000.0, 60_000.0, 15_000.0, 1_460.0]),
+            usage_column=np.array([1, 2, 3, 4]),
+            per_km=np.array([1.0, 1.0, 1.0, 0.0]),
+            stress_columns=np.array([5, 6, 7]),
+            stress_scale=np.array([10.0, 100.0, 20.0]),
+            stress_offset=np.array([0.0, 0.0, 20.0]),
+            stress_weights=np.array([
+                # Brake  Tires  Oil   Battery
+                [0.6,    0.2,   0.0,  0.0],  # harsh braking
+                [0.4,    0.5,   0.3,  0.0],  # load
+                [0.0,    0.1,   0.3,  0.8],  # distance from 20 C
+            ]),
+            base_confidence=np.array([0.85, 0.8, 0.9, 0.75]),
+            defaults=np.array([250.0, 25_000.0, 30_000.0, 7_500.0, 730.0, 4.0, 60.0, 20.0]),
+        )
+
+    def save(self, path: str):
+        np.savez(path, **{name: getattr(self, name) for name in self.__dataclass_fields__})
+
+    @classmethod
+    def load(cls, path: str) -> "FailureModel":
+        with np.load(path, allow_pickle=False) as data:
+            return cls(**{name: data[name] for name in cls.__dataclass_fields__})
+
+    def score(self, features: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Remaining useful life in days and confidence, both (N, C)
+
+        NaN features are replaced by the fleet defaults and lower the
+        confidence of the prediction.
+        """
+        missing = np.isnan(features)
+        x = np.where(missing, self.defaults, features)
+
+        z = np.abs(x[:, self.stress_columns] - self.stress_offset) / self.stress_scale
+        stress = 1.0 + z @ self.stress_weights
+        usage = x[:, self.usage_column]
+        daily = x[:, [0]] * self.per_km + (1.0 - self.per_km)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            remaining = (self.rated_life - usage * stress) / (daily * stress)
+        remaining = np.clip(np.nan_to_num(remaining, nan=HORIZON_DAYS, posinf=HORIZON_DAYS), 0.0, HORIZON_DAYS)
+
+        confidence = self.base_confidence * (1.0 - 0.5 * missing.mean(axis=1, keepdims=True))
+        return remaining, confidence
+
+
+@lru_cache(maxsize=1)
+def get_model() -> FailureModel:
+    """Model loaded once per process"""
+    path = os.environ.get(MODEL_PATH_ENV)
+    return FailureModel.load(path) if path else FailureModel.default()
+
+
+@lru_cache(maxsize=4)
+def _load_telemetry(path: str, mtime_ns: int) -> Tuple[Dict[str, int], np.ndarray]:
+    """Row index per vehicle id and the (N, F) feature matrix of a telemetry CSV"""
+    index: Dict[str, int] = {}
+    rows: List[List[float]] = []
+    with open(path, newline="", encoding="utf-8") as f:
+        for record in csv.DictReader(f):
+            index[record["vehicle_id"].strip()] = len(rows)
+            rows.append([float(record[name]) if record.get(name) else np.nan for name in FEATURES])
+    return index, np.array(rows, dtype=float).reshape(len(rows), len(FEATURES))
+
+
+def _telemetry() -> Optional[Tuple[Dict[str, int], np.ndarray]]:
+    path = os.environ.get(TELEMETRY_PATH_ENV)
+    if not path:
+        return None
+    return _load_telemetry(path, os.stat(path).st_mtime_ns)
+
+
+def _demo_features(vehicle_id: str) -> np.ndarray:
+    """Stable synthetic telemetry for vehicles without data: brake pads due in 5-12 days"""
+    model = get_model()
+    seed = int.from_bytes(hashlib.sha256(vehicle_id.encode()).digest()[:8], "big")
+    rng = np.random.default_rng(seed)
+
+    daily_km = rng.uniform(200, 350)
+    harsh, load, temp = rng.uniform(2, 6), rng.uniform(40, 80), rng.uniform(5, 30)
+    brake_stress = 1.0 + 0.6 * harsh / 10 + 0.4 * load / 100
+    brake_km = model.rated_life[0] / brake_stress - rng.uniform(5.5, 12.5) * daily_km
+    return np.array([
+        daily_km,
+        brake_km,
+        rng.uniform(0, 0.5) * model.rated_life[1],
+        rng.uniform(0, 0.5) * model.rated_life[2],
+        rng.uniform(0, 700),
+        harsh,
+        load,
+        temp,
+    ])
+
+
+def _features(vehicle_ids: List[str]) -> np.ndarray:
+    telemetry = _telemetry()
+    if telemetry is None:
+        return np.array([_demo_features(vehicle_id) for vehicle_id in vehicle_ids]).reshape(len(vehicle_ids), len(FEATURES))
+
+    index, matrix = telemetry
+    rows = np.array([index.get(vehicle_id, -1) for vehicle_id in vehicle_ids], dtype=int)
+    # Unknown vehicles get all-NaN rows, i.e. fleet defaults at half confidence
+    features = np.full((len(vehicle_ids), len(FEATURES)), np.nan)
+    known = rows >= 0
+    features[known] = matrix[rows[known]]
+    return features
+
+
+def score_fleet(vehicle_ids: List[str]) -> List[FailurePrediction]:
+    """Score every vehicle in one vectorized pass"""
+    model = get_model()
+    remaining, confidence = model.score(_features(vehicle_ids))
+    worst = remaining.argmin(axis=1)
+
+    return [
+        {
+            "vehicle_id": vehicle_id,
+            "component": str(model.components[worst[i]]),
+            "failure_in_days": int(remaining[i, worst[i]]),
+            "confidence": round(float(confidence[i, worst[i]]), 2),
+            "remaining_useful_life_days": {
+                str(name): round(float(days), 1) for name, days in zip(model.components, remaining[i])
+            }
+        }
+        for i, vehicle_id in enumerate(vehicle_ids)
+    ]
+
+
+@lru_cache(maxsize=4)
+def _scored_telemetry_fleet(path: str, mtime_ns: int) -> Dict[str, FailurePrediction]:
+    """Every vehicle in the telemetry snapshot, scored once per snapshot version"""
+    index, _ = _load_telemetry(path, mtime_ns)
+    return {prediction["vehicle_id"]: prediction for prediction in score_fleet(list(index))}
+
+
 @tool(
     name="predict_vehicle_failure",
     description="Predict vehicle component failure and return details",
     permission=ToolPermission.READ_ONLY
 )
-def predict_vehicle_failure(vehicle_id: str) -> dict:
-    """Predict when a vehicle component will fail."""
-    prediction_days = random.randint(5, 12)
+def predict_vehicle_failure(vehicle_id: str) -> FailurePrediction:
+    """Predict when a vehicle component will fail.
+
+    With a telemetry snapshot the first call scores the whole fleet in one
+    pass; every later call for the same snapshot is a lookup.
+    """
+    path = os.environ.get(TELEMETRY_PATH_ENV)
+    if path:
+        prediction = _scored_telemetry_fleet(path, os.stat(path).st_mtime_ns).get(vehicle_id)
+        if prediction is not None:
+            return prediction
+    return score_fleet([vehicle_id])[0]
+
+
+@tool(
+    name="predict_fleet_failures",
+    description="Predict component failures for many vehicles in one call",
+    permission=ToolPermission.READ_ONLY
+)
+def predict_fleet_failures(vehicle_ids: Optional[List[str]] = None) -> dict:
+    """
+    Score a fleet of vehicles in one vectorized pass.
+
+    Args:
+        vehicle_ids: Vehicles to score; all vehicles in the telemetry snapshot when omitted
+    """
+    started = time.perf_counter()
+    if vehicle_ids is None:
+        telemetry = _telemetry()
+        vehicle_ids = list(telemetry[0]) if telemetry else []
+    predictions = score_fleet(vehicle_ids)
+    predictions.sort(key=lambda prediction: prediction["failure_in_days"])
+
     return {
-        "vehicle_id": vehicle_id,  # Pass through for later steps
-        "component": "Brake Pads",
-        "failure_in_days": prediction_days,
-        "confidence": 0.85
-    }
\ No newline at end of file
+        "scored": len(predictions),
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 2),
+        "predictions": predictions
+    }